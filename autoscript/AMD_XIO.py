@@ -6,17 +6,14 @@
 ##                                                      Dean Chen (dchen52@lenovo.com)   ##
 ###########################################################################################
 import os
-import io
 import sys
 import base64
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.ticker as ticker
-from tkinter import *
-from tkinter import messagebox
-from tkinter.filedialog import askopenfilename, asksaveasfilename
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from concurrent.futures import ProcessPoolExecutor
+from analyzer_api import resolve_inputs, resolve_criteria, write_report, report_assets, use_headless_backend
+from report_render import Report, FrameRows, chart
+from figure_pool import PooledChart, render_png
 
 sys.dont_write_bytecode = True
 cur_dir = os.path.dirname(os.path.abspath(__file__))
@@ -25,292 +22,182 @@ root_folder = os.path.dirname(cur_dir)
 copyright = f"Dean Chen (dchen52@lenovo.com)"
 
 
+MARGIN_METRICS = ['Margin Top (volt)', 'Margin Bottom (volt)', 'Margin Left Offset', 'Margin Right Offset']
+PLOT_GROUPS = 5
+DEFAULT_RENDER_WORKERS = min(4, os.cpu_count() or 1)
+DEFAULT_CRITERIA = {"volt_criteria": 25.0, "offset_criteria": 9.0}
+
+
+def build_lane_series(device_data, metrics=MARGIN_METRICS):
+    """Pivot a device's rows into one (group x lane) matrix per metric.
+
+    The n-th row seen for a lane belongs to data group n, so a single
+    groupby/cumcount replaces the per-lane boolean filtering.
+    """
+    grouped = device_data.assign(Group=device_data.groupby('LanePCIeNo').cumcount())
+    series = grouped.pivot(index='Group', columns='LanePCIeNo', values=list(metrics))
+    return {metric: series[metric].sort_index(axis=1) for metric in metrics}
+
+
+def build_lane_panel(ax, title):
+    """Create a lane panel's artists once: a line and its markers per data group plus the criteria line."""
+    from matplotlib import ticker
+    lines, markers = [], []
+    for i in range(PLOT_GROUPS):
+        lines.append(ax.plot([], [], marker='o', linestyle='-', linewidth=1.5, label=f'Data Group {i + 1}')[0])
+        markers.append(ax.scatter([], [], color='blue', s=80, zorder=5))
+    ax.set_title(title)
+    ax.set_xlabel('Lane')
+    ax.set_ylabel(title)
+    ax.grid(True)
+    criteria_line = ax.axhline(y=0, color='red', linestyle='--', linewidth=2)
+    ax.xaxis.set_major_locator(ticker.MaxNLocator(integer=True))
+    return lines, markers, criteria_line
+
+
+def update_lane_panel(ax, panel, matrix, criteria):
+    lines, markers, criteria_line = panel
+    unique_lanes = matrix.columns.tolist()
+    groups = matrix.reindex(range(PLOT_GROUPS))
+    for line, marker, (_, values) in zip(lines, markers, groups.iterrows()):
+        line.set_data(unique_lanes, values.values)
+        points = np.column_stack([unique_lanes, values.values]).astype(float)
+        marker.set_offsets(points[np.isfinite(points).all(axis=1)])
+    criteria_line.set_ydata([criteria, criteria])
+    ax.relim()
+    ax.autoscale_view()
+
+
+def find_worst_lane(device_data, lane_series):
+    """Return the worst lane and its per-metric minimum margins."""
+    lane_min = pd.DataFrame({metric: matrix.min() for metric, matrix in lane_series.items()})
+    candidates = [device_data.loc[device_data[metric].idxmin(), 'LanePCIeNo'] for metric in lane_min.columns]
+    worst_lane = min(candidates, key=lambda lane: lane_min.loc[lane].sum())
+    return worst_lane, lane_min.loc[worst_lane]
+
+
+class DevicePanelsChart(PooledChart):
+    """Template for render_plots_png: the five panels and their artists are built once per process."""
+    figsize = (12, 22)
+    panels = [('Margin Top (volt)', 'Margin Top (mV)'), ('Margin Bottom (volt)', 'Margin Bottom (mV)'),
+              ('Margin Left Offset', 'Margin Left Offset'), ('Margin Right Offset', 'Margin Right Offset')]
+
+    def build(self):
+        params = self.figure.subplotpars
+        self.default_subplotpars = {name: getattr(params, name)
+                                    for name in ('left', 'bottom', 'right', 'top', 'wspace', 'hspace')}
+        self.axs = self.figure.subplots(5, 1).flatten()
+        self.lane_panels = [build_lane_panel(ax, title) for ax, (_, title) in zip(self.axs, self.panels)]
+
+        # Eye Margin; symmetric X-axis range
+        eye_ax = self.axs[4]
+        eye_ax.set_xlim(-20, 20)
+        self.diamond = eye_ax.plot([], [], marker='o', linewidth=2, label='Lane')[0]
+        self.diamond_markers = eye_ax.scatter([], [], color='blue', s=80, zorder=5)
+        self.criteria_diamond = eye_ax.plot([], [], 'r--', linewidth=2)[0]
+        eye_ax.set_title('Eye Diagram')
+        eye_ax.set_xlabel('Timing Margin')
+        eye_ax.set_ylabel('Voltage Margin(mV)')
+        self.legend = eye_ax.legend(loc='upper right')
+        eye_ax.grid(True)
+
+    def update(self, device_data, volt_criteria, offset_criteria):
+        lane_series = build_lane_series(device_data)
+        for ax, panel, (metric, _) in zip(self.axs, self.lane_panels, self.panels):
+            criteria = volt_criteria if '(volt)' in metric else offset_criteria
+            update_lane_panel(ax, panel, lane_series[metric], criteria)
+
+        # Diamond Points for Worst Lane
+        worst_lane, worst_min = find_worst_lane(device_data, lane_series)
+        diamond_x = [-worst_min['Margin Left Offset'], 0, worst_min['Margin Right Offset'], 0,
+                     -worst_min['Margin Left Offset']]
+        diamond_y = [0, worst_min['Margin Top (volt)'], 0, -worst_min['Margin Bottom (volt)'], 0]
+        self.diamond.set_data(diamond_x, diamond_y)
+        self.diamond.set_label(f'Lane {worst_lane}')
+        self.legend.get_texts()[0].set_text(f'Lane {worst_lane}')
+        self.diamond_markers.set_offsets(np.column_stack([diamond_x, diamond_y]))
+        self.criteria_diamond.set_data([-offset_criteria, 0, offset_criteria, 0, -offset_criteria],
+                                       [0, volt_criteria, 0, -volt_criteria, 0])
+        self.axs[4].relim()
+        self.axs[4].autoscale_view()
+
+    def layout(self):
+        # start from the default subplot params like a new figure, so the layout does not drift
+        self.figure.subplots_adjust(**self.default_subplotpars)
+        self.figure.tight_layout(rect=[0, 0.03, 1, 0.95])
+
+
+def render_plots_png(device_data, device, volt_criteria, offset_criteria):
+    return render_png(DevicePanelsChart, device_data, volt_criteria, offset_criteria)
+
+
 def generate_plots(device_data, device, volt_criteria, offset_criteria):
-    fig, axs = plt.subplots(5, 1, figsize=(12, 22))
-    axs = axs.flatten()
-
-    unique_lanes = sorted(device_data['LanePCIeNo'].unique())
-
-    # Margin Top (mV)
-    for i in range(5):
-        values = [device_data.loc[(device_data['LanePCIeNo'] == lane), 'Margin Top (volt)'].iloc[i]
-                  if i < len(device_data.loc[(device_data['LanePCIeNo'] == lane), 'Margin Top (volt)'])
-                  else None
-                  for lane in unique_lanes]
-        axs[0].plot(unique_lanes, values, marker='o', linestyle='-', linewidth=1.5, label=f'Data Group {i + 1}')
-        axs[0].scatter(unique_lanes, values, color='blue', s=80, zorder=5)
-    axs[0].set_title('Margin Top (mV)')
-    axs[0].set_xlabel('Lane')
-    axs[0].set_ylabel('Margin Top (mV)')
-    axs[0].grid(True)
-    axs[0].axhline(y=volt_criteria, color='red', linestyle='--', linewidth=2)
-    axs[0].xaxis.set_major_locator(ticker.MaxNLocator(integer=True))
-
-    # Margin Bottom (mV)
-    for i in range(5):
-        values = [device_data.loc[(device_data['LanePCIeNo'] == lane), 'Margin Bottom (volt)'].iloc[i]
-                  if i < len(device_data.loc[(device_data['LanePCIeNo'] == lane), 'Margin Bottom (volt)'])
-                  else None
-                  for lane in unique_lanes]
-        axs[1].plot(unique_lanes, values, marker='o', linestyle='-', linewidth=1.5, label=f'Data Group {i + 1}')
-        axs[1].scatter(unique_lanes, values, color='blue', s=80, zorder=5)
-    axs[1].set_title('Margin Bottom (mV)')
-    axs[1].set_xlabel('Lane')
-    axs[1].set_ylabel('Margin Bottom (mV)')
-    axs[1].grid(True)
-    axs[1].axhline(y=volt_criteria, color='red', linestyle='--', linewidth=2)
-    axs[1].xaxis.set_major_locator(ticker.MaxNLocator(integer=True))
-
-    # Margin Left Offset
-    for i in range(5):
-        values = [device_data.loc[(device_data['LanePCIeNo'] == lane), 'Margin Left Offset'].iloc[i]
-                  if i < len(device_data.loc[(device_data['LanePCIeNo'] == lane), 'Margin Left Offset'])
-                  else None
-                  for lane in unique_lanes]
-        axs[2].plot(unique_lanes, values, marker='o', linestyle='-', linewidth=1.5, label=f'Data Group {i + 1}')
-        axs[2].scatter(unique_lanes, values, color='blue', s=80, zorder=5)
-    axs[2].set_title('Margin Left Offset')
-    axs[2].set_xlabel('Lane')
-    axs[2].set_ylabel('Margin Left Offset')
-    axs[2].grid(True)
-    axs[2].axhline(y=offset_criteria, color='red', linestyle='--', linewidth=2)
-    axs[2].xaxis.set_major_locator(ticker.MaxNLocator(integer=True))
-
-    # Margin Right Offset
-    for i in range(5):
-        values = [device_data.loc[(device_data['LanePCIeNo'] == lane), 'Margin Right Offset'].iloc[i]
-                  if i < len(device_data.loc[(device_data['LanePCIeNo'] == lane), 'Margin Right Offset'])
-                  else None
-                  for lane in unique_lanes]
-        axs[3].plot(unique_lanes, values, marker='o', linestyle='-', linewidth=1.5, label=f'Data Group {i + 1}')
-        axs[3].scatter(unique_lanes, values, color='blue', s=80, zorder=5)
-    axs[3].set_title('Margin Right Offset')
-    axs[3].set_xlabel('Lane')
-    axs[3].set_ylabel('Margin Right Offset')
-    axs[3].grid(True)
-    axs[3].axhline(y=offset_criteria, color='red', linestyle='--', linewidth=2)
-    axs[3].xaxis.set_major_locator(ticker.MaxNLocator(integer=True))
-
-    # Eye Margin
-    worst_lane_top = device_data.loc[device_data['Margin Top (volt)'].idxmin(), 'LanePCIeNo']
-    worst_lane_bottom = device_data.loc[device_data['Margin Bottom (volt)'].idxmin(), 'LanePCIeNo']
-    worst_lane_left = device_data.loc[device_data['Margin Left Offset'].idxmin(), 'LanePCIeNo']
-    worst_lane_right = device_data.loc[device_data['Margin Right Offset'].idxmin(), 'LanePCIeNo']
-
-    worst_lane = min(
-        [worst_lane_top, worst_lane_bottom, worst_lane_left, worst_lane_right],
-        key=lambda lane: sum([
-            device_data.loc[device_data['LanePCIeNo'] == lane, 'Margin Top (volt)'].min(),
-            device_data.loc[device_data['LanePCIeNo'] == lane, 'Margin Bottom (volt)'].min(),
-            device_data.loc[device_data['LanePCIeNo'] == lane, 'Margin Left Offset'].min(),
-            device_data.loc[device_data['LanePCIeNo'] == lane, 'Margin Right Offset'].min(),
-        ])
-    )
+    img_png = render_plots_png(device_data, device, volt_criteria, offset_criteria)
+    return base64.b64encode(img_png).decode()
 
-    min_left_offset = device_data.loc[device_data['LanePCIeNo'] == worst_lane, 'Margin Left Offset'].min()
-    min_right_offset = device_data.loc[device_data['LanePCIeNo'] == worst_lane, 'Margin Right Offset'].min()
-    min_top_volt = device_data.loc[device_data['LanePCIeNo'] == worst_lane, 'Margin Top (volt)'].min()
-    min_bottom_volt = device_data.loc[device_data['LanePCIeNo'] == worst_lane, 'Margin Bottom (volt)'].min()
 
-    # Determine symmetric X-axis range
-    axs[4].set_xlim(-20, 20)
+def _init_render_worker():
+    # Worker processes never show a window, render off-screen.
+    use_headless_backend()
 
-    # Diamond Points for Worst Lane
-    diamond_points = {
-        'x': [-min_left_offset, 0, min_right_offset, 0, -min_left_offset],
-        'y': [0, min_top_volt, 0, -min_bottom_volt, 0]
-    }
 
-    axs[4].plot(diamond_points['x'], diamond_points['y'], marker='o', linewidth=2, label=f'Lane {worst_lane}')
-    axs[4].scatter(diamond_points['x'], diamond_points['y'], color='blue', s=80, zorder=5)
-    axs[4].plot([-offset_criteria, 0, offset_criteria, 0, -offset_criteria],
-                [0, volt_criteria, 0, -volt_criteria, 0], 'r--', linewidth=2)
-    axs[4].set_title('Eye Diagram')
-    axs[4].set_xlabel('Timing Margin')
-    axs[4].set_ylabel('Voltage Margin(mV)')
-    axs[4].legend(loc='upper right')
-    axs[4].grid(True)
-
-    plt.tight_layout(rect=[0, 0.03, 1, 0.95])
-
-    img_data = io.BytesIO()
-    plt.savefig(img_data, format='png')
-    plt.close(fig)
-    img_data.seek(0)
-    img_base64 = base64.b64encode(img_data.read()).decode()
-
-    return img_base64
-
-
-def html_generate(table_rows, summary_rows, criteria_rows, charts_html, complete_data_html):
-    html_str = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Margin Analysis Report</title>
-        <style>
-            body {{
-                background-color: #f0f8ff;
-                color: #333333;
-                font-family: Arial, sans-serif;
-                margin: 0;
-                padding: 0;
-            }}
-            .container {{
-                max-width: 1200px;
-                margin: 40px auto;
-                background-color: #ffffff;
-                padding: 20px;
-                border-radius: 10px;
-                box-shadow: 0 0 15px rgba(0, 0, 0, 0.1);
-            }}
-            h1, h2 {{
-                text-align: center;
-                color: #333333;
-            }}
-            h1 {{
-                margin-bottom: 20px;
-            }}
-            h2 {{
-                margin-top: 0;
-                margin-bottom: 20px;
-            }}
-            .chart-container {{
-                display: flex;
-                flex-wrap: wrap;
-                justify-content: center;
-            }}
-            .chart {{
-                margin: 20px;
-                border: 1px solid #dddddd;
-                border-radius: 8px;
-                padding: 10px;
-                background-color: #fafafa;
-                box-shadow: 0 0 10px rgba(0, 0, 0, 0.05);
-            }}
-            table {{
-                width: 100%;
-                border-collapse: collapse;
-                margin-top: 20px;
-                background-color: #ffffff;
-            }}
-            table, th, td {{
-                border: 1px solid #dddddd;
-            }}
-            th, td {{
-                padding: 15px;
-                text-align: center;
-            }}
-            th {{
-                background-color: #f0f0f0;
-                color: #333333;
-            }}
-            tr:nth-child(even) {{
-                background-color: #f9f9f9;
-            }}
-            tr:hover {{
-                background-color: #f1f1f1;
-            }}
-            .complete-data {{
-                margin-top: 40px;
-                overflow-x: auto;
-                font-size: 12px; /* Raw Data font size */
-            }}
-            .complete-data table, .complete-data th, .complete-data td {{
-                border: 1px solid #dddddd;
-            }}
-            .complete-data th, .complete-data td {{
-                padding: 5px;
-                text-align: center;
-                height: 5px; /* Raw Data table height */
-            }}
-            .complete-data th {{
-                background-color: #f0f0f0;
-                color: #333333;
-            }}
-            .complete-data th {{
-                width: 25%; /* Raw Data table width */
-            }}
-            .title-header {{
-                font-size: 20px;
-                font-weight: bold;
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h1>Margin Analysis Report</h1>
-            <table>
-                <tr>
-                    <th colspan="4" class="title-header">Data Information</th>
-                </tr>
-                <tr>
-                    <th>Bus</th>
-                    <th>Device</th>
-                    <th>Function</th>
-                    <th>BIOS</th>
-                </tr>
-                {}
-            </table>
-            <table>
-                <tr>
-                    <th colspan="6" class="title-header">Worst Cases Summary</th>
-                </tr>
-                <tr>
-                    <th>Lane</th>
-                    <th>Margin Top (mV)</th>
-                    <th>Margin Bottom (mV)</th>
-                    <th>Margin Left Offset</th>
-                    <th>Margin Right Offset</th>
-                    <th>LCLocalPreset</th>
-                </tr>
-                {}
-            </table>
-            <table>
-                <tr>
-                    <th colspan="4" class="title-header">AMD Criteria</th>
-                </tr>
-                <tr>
-                    <th>Margin Top (mV)</th>
-                    <th>Margin Bottom (mV)</th>
-                    <th>Margin Left Offset</th>
-                    <th>Margin Right Offset</th>
-                </tr>
-                {}
-            </table>
-            <div class="chart-container">
-                {}
-            </div>
-            <div class="complete-data">
-                <h2>Raw Data</h2>
-                {}
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-    html_output = html_str.format(table_rows, summary_rows, criteria_rows, charts_html, complete_data_html)
-    return html_output
+def _render_device(args):
+    device_data, device, volt_criteria, offset_criteria = args
+    return render_plots_png(device_data, device, volt_criteria, offset_criteria)
 
-def browse():
-    filename = askopenfilename(title="Result Directory",
-                               filetypes=[("Margin Result", "*.csv"), ("all files", "*.*")])
-    if filename:
-        E_Raw_data.delete(0, END)
-        E_Raw_data.insert(0, filename)
+
+def render_device_charts(df_plot, volt_criteria, offset_criteria, workers=1):
+    """Render one chart per Bus_Device_Function and return [(device, png_bytes)].
+
+    With workers > 1 the figures are drawn in a process pool; results keep
+    the order the devices first appear in df_plot either way.
+    """
+    unique_devices = df_plot['Bus_Device_Function'].unique()
+    jobs = [(df_plot[df_plot['Bus_Device_Function'] == device], device, volt_criteria, offset_criteria)
+            for device in unique_devices]
+    workers = min(workers, len(jobs))
+    if workers <= 1:
+        images = [_render_device(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_render_worker) as executor:
+            images = list(executor.map(_render_device, jobs))
+    return list(zip(unique_devices, images))
+
+
+WORST_COLUMNS = ['Lane', 'Margin Top (mV)', 'Margin Bottom (mV)', 'Margin Left Offset', 'Margin Right Offset', 'LCLocalPreset']
+
+
+def html_generate(devices, worst_rows, criteria_row, charts, data):
+    """The report as a streamed Report; the raw data table is formatted while it is written."""
+    return Report(
+        "amd_xio.html",
+        title="Margin Analysis Report",
+        devices=devices,
+        worst_columns=WORST_COLUMNS,
+        worst_rows=worst_rows,
+        criteria_row=criteria_row,
+        charts=charts,
+        raw=FrameRows(data),
+    )
 
 def html_output(file_path, full_html):
     output_file_path = os.path.splitext(file_path)[0] + '.html'
-    with open(output_file_path, 'w', encoding='utf-8') as f:
-        f.write(full_html)
+    write_report(output_file_path, full_html)
+
+def analyze(inputs, criteria=None, workers=1, assets=None):
+    """Build the margin report for one or more XIO margin CSVs; nothing is shown.
 
-def generate_button():
-    file_path = str.strip(E_Raw_data.get())
-    offset_criteria = float(str.strip(E_offset_cri.get()))
-    volt_criteria = float(str.strip(E_volt_cri.get()))
+    The device charts are inlined, or written to assets (report_render.ImageAssets) when given.
+    """
+    criteria = resolve_criteria(DEFAULT_CRITERIA, criteria)
+    offset_criteria = float(criteria["offset_criteria"])
+    volt_criteria = float(criteria["volt_criteria"])
+    csv_files = resolve_inputs(inputs, "*.csv")
+    if not csv_files:
+        raise ValueError("No margin CSV found in the inputs.")
 
     # Load data
-    data = pd.read_csv(file_path)
+    data = pd.concat([pd.read_csv(path) for path in csv_files], ignore_index=True)
 
     df_plot = data[
         [' Bus', 'Device', 'Function', 'LanePCIeNo', 'Margin Top (volt)', 'Margin Bottom (volt)', 'Margin Left Offset',
@@ -331,120 +218,99 @@ def generate_button():
     worst_preset_lane = df_plot.loc[df_plot['LCLocalPreset'].idxmin()]
 
     # Generate a single row for each worst condition
-    summary_rows = f"""
-    <tr>
-        <td>lane {worst_top_lane['LanePCIeNo']}</td>
-        <td>{worst_top_lane['Margin Top (volt)']:.5f}</td>
-        <td>{worst_top_lane['Margin Bottom (volt)']:.5f}</td>
-        <td>{worst_top_lane['Margin Left Offset']}</td>
-        <td>{worst_top_lane['Margin Right Offset']}</td>
-        <td>{worst_preset_lane['LCLocalPreset']}</td>
-    </tr>
-    <tr>
-        <td>lane {worst_bottom_lane['LanePCIeNo']}</td>
-        <td>{worst_bottom_lane['Margin Top (volt)']:.5f}</td>
-        <td>{worst_bottom_lane['Margin Bottom (volt)']:.5f}</td>
-        <td>{worst_bottom_lane['Margin Left Offset']}</td>
-        <td>{worst_bottom_lane['Margin Right Offset']}</td>
-        <td>{worst_preset_lane['LCLocalPreset']}</td>
-    </tr>
-    <tr>
-        <td>lane {worst_left_lane['LanePCIeNo']}</td>
-        <td>{worst_left_lane['Margin Top (volt)']:.5f}</td>
-        <td>{worst_left_lane['Margin Bottom (volt)']:.5f}</td>
-        <td>{worst_left_lane['Margin Left Offset']}</td>
-        <td>{worst_left_lane['Margin Right Offset']}</td>
-        <td>{worst_preset_lane['LCLocalPreset']}</td>
-    </tr>
-    <tr>
-        <td>lane {worst_right_lane['LanePCIeNo']}</td>
-        <td>{worst_right_lane['Margin Top (volt)']:.5f}</td>
-        <td>{worst_right_lane['Margin Bottom (volt)']:.5f}</td>
-        <td>{worst_right_lane['Margin Left Offset']}</td>
-        <td>{worst_right_lane['Margin Right Offset']}</td>
-        <td>{worst_preset_lane['LCLocalPreset']}</td>
-    </tr>
-    """
+    worst_rows = [
+        (f"lane {lane['LanePCIeNo']}", f"{lane['Margin Top (volt)']:.5f}", f"{lane['Margin Bottom (volt)']:.5f}",
+         lane['Margin Left Offset'], lane['Margin Right Offset'], worst_preset_lane['LCLocalPreset'])
+        for lane in (worst_top_lane, worst_bottom_lane, worst_left_lane, worst_right_lane)
+    ]
 
     unique_info = data[[' Bus', 'Device', 'Function', 'BIOS']].drop_duplicates()
+    devices = [(int(bus), int(device), int(function), bios)
+               for bus, device, function, bios in unique_info.itertuples(index=False, name=None)]
+    criteria_row = (volt_criteria, volt_criteria, offset_criteria, offset_criteria)
 
-    table_rows = ""
-    charts_html = ""
-    criteria_rows = f"""
-    <tr>
-        <td>{volt_criteria}</td>
-        <td>{volt_criteria}</td>
-        <td>{offset_criteria}</td>
-        <td>{offset_criteria}</td>
-    </tr>
-    """
-
-    table_rows = ""
-    for _, row in unique_info.iterrows():
-        table_rows += f"""
-        <tr>
-            <td>{int(row[' Bus'])}</td>
-            <td>{int(row['Device'])}</td>
-            <td>{int(row['Function'])}</td>
-            <td>{row['BIOS']}</td>
-        </tr>
-        """
-
-    unique_devices = df_plot['Bus_Device_Function'].unique()
-    charts_html = ""
-    for device in unique_devices:
-        device_data = df_plot[df_plot['Bus_Device_Function'] == device]
-        img_base64 = generate_plots(device_data, device, volt_criteria, offset_criteria)
-        chart_html = f'<div class="chart"><img src="data:image/png;base64,{img_base64}" /></div>'
-        charts_html += chart_html
-
-    complete_data_html = data.to_html(index=False)
+    charts = [chart(img_png, alt=device, assets=assets)
+              for device, img_png in render_device_charts(df_plot, volt_criteria, offset_criteria, workers)]
 
     # Generate the full HTML content
-    full_html = html_generate(
-        table_rows,
-        summary_rows,
-        criteria_rows,
-        charts_html,
-        complete_data_html
-    )
+    full_html = html_generate(devices, worst_rows, criteria_row, charts, data)
+
+    return {
+        "html": full_html,
+        "data": data,
+        "worst_cases": {
+            "Margin Top (mV)": worst_top_lane,
+            "Margin Bottom (mV)": worst_bottom_lane,
+            "Margin Left Offset": worst_left_lane,
+            "Margin Right Offset": worst_right_lane,
+            "LCLocalPreset": worst_preset_lane,
+        },
+    }
 
-    # Write the full HTML content to the output file
-    html_output(file_path, full_html)
-
-
-
-# main script
-rootframe = Tk()
-rootframe.title("Visualized Margin Result")
-rootframe.wm_geometry("%dx%d+%d+%d" % (640, 230, 200, 100))
-rootframe.resizable(0, 0)
-# Raw Data Path
-Log_Label = LabelFrame(rootframe, text=" Raw Data Path ", font=("arial", 10), height=75, width=600)
-Log_Label.place(x=20, y=10)
-# Raw Data Folder
-E_Raw_data = Entry(rootframe, width=65, font=("arial", 10))
-E_Raw_data.place(x=35, y=40)
-B_Raw_data = Button(rootframe, text=" Browse.. ", command=browse, pady=2, width=8, font=("arial", 12, "bold"))
-B_Raw_data.place(x=515, y=30)
-# Criteria
-Criteria_Label = LabelFrame(rootframe, text=" AMD Criteria ", font=("arial", 10), height=115, width=300)
-Criteria_Label.place(x=20, y=90)
-# Volt Margin
-L_volt_cri = Label(rootframe, text="Volt Margin (mV) :", height=2, font=("arial", 10))
-L_volt_cri.place(x=35, y=120)
-E_volt_cri = Entry(rootframe, width=15, font=("arial", 10))
-E_volt_cri.insert(0, "25")
-E_volt_cri.place(x=170, y=130)
-# Timing Margin
-L_offset_cri = Label(rootframe, text="Timing Margin :", height=2, font=("arial", 10))
-L_offset_cri.place(x=35, y=150)
-E_offset_cri = Entry(rootframe, width=15, font=("arial", 10))
-E_offset_cri.insert(0, "9")
-E_offset_cri.place(x=170, y=160)
-# Generate Button
-B_Generate = Button(rootframe, text="Generate", command=generate_button, pady=10, width=10, font=("arial", 14, "bold"))
-B_Generate.place(x=420, y=125)
-
-rootframe.mainloop()
 
+def main():
+    from tkinter import Tk, LabelFrame, Entry, Button, Label, END
+    from tkinter.filedialog import askopenfilename
+
+    def browse():
+        filename = askopenfilename(title="Result Directory",
+                                   filetypes=[("Margin Result", "*.csv"), ("all files", "*.*")])
+        if filename:
+            E_Raw_data.delete(0, END)
+            E_Raw_data.insert(0, filename)
+
+    def generate_button():
+        file_path = str.strip(E_Raw_data.get())
+        criteria = {
+            "offset_criteria": float(str.strip(E_offset_cri.get())),
+            "volt_criteria": float(str.strip(E_volt_cri.get())),
+        }
+        workers = max(1, int(str.strip(E_workers.get()) or 1))
+        assets = report_assets(os.path.splitext(file_path)[0] + '.html')
+        result = analyze(file_path, criteria, workers, assets)
+        # Write the full HTML content to the output file
+        html_output(file_path, result["html"])
+
+    # main script
+    rootframe = Tk()
+    rootframe.title("Visualized Margin Result")
+    rootframe.wm_geometry("%dx%d+%d+%d" % (640, 230, 200, 100))
+    rootframe.resizable(0, 0)
+    # Raw Data Path
+    Log_Label = LabelFrame(rootframe, text=" Raw Data Path ", font=("arial", 10), height=75, width=600)
+    Log_Label.place(x=20, y=10)
+    # Raw Data Folder
+    E_Raw_data = Entry(rootframe, width=65, font=("arial", 10))
+    E_Raw_data.place(x=35, y=40)
+    B_Raw_data = Button(rootframe, text=" Browse.. ", command=browse, pady=2, width=8, font=("arial", 12, "bold"))
+    B_Raw_data.place(x=515, y=30)
+    # Criteria
+    Criteria_Label = LabelFrame(rootframe, text=" AMD Criteria ", font=("arial", 10), height=115, width=300)
+    Criteria_Label.place(x=20, y=90)
+    # Volt Margin
+    L_volt_cri = Label(rootframe, text="Volt Margin (mV) :", height=2, font=("arial", 10))
+    L_volt_cri.place(x=35, y=120)
+    E_volt_cri = Entry(rootframe, width=15, font=("arial", 10))
+    E_volt_cri.insert(0, "%g" % DEFAULT_CRITERIA["volt_criteria"])
+    E_volt_cri.place(x=170, y=130)
+    # Timing Margin
+    L_offset_cri = Label(rootframe, text="Timing Margin :", height=2, font=("arial", 10))
+    L_offset_cri.place(x=35, y=150)
+    E_offset_cri = Entry(rootframe, width=15, font=("arial", 10))
+    E_offset_cri.insert(0, "%g" % DEFAULT_CRITERIA["offset_criteria"])
+    E_offset_cri.place(x=170, y=160)
+    # Render Workers
+    L_workers = Label(rootframe, text="Render Workers :", height=2, font=("arial", 10))
+    L_workers.place(x=340, y=90)
+    E_workers = Entry(rootframe, width=6, font=("arial", 10))
+    E_workers.insert(0, str(DEFAULT_RENDER_WORKERS))
+    E_workers.place(x=460, y=100)
+    # Generate Button
+    B_Generate = Button(rootframe, text="Generate", command=generate_button, pady=10, width=10, font=("arial", 14, "bold"))
+    B_Generate.place(x=420, y=135)
+
+    rootframe.mainloop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
-import base64
 import os
 import glob
 
+from analyzer_api import resolve_criteria, write_report, report_assets
+from report_render import image_src
+
 # Criteria
 criteria = {"Eye Height": 20,
             "Eye Width": 200}
@@ -9,97 +11,10 @@ criteria = {"Eye Height": 20,
 # Step 1: Define the directory path and NVMe device
 directory_path = r"C:\Users\dchen52\OneDrive - Lenovo\Documents\Kioxia\CD8P Margin"  # Replace with your directory path
 nvme_device = "nvme0"  # Specify the NVMe device to process (e.g., "nvme0" or "nvme1")
-output_html_path = os.path.join(directory_path, f"Margin_Analysis_Report_{nvme_device}.html")
-
-# Step 2: Find all .txt files in the directory matching the pattern EOM-LaneX-nvmeY.txt
-txt_files = glob.glob(os.path.join(directory_path, f"EOM-Lane*-{nvme_device}.txt"))
-
-# Step 3: Process each .txt file and its corresponding .png file
-data_entries = []
-data_info = {}  # To store Data Information fields (assumed to be consistent across files)
-for txt_file in txt_files:
-    # Parse the log file
-    log_data = {}
-    with open(txt_file, "r") as file:
-        for line in file:
-            key, value = line.strip().split(",", 1)  # Split on the first comma
-            log_data[key] = value
-
-    # Extract Lane from the filename
-    filename = os.path.basename(txt_file)
-    lane = filename.split("-")[1]  # e.g., Lane0
-
-    # Find the corresponding .png file
-    image_file_path = os.path.join(directory_path, f"EOM-{lane}-{nvme_device}.png")
-    if os.path.exists(image_file_path):
-        with open(image_file_path, "rb") as image_file:
-            eye_diagram_base64 = base64.b64encode(image_file.read()).decode('utf-8')
-    else:
-        eye_diagram_base64 = ""  # Handle missing image case
-        print(f"Warning: Image file '{image_file_path}' not found.")
-
-    # Calculate Eye Height * Eye Width
-    eye_height_width = float(log_data["Eye_Height"]) * float(log_data["Eye_Width"])
-    margin_top = float(log_data["Upper_Margin"])
-    margin_bottom = float(log_data["Lower_Margin"])
-    margin_left = float(log_data["Left_Margin"]) * 1000
-    margin_right = float(log_data["Right_Margin"]) * 1000
-
-    # Store Data Information fields (assumed to be the same for all lanes)
-    if not data_info:
-        data_info = {
-            "Viewer_revision": log_data.get("Viewer_revision", "N/A"),
-            "Port_Number": log_data.get("Port_Number", "N/A"),
-            "Link_Speed": log_data.get("Link_Speed", "N/A"),
-            "Phy_identifier": log_data.get("Phy_identifier", "N/A"),
-            "Acutual_BER": log_data.get("Acutual_BER", "N/A")
-        }
-
-    # Store the data for this lane
-    data_entries.append({
-        "lane": lane.lower().replace("lane", "lane "),  # Format as "lane 0"
-        "log_data": log_data,
-        "eye_diagram": eye_diagram_base64,
-        "eye_height_width": round(eye_height_width, 1),
-        "margin_top": margin_top,
-        "margin_bottom": margin_bottom,
-        "margin_left": round(margin_left, 1),
-        "margin_right": round(margin_right, 1),
-        "metrics": {
-            "eye_height_width": eye_height_width,
-            "margin_top": margin_top,
-            "margin_bottom": margin_bottom,
-            "margin_left": margin_left,
-            "margin_right": margin_right
-        }
-    })
-
-# Step 4: Find the smallest value for each metric and the corresponding lane
-if data_entries:
-    min_metrics = {
-        "eye_height_width": {"value": float('inf'), "lane": None, "entry": None},
-        "margin_top": {"value": float('inf'), "lane": None, "entry": None},
-        "margin_bottom": {"value": float('inf'), "lane": None, "entry": None},
-        "margin_left": {"value": float('inf'), "lane": None, "entry": None},
-        "margin_right": {"value": float('inf'), "lane": None, "entry": None}
-    }
 
-    for entry in data_entries:
-        metrics = entry["metrics"]
-        lane = entry["lane"]
-        for metric_name, value in metrics.items():
-            if value < min_metrics[metric_name]["value"]:
-                min_metrics[metric_name]["value"] = value
-                min_metrics[metric_name]["lane"] = lane
-                min_metrics[metric_name]["entry"] = entry
-
-    worst_case_entries = list(min_metrics.values())
-else:
-    worst_case_entries = []
-    print("No data entries found for the specified NVMe device.")
+DEFAULT_CRITERIA = dict(criteria)
 
-# Step 5: Create the HTML content with styling
-html_content = """
+HTML_TEMPLATE = """
 <!DOCTYPE html>
 <html>
 <head>
@@ -251,7 +166,8 @@ html_content = """
             {worst_case_rows}
         </table>
 """
-html_content += f"""
+
+CRITERIA_TEMPLATE = """
         <!-- Vendor Criteria -->
         <table>
             <tr>
@@ -262,12 +178,13 @@ html_content += f"""
                 <th>Eye Width (UI)</th>
             </tr>
             <tr>
-                <td>{criteria["Eye Height"]}</td>
-                <td>{criteria["Eye Width"]}</td>
+                <td>{eye_height}</td>
+                <td>{eye_width}</td>
             </tr>
         </table>
 """
-html_content +="""
+
+RAW_DATA_TEMPLATE = """
         <!-- Raw Data -->
         <div class="complete-data">
             <h2>Raw Data</h2>
@@ -290,7 +207,6 @@ html_content +="""
 </html>
 """
 
-# Step 6: Generate rows for the "Worst Cases Summary" table
 worst_case_row_template = """
             <tr>
                 <td>{lane}</td>
@@ -302,45 +218,6 @@ worst_case_row_template = """
             </tr>
 """
 
-def format_value(value, is_min):
-    if is_min:
-        return f'<font>{value}</font>'
-    return str(value)
-
-worst_case_rows = ""
-if not worst_case_entries:
-    worst_case_rows = """
-            <tr>
-                <td colspan="6">No data available</td>
-            </tr>
-    """
-else:
-    processed_metrics = set()
-    for metric_name, min_data in min_metrics.items():
-        if metric_name in processed_metrics:
-            continue
-        entry = min_data["entry"]
-        if not entry:
-            continue
-
-        processed_metrics.add(metric_name)
-
-        eye_height_width = format_value(entry["eye_height_width"], metric_name == "eye_height_width")
-        margin_top = format_value(entry["margin_top"], metric_name == "margin_top")
-        margin_bottom = format_value(entry["margin_bottom"], metric_name == "margin_bottom")
-        margin_left = format_value(entry["margin_left"], metric_name == "margin_left")
-        margin_right = format_value(entry["margin_right"], metric_name == "margin_right")
-
-        worst_case_rows += worst_case_row_template.format(
-            lane=entry["lane"],
-            eye_height_width=eye_height_width,
-            margin_top=margin_top,
-            margin_bottom=margin_bottom,
-            margin_left=margin_left,
-            margin_right=margin_right
-        )
-
-# Step 7: Generate rows for the "Raw Data" table
 complete_data_row_template = """
                 <tr>
                     <td>{lane}</td>
@@ -350,39 +227,196 @@ complete_data_row_template = """
                     <td>{Right_Margin} UI</td>
                     <td>{Upper_Margin} mV</td>
                     <td>{Lower_Margin} mV</td>
-                    <td><img src="data:image/png;base64,{eye_diagram}" class="eye-diagram" alt="Eye Diagram {lane}"></td>
+                    <td><img src="{eye_diagram}" class="eye-diagram" alt="Eye Diagram {lane}" loading="lazy" decoding="async"></td>
                 </tr>
 """
 
-complete_data_rows = ""
-data_entries.sort(key=lambda x: int(x["lane"].split()[-1]))
-for entry in data_entries:
-    log_data = entry["log_data"]
-    complete_data_rows += complete_data_row_template.format(
-        lane=entry["lane"],
-        Eye_Width=log_data["Eye_Width"],
-        Eye_Height=log_data["Eye_Height"],
-        Left_Margin=log_data["Left_Margin"],
-        Right_Margin=log_data["Right_Margin"],
-        Upper_Margin=log_data["Upper_Margin"],
-        Lower_Margin=log_data["Lower_Margin"],
-        eye_diagram=entry["eye_diagram"]
+
+def parse_eom_files(directory_path, nvme_device, assets=None):
+    """Step 2-3: parse every EOM-LaneX-nvmeY.txt log and its eye diagram .png.
+
+    Each entry's eye_diagram is the image src: a data URI, or a file in assets when given.
+    """
+    txt_files = glob.glob(os.path.join(directory_path, f"EOM-Lane*-{nvme_device}.txt"))
+
+    data_entries = []
+    data_info = {}  # To store Data Information fields (assumed to be consistent across files)
+    for txt_file in txt_files:
+        # Parse the log file
+        log_data = {}
+        with open(txt_file, "r") as file:
+            for line in file:
+                key, value = line.strip().split(",", 1)  # Split on the first comma
+                log_data[key] = value
+
+        # Extract Lane from the filename
+        filename = os.path.basename(txt_file)
+        lane = filename.split("-")[1]  # e.g., Lane0
+
+        # Find the corresponding .png file
+        image_file_path = os.path.join(directory_path, f"EOM-{lane}-{nvme_device}.png")
+        if os.path.exists(image_file_path):
+            with open(image_file_path, "rb") as image_file:
+                eye_diagram = image_src(image_file.read(), assets)
+        else:
+            eye_diagram = ""  # Handle missing image case
+            print(f"Warning: Image file '{image_file_path}' not found.")
+
+        # Calculate Eye Height * Eye Width
+        eye_height_width = float(log_data["Eye_Height"]) * float(log_data["Eye_Width"])
+        margin_top = float(log_data["Upper_Margin"])
+        margin_bottom = float(log_data["Lower_Margin"])
+        margin_left = float(log_data["Left_Margin"]) * 1000
+        margin_right = float(log_data["Right_Margin"]) * 1000
+
+        # Store Data Information fields (assumed to be the same for all lanes)
+        if not data_info:
+            data_info = {
+                "Viewer_revision": log_data.get("Viewer_revision", "N/A"),
+                "Port_Number": log_data.get("Port_Number", "N/A"),
+                "Link_Speed": log_data.get("Link_Speed", "N/A"),
+                "Phy_identifier": log_data.get("Phy_identifier", "N/A"),
+                "Acutual_BER": log_data.get("Acutual_BER", "N/A")
+            }
+
+        # Store the data for this lane
+        data_entries.append({
+            "lane": lane.lower().replace("lane", "lane "),  # Format as "lane 0"
+            "log_data": log_data,
+            "eye_diagram": eye_diagram,
+            "eye_height_width": round(eye_height_width, 1),
+            "margin_top": margin_top,
+            "margin_bottom": margin_bottom,
+            "margin_left": round(margin_left, 1),
+            "margin_right": round(margin_right, 1),
+            "metrics": {
+                "eye_height_width": eye_height_width,
+                "margin_top": margin_top,
+                "margin_bottom": margin_bottom,
+                "margin_left": margin_left,
+                "margin_right": margin_right
+            }
+        })
+
+    return data_entries, data_info
+
+
+def find_min_metrics(data_entries):
+    """Step 4: find the smallest value for each metric and the corresponding lane."""
+    min_metrics = {
+        "eye_height_width": {"value": float('inf'), "lane": None, "entry": None},
+        "margin_top": {"value": float('inf'), "lane": None, "entry": None},
+        "margin_bottom": {"value": float('inf'), "lane": None, "entry": None},
+        "margin_left": {"value": float('inf'), "lane": None, "entry": None},
+        "margin_right": {"value": float('inf'), "lane": None, "entry": None}
+    }
+
+    for entry in data_entries:
+        metrics = entry["metrics"]
+        lane = entry["lane"]
+        for metric_name, value in metrics.items():
+            if value < min_metrics[metric_name]["value"]:
+                min_metrics[metric_name]["value"] = value
+                min_metrics[metric_name]["lane"] = lane
+                min_metrics[metric_name]["entry"] = entry
+
+    return min_metrics
+
+
+def format_value(value, is_min):
+    if is_min:
+        return f'<font>{value}</font>'
+    return str(value)
+
+
+def generate_html(data_entries, data_info, min_metrics, criteria, nvme_device):
+    """Step 5-8: render the report."""
+    html_content = HTML_TEMPLATE + CRITERIA_TEMPLATE.format(
+        eye_height=criteria["Eye Height"], eye_width=criteria["Eye Width"]) + RAW_DATA_TEMPLATE
+
+    # Step 6: Generate rows for the "Worst Cases Summary" table
+    worst_case_rows = ""
+    if not data_entries:
+        worst_case_rows = """
+            <tr>
+                <td colspan="6">No data available</td>
+            </tr>
+    """
+    else:
+        processed_metrics = set()
+        for metric_name, min_data in min_metrics.items():
+            if metric_name in processed_metrics:
+                continue
+            entry = min_data["entry"]
+            if not entry:
+                continue
+
+            processed_metrics.add(metric_name)
+
+            eye_height_width = format_value(entry["eye_height_width"], metric_name == "eye_height_width")
+            margin_top = format_value(entry["margin_top"], metric_name == "margin_top")
+            margin_bottom = format_value(entry["margin_bottom"], metric_name == "margin_bottom")
+            margin_left = format_value(entry["margin_left"], metric_name == "margin_left")
+            margin_right = format_value(entry["margin_right"], metric_name == "margin_right")
+
+            worst_case_rows += worst_case_row_template.format(
+                lane=entry["lane"],
+                eye_height_width=eye_height_width,
+                margin_top=margin_top,
+                margin_bottom=margin_bottom,
+                margin_left=margin_left,
+                margin_right=margin_right
+            )
+
+    # Step 7: Generate rows for the "Raw Data" table
+    complete_data_rows = ""
+    for entry in sorted(data_entries, key=lambda x: int(x["lane"].split()[-1])):
+        log_data = entry["log_data"]
+        complete_data_rows += complete_data_row_template.format(
+            lane=entry["lane"],
+            Eye_Width=log_data["Eye_Width"],
+            Eye_Height=log_data["Eye_Height"],
+            Left_Margin=log_data["Left_Margin"],
+            Right_Margin=log_data["Right_Margin"],
+            Upper_Margin=log_data["Upper_Margin"],
+            Lower_Margin=log_data["Lower_Margin"],
+            eye_diagram=entry["eye_diagram"]
+        )
+
+    # Step 8: Format the HTML with the generated rows
+    return html_content.format(
+        nvme_device=nvme_device,
+        Viewer_revision=data_info.get("Viewer_revision", "N/A"),
+        Port_Number=data_info.get("Port_Number", "N/A"),
+        Link_Speed=data_info.get("Link_Speed", "N/A"),
+        Phy_identifier=data_info.get("Phy_identifier", "N/A"),
+        Acutual_BER=data_info.get("Acutual_BER", "N/A"),
+        worst_case_rows=worst_case_rows,
+        complete_data_rows=complete_data_rows
     )
 
-# Step 8: Format the HTML with the generated rows
-html_output = html_content.format(
-    nvme_device=nvme_device,
-    Viewer_revision=data_info.get("Viewer_revision", "N/A"),
-    Port_Number=data_info.get("Port_Number", "N/A"),
-    Link_Speed=data_info.get("Link_Speed", "N/A"),
-    Phy_identifier=data_info.get("Phy_identifier", "N/A"),
-    Acutual_BER=data_info.get("Acutual_BER", "N/A"),
-    worst_case_rows=worst_case_rows,
-    complete_data_rows=complete_data_rows
-)
-
-# Step 9: Write the HTML to the source directory
-with open(output_html_path, "w") as html_file:
-    html_file.write(html_output)
-
-print(f"HTML report generated as '{output_html_path}'")
\ No newline at end of file
+
+def analyze(inputs, criteria=None, nvme_device="nvme0", assets=None):
+    """Build the EOM report for one NVMe device in a log directory.
+
+    Nothing is written unless assets (report_render.ImageAssets) is given; the
+    eye diagrams are then copied there once instead of being inlined.
+    """
+    criteria = resolve_criteria(DEFAULT_CRITERIA, criteria)
+    data_entries, data_info = parse_eom_files(inputs, nvme_device, assets)
+    if not data_entries:
+        print("No data entries found for the specified NVMe device.")
+    min_metrics = find_min_metrics(data_entries)
+    html = generate_html(data_entries, data_info, min_metrics, criteria, nvme_device)
+    return {"html": html, "data_entries": data_entries, "data_info": data_info, "worst_cases": min_metrics}
+
+
+def main(directory_path, nvme_device):
+    # Step 9: Write the HTML to the source directory
+    output_html_path = os.path.join(directory_path, f"Margin_Analysis_Report_{nvme_device}.html")
+    result = analyze(directory_path, nvme_device=nvme_device, assets=report_assets(output_html_path))
+    write_report(output_html_path, result["html"])
+
+
+if __name__ == "__main__":
+    main(directory_path, nvme_device)
@@ -3,8 +3,10 @@ import io
 import base64
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.ticker as ticker
+
+from analyzer_api import resolve_inputs, resolve_criteria, write_report, report_assets, pyplot
+from worst_case import LMT_MARGIN_SPECS, worst_case_rows
+from report_render import Report, FrameRows, chart, worst_rows
 
 # ========= 使用者可修改區 =========
 input_folder = r"C:\Users\dchen52\OneDrive - Lenovo\Documents\Astera\Astera_retimer\Astera LMT compare RXC\Intel LMT+Kauai+Genoa+P5+Slot12\5 log csv"
@@ -12,6 +14,8 @@ ui_criteria = 0  # Timing Margin UI 標準
 volt_criteria = 0  # Voltage Margin mV 標準
 # =================================
 
+DEFAULT_CRITERIA = {"ui_criteria": ui_criteria, "volt_criteria": volt_criteria}
+
 column_map = {
     "Left (%UI)": "Margin Left (UI)",
     "Right (%UI)": "Margin Right (UI)",
@@ -33,13 +37,7 @@ def find_worst_cases(data):
     data['EH'] = data['Total Volt(volt)']
     data['EW'] = data['Total Phase(UI)']
     data['EH_EW'] = data['EH'] * data['EW']
-    return {
-        'Worst ML': data.loc[data['ML'].idxmin()],
-        'Worst MR': data.loc[data['MR'].idxmin()],
-        'Worst MT': data.loc[data['MT'].idxmin()],
-        'Worst MB': data.loc[data['MB'].idxmin()],
-        'Worst EH*EW': data.loc[data['EH_EW'].idxmin()]
-    }
+    return worst_case_rows(data, LMT_MARGIN_SPECS)
 
 def generate_eye_diagram(ax, worst_cases, ui_criteria, volt_criteria):
     def plot_eye(case, color, label):
@@ -77,6 +75,8 @@ def generate_eye_diagram(ax, worst_cases, ui_criteria, volt_criteria):
     ax.legend(loc='upper right')
 
 def generate_eh_ew_plots(data, volt_criteria, ui_criteria):
+    from matplotlib import ticker
+    plt = pyplot()
     fig, axs = plt.subplots(2, 1, figsize=(12, 16))
     axs = axs.flatten()
 
@@ -147,164 +147,79 @@ def generate_eh_ew_plots(data, volt_criteria, ui_criteria):
     img_base64 = base64.b64encode(img_data.read()).decode()
     return img_base64
 
-def generate_html(data, eye_diagram_base64, eh_ew_base64, ui_criteria, volt_criteria, output_file):
+WORST_ORDER = ['Worst EH*EW', 'Worst MT', 'Worst MB', 'Worst ML', 'Worst MR']
+WORST_COLUMNS = ['Lane', 'EH*EW', 'Margin Top (mV)', 'Margin Bottom (mV)', 'Margin Left (UI)', 'Margin Right (UI)']
+WORST_CELLS = [
+    ('Worst EH*EW', 'EH_EW', '.1f'),
+    ('Worst MT', 'Margin Top (volt)', '.1f'),
+    ('Worst MB', 'Margin Bottom (volt)', '.1f'),
+    ('Worst ML', 'Margin Left (UI)', '.1f'),
+    ('Worst MR', 'Margin Right (UI)', '.1f'),
+]
+
+def generate_html(data, eye_diagram_base64, eh_ew_base64, ui_criteria, volt_criteria, assets=None):
     summary = find_worst_cases(data)
+    # Worst-case values are highlighted in red bold
+    cases = [(key, summary[key]) for key in WORST_ORDER]
+    return Report(
+        "lmt_margin.html",
+        title="Margin Analysis Report",
+        worst_columns=WORST_COLUMNS,
+        worst_rows=worst_rows(cases, lambda case: f"Lane {case['Lane']}", WORST_CELLS),
+        criteria_title="LMT Criteria",
+        volt_criteria=volt_criteria,
+        ui_criteria=ui_criteria,
+        charts=[chart(eh_ew_base64, assets=assets), chart(eye_diagram_base64, assets=assets)],
+        raw=FrameRows(data),
+    )
 
-    charts_html = f'<div class="chart"><img src="data:image/png;base64,{eh_ew_base64}" /></div>'
-    charts_html += f'<div class="chart"><img src="data:image/png;base64,{eye_diagram_base64}" /></div>'
-
-    html = f"""<!DOCTYPE html>
-    <html><head><meta charset="UTF-8"><title>Margin Analysis Report</title>
-        <style>
-            body {{
-                background-color: #f0f8ff;
-                color: #333333;
-                font-family: Arial, sans-serif;
-                margin: 0;
-                padding: 0;
-            }}
-            .container {{
-                max-width: 1200px;
-                margin: 40px auto;
-                background-color: #ffffff;
-                padding: 20px;
-                border-radius: 10px;
-                box-shadow: 0 0 15px rgba(0, 0, 0, 0.1);
-            }}
-            h1 {{
-                text-align: center;
-                color: #333333;
-                margin-bottom: 20px;
-            }}
-            .chart-container {{
-                display: flex;
-                flex-wrap: wrap;
-                justify-content: center;
-            }}
-            .chart {{
-                margin: 20px;
-                border: 1px solid #dddddd;
-                border-radius: 8px;
-                padding: 10px;
-                background-color: #fafafa;
-                box-shadow: 0 0 10px rgba(0, 0, 0, 0.05);
-            }}
-            .title-header {{
-                font-size: 20px;
-                font-weight: bold;
-                background-color: #f0f0f0;
-                padding: 10px;
-                text-align: center;
-                border: 1px solid #dddddd;
-            }}
-            table {{
-                width: 100%;
-                border-collapse: collapse;
-                margin-top: 20px;
-                background-color: #ffffff;
-            }}
-            table, th, td {{
-                border: 1px solid #dddddd;
-            }}
-            th, td {{
-                padding: 15px;
-                text-align: center;
-            }}
-            th {{
-                background-color: #f0f0f0;
-                color: #333333;
-            }}
-            tr:nth-child(even) {{
-                background-color: #f9f9f9;
-            }}
-            tr:hover {{
-                background-color: #f1f1f1;
-            }}
-            .eye-diagram {{
-                text-align: center;
-                margin-top: 40px;
-                margin-bottom: 40px;
-            }}
-            .eye-diagram img {{
-                max-width: 1000px;
-                height: auto;
-                border: 1px solid #ccc;
-                background: white;
-                padding: 5px;
-            }}
-            .raw-table {{
-                margin-top: 40px;
-                overflow-x: auto;
-                font-size: 12px;
-            }}
-            .raw-table table, .raw-table th, .raw-table td {{
-                border: 1px solid #dddddd;
-            }}
-            .raw-table th, .raw-table td {{
-                padding: 5px;
-                text-align: center;
-                height: 5px;
-            }}
-            .raw-table th {{
-                background-color: #f0f0f0;
-                color: #333333;
-            }}
-        </style>
-    </head><body><div class="container"><h1>Margin Analysis Report</h1>
-    <table><tr><th colspan="6" class="title-header">Worst Cases Summary</th></tr>
-    <tr><th>Lane</th><th>EH*EW</th><th
-
->Margin Top (mV)</th><th>Margin Bottom (mV)</th><th>Margin Left (UI)</th><th>Margin Right (UI)</th></tr>"""
-
-    # Generate table rows with red bold highlighting for worst-case values
-    for key in ['Worst EH*EW', 'Worst MT', 'Worst MB', 'Worst ML', 'Worst MR']:
-        case = summary[key]
-        lane = case['Lane']
-        eh_ew = f"<font color=\"red\" size=\"4\"><b>{case['EH_EW']:.1f}</b></font>" if key == 'Worst EH*EW' else f"{case['EH_EW']:.1f}"
-        mt = f"<font color=\"red\" size=\"4\"><b>{case['Margin Top (volt)']:.1f}</b></font>" if key == 'Worst MT' else f"{case['Margin Top (volt)']:.1f}"
-        mb = f"<font color=\"red\" size=\"4\"><b>{case['Margin Bottom (volt)']:.1f}</b></font>" if key == 'Worst MB' else f"{case['Margin Bottom (volt)']:.1f}"
-        ml = f"<font color=\"red\" size=\"4\"><b>{case['Margin Left (UI)']:.1f}</b></font>" if key == 'Worst ML' else f"{case['Margin Left (UI)']:.1f}"
-        mr = f"<font color=\"red\" size=\"4\"><b>{case['Margin Right (UI)']:.1f}</b></font>" if key == 'Worst MR' else f"{case['Margin Right (UI)']:.1f}"
-        html += f"<tr><td>Lane {lane}</td><td>{eh_ew}</td><td>{mt}</td><td>{mb}</td><td>{ml}</td><td>{mr}</td></tr>"
-
-    html += f"""</table>
-    <table><tr><th colspan="4" class="title-header">LMT Criteria</th></tr>
-    <tr><th>Margin Top (mV)</th><th>Margin Bottom (mV)</th><th>Margin Left (UI)</th><th>Margin Right (UI)</th></tr>
-    <tr><td>{volt_criteria}</td><td>{volt_criteria}</td><td>{ui_criteria}</td><td>{ui_criteria}</td></tr></table>
-    <div class="chart-container">{charts_html}</div>
-    <div class="raw-table"><div class="title-header">Raw Data</div>{data.to_html(index=False, border=1)}</div></div></body></html>"""
-
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write(html)
-    print(f"HTML report saved to: {output_file}")
-
-# 主流程
-all_data = []
-for file in os.listdir(input_folder):
-    if file.endswith(".csv"):
-        path = os.path.join(input_folder, file)
+def generate_eye_diagram_base64(worst_cases, ui_criteria, volt_criteria):
+    plt = pyplot()
+    fig, ax = plt.subplots(figsize=(12, 8))
+    generate_eye_diagram(ax, worst_cases, ui_criteria, volt_criteria)
+    buf = io.BytesIO()
+    plt.savefig(buf, format="png")
+    buf.seek(0)
+    eye_base64 = base64.b64encode(buf.read()).decode()
+    plt.close()
+    return eye_base64
+
+def load_margin_data(inputs):
+    all_data = []
+    for path in resolve_inputs(inputs, "*.csv"):
         try:
             df = pd.read_csv(path)
             df = standardize_columns(df)
             all_data.append(df)
         except Exception as e:
-            print(f"Error reading {file}: {e}")
+            print(f"Error reading {os.path.basename(path)}: {e}")
+
+    if not all_data:
+        raise ValueError("No valid CSV files found.")
+
+    return pd.concat(all_data, ignore_index=True)
 
-if not all_data:
-    raise ValueError("No valid CSV files found.")
+def analyze(inputs, criteria=None, assets=None):
+    """Build the combined margin report for a log folder (or list of logs).
 
-combined_df = pd.concat(all_data, ignore_index=True)
-worst = find_worst_cases(combined_df)
+    Nothing is written unless assets (report_render.ImageAssets) is given, in
+    which case the charts are stored there rather than inlined.
+    """
+    criteria = resolve_criteria(DEFAULT_CRITERIA, criteria)
+    ui_criteria = criteria["ui_criteria"]
+    volt_criteria = criteria["volt_criteria"]
 
-fig, ax = plt.subplots(figsize=(12, 8))
-generate_eye_diagram(ax, worst, ui_criteria, volt_criteria)
-buf = io.BytesIO()
-plt.savefig(buf, format="png")
-buf.seek(0)
-eye_base64 = base64.b64encode(buf.read()).decode()
-plt.close()
+    combined_df = load_margin_data(inputs)
+    worst = find_worst_cases(combined_df)
+    eye_base64 = generate_eye_diagram_base64(worst, ui_criteria, volt_criteria)
+    eh_ew_base64 = generate_eh_ew_plots(combined_df, volt_criteria, ui_criteria)
+    html = generate_html(combined_df, eye_base64, eh_ew_base64, ui_criteria, volt_criteria, assets)
+    return {"html": html, "data": combined_df, "worst_cases": worst}
 
-eh_ew_base64 = generate_eh_ew_plots(combined_df, volt_criteria, ui_criteria)
+def main(input_folder):
+    output_html_path = os.path.join(input_folder, "combined_margin_report.html")
+    result = analyze(input_folder, assets=report_assets(output_html_path))
+    write_report(output_html_path, result["html"])
 
-output_html_path = os.path.join(input_folder, "combined_margin_report.html")
-generate_html(combined_df, eye_base64, eh_ew_base64, ui_criteria, volt_criteria, output_html_path)
\ No newline at end of file
+if __name__ == "__main__":
+    main(input_folder)
@@ -1,8 +1,16 @@
 import numpy as np
 import pandas as pd
 import os
+import json
 import base64
+import hashlib
+import tempfile
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from analyzer_api import resolve_inputs, resolve_criteria, write_report
+from eye_geometry import measure_eyes
+from worst_case import find_worst_cases
 
 #=========================================================================
 #=========================================================================
@@ -14,95 +22,242 @@ image_path = r"C:\Users\dchen52\OneDrive - Lenovo\Documents\Microchip\Switch_log
 #=========================================================================
 #=========================================================================
 
-def parse_excel_data(file_path):
-    """Parse data from Excel file with multiple sheets."""
+# The switch eye export has no pass/fail limits, the report only ranks lanes.
+DEFAULT_CRITERIA = {}
+DEFAULT_SHEET_WORKERS = min(4, os.cpu_count() or 1)
+# Decoded lane sheets, keyed by the export's SHA-256; least recently used entries go first past the size limit.
+EXCEL_CACHE_DIR = os.environ.get("MDMS_EXCEL_CACHE", os.path.join(tempfile.gettempdir(), "mdms_excel_cache"))
+EXCEL_CACHE_MAX_BYTES = int(os.environ.get("MDMS_EXCEL_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+EXCEL_CACHE_VERSION = 1
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+def _cell_float(value):
+    """Numeric value of a cell, NaN for blanks and text (pd.to_numeric errors="coerce")."""
+    if value is None:
+        return np.nan
     try:
-        xl = pd.ExcelFile(file_path)
-        sheets = xl.sheet_names
-        eye_metrics = []
-
-        if "Eye Metrics" in sheets:
-            df_metrics = pd.read_excel(file_path, sheet_name="Eye Metrics", header=1)
-            for _, row in df_metrics.iterrows():
-                lane = row.iloc[0]
-                if pd.isna(lane) or not str(lane).startswith("Lane #"):
-                    continue
-                link_speed = (
-                    row.iloc[1]
-                    if len(row) > 1 and not pd.isna(row.iloc[1])
-                    else "Unknown"
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _parse_eye_metrics_rows(rows):
+    """Eye Metrics sheet rows (row 2 is the header) -> [{lane, link_speed, eye_width_ui, eye_height_mv}]."""
+    eye_metrics = []
+    for row in rows[2:]:
+        lane = row[0] if row else None
+        if lane is None or not str(lane).startswith("Lane #"):
+            continue
+        link_speed = row[1] if len(row) > 1 and row[1] is not None else "Unknown"
+        eye_metrics_str = row[2] if len(row) > 2 and row[2] is not None else None
+        if eye_metrics_str:
+            try:
+                eye_width_ui, eye_height_mv = map(
+                    float,
+                    eye_metrics_str.replace(" UI x ", " ").replace(" mV", "").split(),
                 )
-                eye_metrics_str = (
-                    row.iloc[2] if len(row) > 2 and not pd.isna(row.iloc[2]) else None
+                eye_metrics.append(
+                    {
+                        "lane": lane,
+                        "link_speed": link_speed,
+                        "eye_width_ui": eye_width_ui,
+                        "eye_height_mv": eye_height_mv,
+                    }
                 )
-                if eye_metrics_str:
-                    try:
-                        eye_width_ui, eye_height_mv = map(
-                            float,
-                            eye_metrics_str.replace(" UI x ", " ")
-                            .replace(" mV", "")
-                            .split(),
-                        )
-                        eye_metrics.append(
-                            {
-                                "lane": lane,
-                                "link_speed": link_speed,
-                                "eye_width_ui": eye_width_ui,
-                                "eye_height_mv": eye_height_mv,
-                            }
-                        )
-                    except Exception as e:
-                        print(f"Error parsing eye metrics for {lane}: {e}")
-                        continue
-
-        lane_data = {}
-        raw_data_params = []
+            except Exception as e:
+                print(f"Error parsing eye metrics for {lane}: {e}")
+                continue
+    return eye_metrics
+
+
+def _parse_lane_rows(rows):
+    """Lane # sheet rows -> {x_values, y_values, data}, or None when the sheet holds no grid."""
+    if len(rows) < 2:
+        return None
+    header = [str(col) if col is not None else "" for col in rows[1]]
+    bin_col = header.index("Bin#")
+    x_cols = [i for i in range(1, len(header)) if "X =" in header[i]]
+    if not x_cols:
+        return None
+    x_values = [float(header[i].split("=")[1].strip()) for i in x_cols]
+    body = rows[2:]
+    y_values = [
+        float(str(row[bin_col]).split("=")[1].strip())
+        for row in body
+        if len(row) > bin_col and row[bin_col] is not None and "Y =" in str(row[bin_col])
+    ]
+    if not x_values or not y_values:
+        return None
+    data = np.array(
+        [[_cell_float(row[i]) if i < len(row) else np.nan for i in x_cols] for row in body],
+        dtype=float,
+    ).reshape(len(body), len(x_cols))
+    data = data[~np.isnan(data).all(axis=1)]
+    if len(y_values) != data.shape[0]:
+        y_values = y_values[: data.shape[0]]
+    return {
+        "x_values": np.array(x_values),
+        "y_values": np.array(y_values),
+        "data": data,
+    }
+
+
+def _read_lane_sheets(file_path, sheets, workbook=None):
+    """[(sheet, lane grid or None)] for the given sheets, opening the workbook read-only if needed."""
+    own = workbook is None
+    if own:
+        import openpyxl
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        lanes = []
         for sheet in sheets:
-            if sheet.startswith("Lane #"):
+            try:
+                rows = list(workbook[sheet].iter_rows(values_only=True))
+                lanes.append((sheet, _parse_lane_rows(rows)))
+            except Exception as e:
+                print(f"Error parsing lane sheet {sheet}: {e}")
+                lanes.append((sheet, None))
+        return lanes
+    finally:
+        if own:
+            workbook.close()
+
+
+def _file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_path(cache_dir, digest):
+    return os.path.join(cache_dir, f"{digest}.v{EXCEL_CACHE_VERSION}.npz")
+
+
+def _load_cached(path):
+    with np.load(path, allow_pickle=False) as cached:
+        meta = json.loads(str(cached["meta"]))
+        lane_data = {
+            sheet: {
+                "x_values": cached[f"{i}_x"],
+                "y_values": cached[f"{i}_y"],
+                "data": cached[f"{i}_data"],
+            }
+            for i, sheet in enumerate(meta["sheets"])
+        }
+    return meta["eye_metrics"], lane_data
+
+
+def _save_cached(path, eye_metrics, lane_data):
+    arrays = {"meta": np.array(json.dumps({"sheets": list(lane_data), "eye_metrics": eye_metrics}, default=str))}
+    for i, lane in enumerate(lane_data.values()):
+        arrays[f"{i}_x"] = lane["x_values"]
+        arrays[f"{i}_y"] = lane["y_values"]
+        arrays[f"{i}_data"] = lane["data"]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+
+def _prune_cache(cache_dir, max_bytes=EXCEL_CACHE_MAX_BYTES):
+    """Remove the least recently used cached exports until cache_dir holds at most max_bytes."""
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith(".npz") and not entry.name.endswith(".tmp.npz"):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # already removed by another worker
+        total -= size
+
+
+def read_workbook(file_path, workers=1):
+    """
+    Open the export once in read-only mode and decode Eye Metrics plus every Lane # sheet.
+
+    With workers > 1 the lane sheets are split across a process pool; each
+    worker opens its own read-only handle, which only decodes the sheets it is given.
+    """
+    import openpyxl
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheets = workbook.sheetnames
+        eye_metrics = []
+        if "Eye Metrics" in sheets:
+            eye_metrics = _parse_eye_metrics_rows(list(workbook["Eye Metrics"].iter_rows(values_only=True)))
+        lane_sheets = [sheet for sheet in sheets if sheet.startswith("Lane #")]
+        workers = min(workers, len(lane_sheets))
+        if workers <= 1:
+            lanes = _read_lane_sheets(file_path, lane_sheets, workbook)
+    finally:
+        workbook.close()
+    if workers > 1:
+        chunks = [lane_sheets[i::workers] for i in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            decoded = dict(
+                lane
+                for chunk in executor.map(_read_lane_sheets, [file_path] * workers, chunks)
+                for lane in chunk
+            )
+        lanes = [(sheet, decoded[sheet]) for sheet in lane_sheets]
+    return eye_metrics, {sheet: lane for sheet, lane in lanes if lane is not None}
+
+
+def parse_excel_data(file_path, workers=1, cache_dir=EXCEL_CACHE_DIR):
+    """
+    Parse data from Excel file with multiple sheets.
+
+    Decoded sheets are cached as NumPy arrays under cache_dir keyed by the
+    file's SHA-256, so re-reading an unchanged export skips Excel entirely.
+    A hit refreshes the entry's mtime and every write prunes the folder to
+    EXCEL_CACHE_MAX_BYTES, least recently used first. cache_dir=None
+    disables the cache.
+    """
+    try:
+        cache_path = _cache_path(cache_dir, _file_sha256(file_path)) if cache_dir else None
+        lane_data = None
+        if cache_path and os.path.exists(cache_path):
+            try:
+                eye_metrics, lane_data = _load_cached(cache_path)
+                os.utime(cache_path)
+            except OSError:
+                lane_data = None  # pruned between the check and the read
+        if lane_data is None:
+            eye_metrics, lane_data = read_workbook(file_path, workers)
+            if cache_path:
                 try:
-                    df_lane = pd.read_excel(file_path, sheet_name=sheet, header=1)
-                    x_columns = [
-                        col for col in df_lane.columns[1:] if "X =" in str(col)
-                    ]
-                    if not x_columns:
-                        continue
-                    x_values = [
-                        float(col.split("=")[1].strip())
-                        for col in x_columns
-                        if "=" in col
-                    ]
-                    y_values = [
-                        float(str(y).split("=")[1].strip())
-                        for y in df_lane["Bin#"]
-                        if pd.notna(y) and "Y =" in str(y)
-                    ]
-                    if not x_values or not y_values:
-                        continue
-                    data = df_lane[x_columns].apply(pd.to_numeric, errors="coerce")
-                    data = data.dropna(how="all")
-                    if data.empty or len(y_values) != data.shape[0]:
-                        y_values = y_values[: data.shape[0]]
-                    lane_data[sheet] = {
-                        "x_values": np.array(x_values),
-                        "y_values": np.array(y_values),
-                        "data": data.values,
-                    }
-                    raw_data_params.append(
-                        {
-                            "lane": sheet,
-                            "num_dac": len(y_values),
-                            "num_phs": len(x_values),
-                            "phs_step_ui": (
-                                np.mean(np.diff(x_values)) if len(x_values) > 1 else 0.0
-                            ),
-                            "dac_step_mv": (
-                                np.mean(np.diff(y_values)) if len(y_values) > 1 else 0.0
-                            ),
-                        }
-                    )
-                except Exception as e:
-                    print(f"Error parsing lane sheet {sheet}: {e}")
-                    continue
+                    _save_cached(cache_path, eye_metrics, lane_data)
+                    _prune_cache(cache_dir)
+                except OSError as e:
+                    print(f"Warning: could not cache {file_path}: {e}")
+
+        raw_data_params = []
+        for sheet, lane in lane_data.items():
+            x_values, y_values = lane["x_values"], lane["y_values"]
+            raw_data_params.append(
+                {
+                    "lane": sheet,
+                    "num_dac": len(y_values),
+                    "num_phs": len(x_values),
+                    "phs_step_ui": (
+                        np.mean(np.diff(x_values)) if len(x_values) > 1 else 0.0
+                    ),
+                    "dac_step_mv": (
+                        np.mean(np.diff(y_values)) if len(y_values) > 1 else 0.0
+                    ),
+                }
+            )
 
         if not lane_data:
             print(
@@ -114,36 +269,45 @@ def parse_excel_data(file_path):
         raise
 
 
+EYE_THRESHOLD = 0.9
+
+
+def calculate_lane_metrics(lane_data, phs_step_ui, dac_step_mv):
+    """Eye metrics for every lane sheet at once: up(mV), down(mV), left(uI), right(uI), EH*EW.
+
+    The eye is the connected region at or below the threshold around the grid
+    center, measured from that center.
+    """
+    lane_ids = list(lane_data)
+    grids = [lane_data[lane_id]["data"] for lane_id in lane_ids]
+    eyes = measure_eyes(grids, EYE_THRESHOLD, open_above=False,
+                        dac_steps=dac_step_mv, phs_steps=phs_step_ui)
+    all_metrics = []
+    for lane_id, eye in zip(lane_ids, eyes):
+        if not eye["found"]:
+            # A closed lane has no margin at all, so worst_case ranks it last.
+            up_mv = down_mv = left_ui = right_ui = eh_ew = 0.0
+        else:
+            up_mv, down_mv = eye["up"], eye["down"]
+            left_ui, right_ui = eye["left"], eye["right"]
+            eh_ew = abs(eye["width"] * eye["height"])
+        all_metrics.append(
+            {
+                "lane": lane_id,
+                "up(mV)": up_mv,
+                "down(mV)": down_mv,
+                "left(uI)": left_ui,
+                "right(uI)": right_ui,
+                "EH*EW": eh_ew,
+            }
+        )
+    return all_metrics
+
+
 def calculate_eye_metrics(lane_data, lane_id, phs_step_ui, dac_step_mv):
-    """Calculate eye metrics: up(mV), down(mV), left(uI), right(uI), EH*EW."""
+    """Calculate eye metrics for a single lane, see calculate_lane_metrics."""
     try:
-        data = lane_data["data"]
-        threshold = 0.9
-        high_quality = data <= threshold
-
-        if not np.any(high_quality):
-            center_dac, center_phase = np.unravel_index(np.argmin(data), data.shape)
-            up_mv = down_mv = center_dac * dac_step_mv
-            left_ui = right_ui = center_phase * phs_step_ui
-            eh_ew = 0.0
-        else:
-            dac_indices, phase_indices = np.where(high_quality)
-            dac_min, dac_max = dac_indices.min(), dac_indices.max()
-            phase_min, phase_max = phase_indices.min(), phase_indices.max()
-            up_mv = dac_max * dac_step_mv
-            down_mv = -dac_min * dac_step_mv
-            left_ui = -phase_min * phs_step_ui
-            right_ui = phase_max * phs_step_ui
-            eh_ew = abs((right_ui - left_ui) * (up_mv - down_mv))
-
-        return {
-            "lane": lane_id,
-            "up(mV)": up_mv,
-            "down(mV)": down_mv,
-            "left(uI)": left_ui,
-            "right(uI)": right_ui,
-            "EH*EW": eh_ew,
-        }
+        return calculate_lane_metrics({lane_id: lane_data}, phs_step_ui, dac_step_mv)[0]
     except Exception as e:
         print(f"Error calculating eye metrics for {lane_id}: {e}")
         raise
@@ -158,12 +322,13 @@ def generate_html_report(
     margin_df,
     worst_cases,
     raw_data_params,
-    output_path,
     config_info,
     eye_metrics,
     lane_data,
+    eye_image_path=None,
 ):
-    """Generate HTML report with Data Information, worst-case lanes, single image, and raw data."""
+    """Generate HTML report with Data Information, worst-case lanes, the eye image (if any), and raw data."""
+    eye_image = eye_image_path
     current_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
     html_content = f"""<!DOCTYPE html>
@@ -288,28 +453,30 @@ def generate_html_report(
 
     html_images = """
 </table>
-<div class="container">
+"""
+    if eye_image:
+        html_images += """<div class="container">
     <div class="image-section">
         <h2>Eye Diagram</h2>
 """
-    if os.path.exists(image_path):
-        try:
-            with open(image_path, "rb") as image_file:
-                image_data = image_file.read()  # Read full file
-                # Validate image data length to ensure it's not empty
-                if not image_data:
-                    raise ValueError("Image data is empty")
-                image_base64 = base64.b64encode(image_data).decode("utf-8")
-                # Determine MIME type based on file extension
-                mime_type = (
-                    "image/png" if image_path.lower().endswith(".png") else "image/jpeg"
-                )
-                html_images += f'<img src="data:{mime_type};base64,{image_base64}" alt="16_lane_eye_diagram" /><br>'
-        except Exception as e:
-            html_images += f"<p>Failed to load image from {image_path}: {str(e)}. Please ensure the file is not corrupted or update the image_path if the format differs (e.g., .jpg or .jpeg).</p>"
-    else:
-        html_images += f"<p>Image not found at {image_path}. Please verify the file exists or update the image_path variable to the correct location.</p>"
-    html_images += "</div></div>"
+        if os.path.exists(eye_image):
+            try:
+                with open(eye_image, "rb") as image_file:
+                    image_data = image_file.read()  # Read full file
+                    # Validate image data length to ensure it's not empty
+                    if not image_data:
+                        raise ValueError("Image data is empty")
+                    image_base64 = base64.b64encode(image_data).decode("utf-8")
+                    # Determine MIME type based on file extension
+                    mime_type = (
+                        "image/png" if eye_image.lower().endswith(".png") else "image/jpeg"
+                    )
+                    html_images += f'<img src="data:{mime_type};base64,{image_base64}" alt="16_lane_eye_diagram" /><br>'
+            except Exception as e:
+                html_images += f"<p>Failed to load image from {eye_image}: {str(e)}. Please ensure the file is not corrupted or update the image_path if the format differs (e.g., .jpg or .jpeg).</p>"
+        else:
+            html_images += f"<p>Image not found at {eye_image}. Please verify the file exists or update the image_path variable to the correct location.</p>"
+        html_images += "</div></div>"
 
     html_rawdata = """
 </table><table><tr><th colspan="4" class="title-header">Raw Data</th></tr><tr><th>Lane</th><th>Link Speed</th><th>Eye Width (UI)</th><th>Eye Height (mV)</th></tr>
@@ -324,80 +491,78 @@ def generate_html_report(
 </table></div></body></html>
 """
 
-    try:
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(
-                html_content
-                + html_data_info
-                + html_worst
-                + html_images
-                + html_rawdata
-                + html_footer
-            )
-    except Exception as e:
-        print(f"Failed to write HTML report to {output_path}: {e}")
-        raise
-
-
-def main(input_file):
+    return (
+        html_content
+        + html_data_info
+        + html_worst
+        + html_images
+        + html_rawdata
+        + html_footer
+    )
+
+
+def analyze(inputs, criteria=None, eye_image_path=None, workers=1, cache_dir=EXCEL_CACHE_DIR):
+    """Build the switch margin report from a 2D eye Excel export; nothing is written.
+
+    The eye image is eye_image_path, or else the first .png/.jpg/.jpeg among
+    the inputs; without one the report has no image section.
+    """
+    resolve_criteria(DEFAULT_CRITERIA, criteria)
+    excel_files = resolve_inputs(inputs, "*.xlsx")
+    if not excel_files:
+        raise ValueError("No 2D eye Excel export found in the inputs.")
+    if eye_image_path is None:
+        eye_image_path = next((path for path in resolve_inputs(inputs)
+                               if path.lower().endswith(IMAGE_EXTENSIONS)), None)
+
+    eye_metrics, lane_data, raw_data_params = parse_excel_data(excel_files[0], workers, cache_dir)
+
+    config_info = get_config_info()
+
+    phs_step_ui = (
+        raw_data_params["phs_step_ui"].mean()
+        if not raw_data_params.empty and len(raw_data_params) > 0
+        else 0.028
+    )
+    dac_step_mv = (
+        raw_data_params["dac_step_mv"].mean()
+        if not raw_data_params.empty and len(raw_data_params) > 0
+        else 1.859
+    )
+
+    margin_df = pd.DataFrame(
+        calculate_lane_metrics(lane_data, phs_step_ui, dac_step_mv)
+    )
+
+    worst_cases = find_worst_cases(margin_df)
+
+    html = generate_html_report(
+        margin_df,
+        worst_cases,
+        raw_data_params,
+        config_info,
+        eye_metrics,
+        lane_data,
+        eye_image_path,
+    )
+    return {
+        "html": html,
+        "data": margin_df,
+        "worst_cases": worst_cases,
+        "raw_data_params": raw_data_params,
+        "eye_metrics": eye_metrics,
+        "lane_data": lane_data,
+    }
+
+
+def main(input_file, workers=DEFAULT_SHEET_WORKERS):
     output_dir = os.path.dirname(input_file) or "."
 
     try:
-        eye_metrics, lane_data, raw_data_params = parse_excel_data(input_file)
-
-        all_metrics = []
-        config_info = get_config_info()
-
-        phs_step_ui = (
-            raw_data_params["phs_step_ui"].mean()
-            if not raw_data_params.empty and len(raw_data_params) > 0
-            else 0.028
-        )
-        dac_step_mv = (
-            raw_data_params["dac_step_mv"].mean()
-            if not raw_data_params.empty and len(raw_data_params) > 0
-            else 1.859
-        )
-
-        for lane_id in lane_data:
-            metrics = calculate_eye_metrics(
-                lane_data[lane_id], lane_id, phs_step_ui, dac_step_mv
-            )
-            all_metrics.append(metrics)
-
-        margin_df = pd.DataFrame(all_metrics)
-
-        worst_cases = []
-        if not margin_df.empty:
-            worst_eh_ew = margin_df.loc[margin_df["EH*EW"].idxmin()].copy()
-            worst_eh_ew["worst_metric"] = "EH*EW"
-            worst_cases.append(worst_eh_ew)
-            worst_up_mv = margin_df.loc[margin_df["up(mV)"].idxmin()].copy()
-            worst_up_mv["worst_metric"] = "Top (mV)"
-            worst_cases.append(worst_up_mv)
-            worst_down_mv = margin_df.loc[margin_df["down(mV)"].idxmax()].copy()
-            worst_down_mv["worst_metric"] = "Bottom (mV)"
-            worst_cases.append(worst_down_mv)
-            worst_left_ui = margin_df.loc[margin_df["left(uI)"].idxmax()].copy()
-            worst_left_ui["worst_metric"] = "Left (UI)"
-            worst_cases.append(worst_left_ui)
-            worst_right_ui = margin_df.loc[margin_df["right(uI)"].idxmin()].copy()
-            worst_right_ui["worst_metric"] = "Right (UI)"
-            worst_cases.append(worst_right_ui)
-
-        worst_cases = pd.DataFrame(worst_cases)
-
+        result = analyze(input_file, eye_image_path=image_path, workers=workers)
         output_filename = f"Margin_Analysis_Report_{datetime.now().strftime('%Y_%m_%d_%H_%M_%S')}.html"
         output_path = os.path.join(output_dir, output_filename)
-        generate_html_report(
-            margin_df,
-            worst_cases,
-            raw_data_params,
-            output_path,
-            config_info,
-            eye_metrics,
-            lane_data,
-        )
+        write_report(output_path, result["html"])
         print(f"Report generated at: {output_path}")
     except Exception as e:
         print(f"Error in main process: {e}")
@@ -1,50 +1,153 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.colors import LogNorm
 import pandas as pd
 from datetime import datetime
-import io
-import base64
 import os
 
-def read_ber_bin(file_path):
-    """
-    讀取檔案並 reshape 成 (4, 52, 64)。
-    確認檔案大小為 26624 bytes，等於 13312 個 16 位數。
-    """
-    with open(file_path, 'rb') as f:
-        file_size = os.path.getsize(file_path)
-        print(f"File size: {file_size} bytes")
-        if file_size != 26624:
-            print("Warning: File size does not match expected 26624 bytes!")
-        header = f.read(256)
-        hex_data = [hex(b)[2:].zfill(2) for b in header]
-        print("Hexadecimal data (first 256 bytes):")
-        for i in range(0, len(hex_data), 16):
-            print(' '.join(hex_data[i:i+16]))
-
-    # 完整讀取所有數值，不要跳過
-    arr = np.fromfile(file_path, dtype=np.uint16).astype(np.float32)
-    print("Total data size =", arr.size)  # 預期為 13312
-    if arr.size != 13312:
-        print("Warning: Data size does not match expected 13312 values!")
-    
-    # 直接 reshape 成 (4, 52, 64)
-    data = arr.reshape(4, 52, 64)
-    print("data.shape =", data.shape)
+from analyzer_api import resolve_inputs, resolve_criteria, resolve_chart_mode, write_report, report_assets, CHART_MODE
+from report_render import image_src, heatmap, canvas_chart, canvas_script
+from figure_pool import PooledChart, render_png
+from eye_geometry import eye_openings
+import worst_case
+
+# error_thresholds: a cell is inside the eye when its bit error count is at or
+# below the threshold; every threshold gets its own metrics and worst cases.
+# volt_criteria / ui_criteria: minimum eye height (mV) / width (UI) to pass.
+DEFAULT_CRITERIA = {"error_thresholds": (0, 10, 100), "volt_criteria": 0, "ui_criteria": 0}
+
+# PEye_*.bin 的格式：4 lanes x 52 voltage rows x 64 PI columns of little-endian uint16.
+# 每列最後一個 PI column 是 padding，有效的 PI 點只有 63 個。
+PEYE_LAYOUT = {
+    'dtype': '<u2',
+    'lanes': 4,
+    'voltage_points': 52,
+    'pi_columns': 64,
+    'pi_points': 63,
+    'voltage_range': (-60, 60),
+    'pi_range': (-20, 60),
+}
+
+
+def layout_size(layout=PEYE_LAYOUT):
+    """Bytes in one dump of the given layout."""
+    return layout['lanes'] * layout['voltage_points'] * layout['pi_columns'] * np.dtype(layout['dtype']).itemsize
+
+
+def open_ber_bin(file_path, layout=PEYE_LAYOUT):
+    """
+    以 np.memmap 唯讀映射 PEye dump，shape = (lanes, voltage_points, pi_columns)。
+    檔案大小與 layout 不符時丟出 ValueError。
+    """
+    file_size = os.path.getsize(file_path)
+    expected = layout_size(layout)
+    if file_size != expected:
+        raise ValueError(f"{file_path}: {file_size} bytes, expected {expected} for a "
+                         f"{layout['lanes']}x{layout['voltage_points']}x{layout['pi_columns']} PEye dump")
+    shape = (layout['lanes'], layout['voltage_points'], layout['pi_columns'])
+    return np.memmap(file_path, dtype=layout['dtype'], mode='r', shape=shape)
+
+
+def read_ber_bin(file_path, layout=PEYE_LAYOUT):
+    """讀取單一 dump，回傳 float32 (lanes, voltage_points, pi_points)。"""
+    return read_ber_bins([file_path], layout)[0]
+
+
+def read_ber_bins(file_paths, layout=PEYE_LAYOUT):
+    """
+    把多個 drive 的 dump 疊成一個 float32 陣列 (drives, lanes, voltage_points, pi_points)。
+    每個檔案只 memmap 一次，直接複製有效的 PI 欄位。
+    """
+    data = np.empty((len(file_paths), layout['lanes'], layout['voltage_points'], layout['pi_points']),
+                    dtype=np.float32)
+    for drive, file_path in enumerate(file_paths):
+        raw = open_ber_bin(file_path, layout)
+        data[drive] = raw[..., :layout['pi_points']]
+        del raw
     return data
 
 
-def generate_axes():
+def generate_axes(layout=PEYE_LAYOUT):
     """
     定義軸範圍：
       - Voltage 軸: 52 點，從 -60 到 +60
-      - PI 軸: 63 點，從 -20 到 +60 (調整為 63 點)
+      - PI 軸: 63 點，從 -20 到 +60
     """
-    voltage_axis = np.linspace(-60, 60, 52)
-    pi_axis = np.linspace(-20, 60, 63)  # 調整為 63 點
+    voltage_axis = np.linspace(*layout['voltage_range'], layout['voltage_points'])
+    pi_axis = np.linspace(*layout['pi_range'], layout['pi_points'])
     return voltage_axis, pi_axis
 
+def calculate_eye_metrics(data, drives, thresholds, volt_criteria=0, ui_criteria=0, layout=PEYE_LAYOUT):
+    """
+    每個 drive / lane / threshold 的 eye opening，全部一次向量化計算。
+    data: (drives, lanes, voltage_points, pi_points) 的 error count。
+    回傳 DataFrame：drive, lane, error_threshold, up(mV), down(mV), left(uI), right(uI),
+    EH(mV), EW(UI), EH*EW, result。
+    """
+    num_drives, num_lanes = data.shape[:2]
+    voltage_axis, pi_axis = generate_axes(layout)
+    dac_step_mv = voltage_axis[1] - voltage_axis[0]
+    phs_step_ui = (pi_axis[1] - pi_axis[0]) / 64  # PI 單位是 UI/64
+    # row 0 是 +60 mV，翻轉後 row 越大電壓越高，up 才是往上的 margin
+    grids = data[:, :, ::-1, :].reshape(num_drives * num_lanes, *data.shape[2:])
+    thresholds = np.asarray(thresholds, dtype=float)
+    eyes = eye_openings(np.tile(grids, (len(thresholds), 1, 1)), np.repeat(thresholds, len(grids)),
+                        open_above=False, dac_step=dac_step_mv, phs_step=phs_step_ui)
+
+    metrics = pd.DataFrame({
+        'drive': np.tile(np.repeat(drives, num_lanes), len(thresholds)),
+        'lane': np.tile(np.arange(num_lanes), num_drives * len(thresholds)),
+        'error_threshold': np.repeat(thresholds, len(grids)),
+        'up(mV)': eyes['up'],
+        'down(mV)': eyes['down'],
+        'left(uI)': eyes['left'],
+        'right(uI)': eyes['right'],
+        'EH(mV)': eyes['height'],
+        'EW(UI)': eyes['width'],
+    })
+    metrics['EH*EW'] = metrics['EH(mV)'] * metrics['EW(UI)']
+    passed = eyes['found'] & (metrics['EH(mV)'] >= volt_criteria) & (metrics['EW(UI)'] >= ui_criteria)
+    metrics['result'] = np.where(passed, 'PASS', 'FAIL')
+    return metrics
+
+def find_worst_cases(metrics):
+    """Worst drive/lane per metric for every error threshold, same rows as the SanDisk summary"""
+    return worst_case.find_worst_cases(metrics, worst_case.EYE_MARGIN_SPECS, by='error_threshold')
+
+EYE_COLORBAR_TICKS = [1, 5, 10, 50, 100, 500, 1023]
+
+class EyeWindowChart(PooledChart):
+    """
+    plot_eye_no_transpose 的樣板 figure：axes、colorbar 只建立一次，每個 lane 只換資料與標題。
+    """
+    figsize = (4, 3)  # 縮小圖片尺寸
+    savefig_kwargs = {'dpi': 300, 'bbox_inches': 'tight'}
+
+    def build(self):
+        from matplotlib.colors import LogNorm
+        voltage_axis, pi_axis = generate_axes()
+        self.ax = self.figure.add_subplot()
+        self.image = self.ax.imshow(
+            np.ones((PEYE_LAYOUT['voltage_points'], PEYE_LAYOUT['pi_points'])),
+            norm=LogNorm(vmin=1, vmax=1023),
+            extent=[pi_axis[0], pi_axis[-1],  # -20, +60
+                    voltage_axis[0], voltage_axis[-1]],  # -60, +60
+            origin='upper',  # row=0 在圖的最上方
+            aspect='auto',
+            cmap='viridis'
+        )
+        cbar = self.figure.colorbar(self.image, ax=self.ax)
+        cbar.set_label("Bit Error Count")
+        cbar.set_ticks(EYE_COLORBAR_TICKS)
+        cbar.set_ticklabels(EYE_COLORBAR_TICKS)
+
+        self.ax.set_xlabel("PI (UI/64)")
+        self.ax.set_ylabel("Voltage (mV)")
+        self.ax.grid(True)
+
+    def update(self, lane_data, voltage_axis, pi_axis, lane_idx):
+        self.image.set_data(lane_data)
+        self.image.set_extent([pi_axis[0], pi_axis[-1], voltage_axis[0], voltage_axis[-1]])
+        self.ax.set_title(f"PCle BER Eye Window - Lane {lane_idx}")
+
 def plot_eye_no_transpose(lane_data, voltage_axis, pi_axis, lane_idx):
     """
     恢復為熱圖，使用 viridis 色盤。
@@ -54,45 +157,41 @@ def plot_eye_no_transpose(lane_data, voltage_axis, pi_axis, lane_idx):
     這裡用 origin='upper'，extent=[x_min, x_max, y_max, y_min]，
     讓 row=0 對應 y=+60 (圖上方)，row=51 對應 y=-60 (圖下方)。
     同時 x 軸從 -20 到 +60。
-    返回 base64 編碼的圖片。
+    返回 PNG bytes。
+    每次重用 EyeWindowChart 的樣板 figure，不再重建 figure 與 colorbar。
+    """
+    return render_png(EyeWindowChart, lane_data, voltage_axis, pi_axis, lane_idx)
+
+def eye_chart_no_transpose(lane_data, voltage_axis, pi_axis, lane_idx):
+    """
+    plot_eye_no_transpose 的 canvas 版本：只嵌入 uint16 的 bit error count，由瀏覽器畫圖。
     """
-    fig = plt.figure(figsize=(4,3))  # 縮小圖片尺寸
-    plt.imshow(
+    spec = heatmap(
         lane_data,
-        norm=LogNorm(vmin=1, vmax=1023),
-        extent=[pi_axis[0], pi_axis[-1],  # -20, +60
-                voltage_axis[0], voltage_axis[-1]],  # -60, +60
-        origin='upper',  # row=0 在圖的最上方
-        aspect='auto',
-        cmap='viridis'
+        extent=(pi_axis[0], pi_axis[-1], voltage_axis[0], voltage_axis[-1]),
+        origin='upper',
+        scale='log', vmin=1, vmax=1023, ticks=EYE_COLORBAR_TICKS,
+        dtype=np.uint16,
+        title=f"PCle BER Eye Window - Lane {lane_idx}",
+        xlabel="PI (UI/64)", ylabel="Voltage (mV)", colorbar="Bit Error Count",
+        grid=True, aspect=0.75,
     )
-    cbar = plt.colorbar()
-    cbar.set_label("Bit Error Count")
-    cbar.set_ticks([1, 5, 10, 50, 100, 500, 1023])
-    cbar.set_ticklabels([1, 5, 10, 50, 100, 500, 1023])
+    return canvas_chart(spec, alt=f"Lane {lane_idx} No Transpose")
 
-    plt.title(f"PCle BER Eye Window - Lane {lane_idx}")
-    plt.xlabel("PI (UI/64)")
-    plt.ylabel("Voltage (mV)")
-    plt.grid(True)
-    
-    # 將圖片轉為 base64
-    buf = io.BytesIO()
-    fig.savefig(buf, format='png', dpi=300, bbox_inches='tight')
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.getvalue()).decode('utf-8')
-    plt.close(fig)
-    return img_base64
+def drive_name(file_path):
+    """PEye_NVMe1.bin -> 'PEye NVMe1'"""
+    return os.path.splitext(os.path.basename(file_path))[0].replace('_', ' ')
 
-def get_device_info():
+def get_device_info(drives):
     """
-    Return simplified device info.
+    Return simplified device info, one row per drive.
     """
-    return [('Micron', 'PEye NVMe1')]
+    return [('Micron', drive) for drive in drives]
 
-def generate_html_report(raw_data_params, output_path, config_info, images):
+def generate_html_report(raw_data_params, config_info, images, metrics=None, worst_cases=None, charts="image"):
     """
     Generate HTML report with device information, raw data parameters, and embedded eye diagram images.
+    images 的值是每個 lane 的 <img> 或 canvas figure；charts="canvas" 時加上繪圖 script。
     """
     current_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
@@ -138,6 +237,13 @@ def generate_html_report(raw_data_params, output_path, config_info, images):
             font-size: 20px;
             font-weight: bold;
         }}
+        .worst-metric {{
+            font-weight: bold;
+            color: #ff0000;
+        }}
+        .fail {{
+            color: #ff0000;
+        }}
         .image-section {{
             margin-top: 20px;
             text-align: center;
@@ -165,15 +271,44 @@ def generate_html_report(raw_data_params, output_path, config_info, images):
     for vendor, device in config_info:
         html_data_info += f"<tr><td>{vendor}</td><td>{device}</td></tr>"
 
-    html_raw = """
+    html_worst = """
 </table>
+"""
+    if worst_cases is not None and not worst_cases.empty:
+        html_worst += """<table>
+<tr><th colspan="8" class="title-header">Worst Cases Summary</th></tr>
+<tr><th>Error Threshold</th><th>Drive</th><th>Lane</th><th>EH*EW</th><th>Top (mV)</th><th>Bottom (mV)</th><th>Left (UI)</th><th>Right (UI)</th></tr>
+"""
+        cells = [('EH*EW', 'EH*EW', '.2f'), ('up(mV)', 'Top (mV)', '.1f'), ('down(mV)', 'Bottom (mV)', '.1f'),
+                 ('left(uI)', 'Left (UI)', '.3f'), ('right(uI)', 'Right (UI)', '.3f')]
+        for _, row in worst_cases.iterrows():
+            html_worst += f"<tr><td>{row['error_threshold']:g}</td><td>{row['drive']}</td><td>{int(row['lane'])}</td>"
+            for column, label, fmt in cells:
+                css = " class='worst-metric'" if row['worst_metric'] == label else ""
+                html_worst += f"<td{css}>{row[column]:{fmt}}</td>"
+            html_worst += "</tr>"
+        html_worst += "</table>"
+
+    if metrics is not None and not metrics.empty:
+        html_worst += """<table>
+<tr><th colspan="7" class="title-header">Eye Metrics</th></tr>
+<tr><th>Error Threshold</th><th>Drive</th><th>Lane</th><th>EH (mV)</th><th>EW (UI)</th><th>EH*EW</th><th>Result</th></tr>
+"""
+        for _, row in metrics.iterrows():
+            css = " class='fail'" if row['result'] == 'FAIL' else ""
+            html_worst += (f"<tr><td>{row['error_threshold']:g}</td><td>{row['drive']}</td><td>{int(row['lane'])}</td>"
+                           f"<td>{row['EH(mV)']:.1f}</td><td>{row['EW(UI)']:.3f}</td><td>{row['EH*EW']:.2f}</td>"
+                           f"<td{css}>{row['result']}</td></tr>")
+        html_worst += "</table>"
+
+    html_raw = """
 <table>
-<tr><th colspan="3" class="title-header">Raw Data Parameters</th></tr>
-<tr><th>Lane</th><th>Number of Voltage Points</th><th>Number of PI Points</th></tr>
+<tr><th colspan="4" class="title-header">Raw Data Parameters</th></tr>
+<tr><th>Drive</th><th>Lane</th><th>Number of Voltage Points</th><th>Number of PI Points</th></tr>
 """
     for _, row in raw_data_params.iterrows():
         lane = int(row['lane'])
-        html_raw += f"<tr><td>{lane}</td><td>{row['num_voltage']}</td><td>{row['num_pi']}</td></tr>"
+        html_raw += f"<tr><td>{row['drive']}</td><td>{lane}</td><td>{row['num_voltage']}</td><td>{row['num_pi']}</td></tr>"
 
     html_images = """
 </table>
@@ -181,9 +316,11 @@ def generate_html_report(raw_data_params, output_path, config_info, images):
 <h2>Eye Diagram Images</h2>
 """
     if images:
-        for lane_idx, (no_transpose, _, _) in images.items():
-            html_images += f'<h3>Lane {lane_idx}</h3>'
-            html_images += f'<img src="data:image/png;base64,{no_transpose}" alt="Lane {lane_idx} No Transpose" /><br>'
+        for (drive, lane_idx), (no_transpose, _, _) in images.items():
+            html_images += f'<h3>{drive} - Lane {lane_idx}</h3>'
+            html_images += f'{no_transpose}<br>'
+        if charts == "canvas":
+            html_images += canvas_script()
     else:
         html_images += "<p>No images generated.</p>"
     html_images += "</div>"
@@ -194,36 +331,71 @@ def generate_html_report(raw_data_params, output_path, config_info, images):
 </html>
 """
 
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(html_header + html_data_info + html_raw + html_images + html_footer)
-    print(f"Report generated at: {output_path}")
+    return html_header + html_data_info + html_worst + html_raw + html_images + html_footer
 
-def main(file_path):
-    data = read_ber_bin(file_path)  # (4, 52, 63)
+def analyze(inputs, criteria=None, assets=None, charts="image"):
+    """Build the PEye eye diagram report from every PEye_*.bin dump in the inputs.
+
+    Each dump is one drive; all of them are loaded into a single
+    (drives, lanes, voltage, pi) array returned under "data". The eye
+    diagrams are inlined unless assets (report_render.ImageAssets) is given,
+    which is the only thing written; charts="canvas" skips matplotlib and
+    embeds the bit error counts for the browser to draw.
+    """
+    criteria = resolve_criteria(DEFAULT_CRITERIA, criteria)
+    resolve_chart_mode(charts)
+    bin_files = []
+    for path in resolve_inputs(inputs, "*.bin"):
+        if os.path.getsize(path) == layout_size():
+            bin_files.append(path)
+        else:
+            print(f"Warning: {path} does not match the PEye layout, skipping")
+    if not bin_files:
+        raise ValueError("No PEye .bin dump found in the inputs.")
+    data = read_ber_bins(bin_files)  # (drives, 4, 52, 63)
+    drives = [drive_name(path) for path in bin_files]
     voltage_axis, pi_axis = generate_axes()
-    output_dir = os.path.dirname(file_path)
     raw_data_params = []
-    config_info = get_device_info()
+    config_info = get_device_info(drives)
     images = {}
 
-    for lane_idx in range(4):
-        lane_data = data[lane_idx]  # shape=(52,63)
-        num_voltage, num_pi = lane_data.shape
-        raw_data_params.append({
-            'lane': lane_idx,
-            'num_voltage': num_voltage,
-            'num_pi': num_pi
-        })
+    for drive_idx, drive in enumerate(drives):
+        for lane_idx in range(data.shape[1]):
+            lane_data = data[drive_idx, lane_idx]  # shape=(52,63)
+            num_voltage, num_pi = lane_data.shape
+            raw_data_params.append({
+                'drive': drive,
+                'lane': lane_idx,
+                'num_voltage': num_voltage,
+                'num_pi': num_pi
+            })
 
-        # Generate base64-encoded images, only No Transpose
-        no_transpose_img = plot_eye_no_transpose(lane_data, voltage_axis, pi_axis, lane_idx)
-        images[lane_idx] = (no_transpose_img, None, None)
+            # Only No Transpose
+            if charts == "canvas":
+                no_transpose = eye_chart_no_transpose(lane_data, voltage_axis, pi_axis, lane_idx)
+            else:
+                no_transpose_src = image_src(plot_eye_no_transpose(lane_data, voltage_axis, pi_axis, lane_idx), assets)
+                no_transpose = (f'<img src="{no_transpose_src}" alt="{drive} Lane {lane_idx} No Transpose" '
+                                f'loading="lazy" decoding="async" />')
+            images[(drive, lane_idx)] = (no_transpose, None, None)
 
+    metrics = calculate_eye_metrics(data, drives, criteria["error_thresholds"],
+                                    float(criteria["volt_criteria"]), float(criteria["ui_criteria"]))
+    worst_cases = find_worst_cases(metrics)
     raw_data_params = pd.DataFrame(raw_data_params)
+    html = generate_html_report(raw_data_params, config_info, images, metrics, worst_cases, charts)
+    return {"html": html, "data": data, "drives": drives, "raw_data_params": raw_data_params,
+            "metrics": metrics, "worst_cases": worst_cases}
+
+def main(file_path):
+    """file_path may be one PEye_*.bin or a folder of them (one per drive)."""
+    output_dir = file_path if os.path.isdir(file_path) else os.path.dirname(file_path)
     output_filename = f"Micron_Eye_Diagram_Analysis_Report_{datetime.now().strftime('%Y_%m_%d_%H_%M_%S')}.html"
     output_path = os.path.join(output_dir, output_filename)
-    generate_html_report(raw_data_params, output_path, config_info, images)
+    result = analyze(file_path, assets=report_assets(output_path), charts=CHART_MODE)
+    write_report(output_path, result["html"])
+    print(f"Report generated at: {output_path}")
 
 if __name__ == "__main__":
     file_path = r"C:\Users\dchen52\OneDrive - Lenovo\Documents\Micron\Micron_7450_Margin_Data\PEye_NVMe1.bin"
-    main(file_path)
\ No newline at end of file
+    main(file_path)
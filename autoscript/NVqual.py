@@ -1,114 +1,158 @@
 import re
-import pandas as pd
-from collections import defaultdict
-import matplotlib.pyplot as plt
+import numpy as np
 import os
-import base64
-from io import BytesIO
+from datetime import datetime
+
+from analyzer_api import resolve_inputs, resolve_criteria, resolve_chart_mode, write_report, report_assets, pyplot, CHART_MODE
+from report_render import figure_png, image_src, scatter, canvas_chart, canvas_script
 
 # Input file path (modify this path as needed)
 log_file_path = r"C:\Users\dchen52\OneDrive - Lenovo\Documents\NVIDIA\test_11_pex_data_eye_test\pex_data_eye_test_092924_215308.log"
 
+# The PEX eye test has no vendor criteria, the report only ranks Y_STATUS.
+DEFAULT_CRITERIA = {}
+
+LANES = 16
+MISSING = -1  # Y_STATUS slot with no reading
+CHUNK_SIZE = 1 << 20
+
+PCIE_INFO_PATTERN = re.compile(r"GPU\s+(\d+)\s+\[3\]\s+\[(.*?)\]\s+:\s+PEX Physical Lane\(0-15\) Y_STATUS\s*=\s*((?:\d+\s*,\s*)*\d+)")
+PEX_SPEED_PATTERN = re.compile(r"PEX Link Speed\s+:\s+([\d.]+ Gbit/s)")
+PEX_WIDTH_PATTERN = re.compile(r"PEX Width, ASLM\s*:\s*(\d+\s+lanes)")
+
+class PexEyeScanner:
+    """Streams a PEX eye log chunk by chunk into a (gpu, lane, iteration) Y_STATUS array.
+
+    Each GPU gets a row the first time its bus ID appears (a dict lookup),
+    and each reading appends one iteration for that GPU; slots that were
+    never written hold MISSING. Memory grows with the number of readings,
+    not with the size of the log.
+    """
+
+    def __init__(self, capacity=64):
+        self.bus_index = {}  # bus ID -> row
+        self.gpu_positions = []
+        self.iterations = []  # readings per row
+        self.y_status = np.full((0, LANES, capacity), MISSING, dtype=np.int32)
+        self.pex_speed = None
+        self.pex_width = None
+
+    def _row(self, gpu_pos, bus_id):
+        row = self.bus_index.get(bus_id)
+        if row is None:
+            row = self.bus_index[bus_id] = len(self.gpu_positions)
+            self.gpu_positions.append(gpu_pos)
+            self.iterations.append(0)
+            empty = np.full((1,) + self.y_status.shape[1:], MISSING, dtype=np.int32)
+            self.y_status = np.concatenate([self.y_status, empty])
+        return row
+
+    def _append(self, row, values):
+        iteration = self.iterations[row]
+        if iteration == self.y_status.shape[2]:
+            grown = np.full(self.y_status.shape[:2] + (iteration * 2,), MISSING, dtype=np.int32)
+            grown[:, :, :iteration] = self.y_status
+            self.y_status = grown
+        values = values[:LANES]
+        self.y_status[row, :len(values), iteration] = values
+        self.iterations[row] = iteration + 1
+
+    def feed(self, text):
+        """Scan a block of complete lines."""
+        # Only the first PEX speed / width in the log is reported
+        if self.pex_speed is None:
+            match = PEX_SPEED_PATTERN.search(text)
+            self.pex_speed = match.group(1) if match else None
+        if self.pex_width is None:
+            match = PEX_WIDTH_PATTERN.search(text)
+            self.pex_width = match.group(1) if match else None
+        for match in PCIE_INFO_PATTERN.finditer(text):
+            row = self._row(int(match.group(1)), match.group(2))
+            self._append(row, [int(v) for v in match.group(3).split(",")])
+
+    def scan_file(self, file_path, chunk_size=CHUNK_SIZE):
+        """Feed a log in chunk_size pieces, always cut at a line break."""
+        tail = ""
+        with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+            for chunk in iter(lambda: f.read(chunk_size), ""):
+                chunk = tail + chunk
+                end = chunk.rfind("\n") + 1
+                self.feed(chunk[:end])
+                tail = chunk[end:]
+        if tail:
+            self.feed(tail)
+        return self
+
+    @property
+    def devices(self):
+        return list(self.bus_index)
+
+    def data_info(self):
+        return [
+            {
+                "GPU Position": gpu_pos,
+                "Bus ID": bus_id,
+                "Product": "NVIDIA H200 NVL",
+                "PEX Width": self.pex_width or "Unknown",
+                "PEX Link Speed": self.pex_speed or "Unknown",
+            }
+            for bus_id, gpu_pos in zip(self.bus_index, self.gpu_positions)
+        ]
+
+    def readings(self):
+        """Y_STATUS trimmed to the longest GPU run: (gpu, lane, iteration), MISSING where absent."""
+        return self.y_status[:, :, :max(self.iterations, default=0)]
+
 def parse_log_file(log_content):
-    devices = []
-    data_info = []
-    raw_data = defaultdict(lambda: defaultdict(list))
-
-    # Patterns
-    pcie_info_pattern = re.compile(r"GPU\s+(\d+)\s+\[3\]\s+\[(.*?)\]\s+:\s+PEX Physical Lane\(0-15\) Y_STATUS\s*=\s*((?:\d+\s*,\s*)*\d+)")
-    pex_speed_pattern = re.compile(r"PEX Link Speed\s+:\s+([\d.]+ Gbit/s)")
-    pex_width_pattern = re.compile(r"PEX Width, ASLM\s*:\s*(\d+\s+lanes)")
-
-    # Extract global PEX Speed and PEX Width
-    pex_speed_match = pex_speed_pattern.search(log_content)
-    pex_width_match = pex_width_pattern.search(log_content)
-    pex_speed = pex_speed_match.group(1) if pex_speed_match else "Unknown"
-    pex_width = f"{pex_width_match.group(1)}" if pex_width_match else "Unknown"
-
-    # Parse GPU lanes
-    for match in pcie_info_pattern.finditer(log_content):
-        gpu_pos = int(match.group(1))  # GPU position (0-7)
-        bus_id = match.group(2)
-        y_status_values = [int(v.strip()) for v in match.group(3).split(",") if v.strip().isdigit()]
-
-        if bus_id not in devices:
-            devices.append(bus_id)
-            data_info.append(
-                {
-                    "GPU Position": gpu_pos,
-                    "Bus ID": bus_id,
-                    "Product": "NVIDIA H200 NVL",
-                    "PEX Width": pex_width,
-                    "PEX Link Speed": pex_speed,
-                }
-            )
-
-        # Ensure exactly 16 lanes, pad with None if less
-        for lane in range(16):
-            lane_key = f"Lane {lane}"
-            value = y_status_values[lane] if lane < len(y_status_values) else None
-            raw_data[bus_id][lane_key].append(value)
-
-    return devices, data_info, raw_data
-
-def get_worst_case_summary(raw_data, data_info):
+    """Scan log text already in memory; returns (devices, data_info, y_status)."""
+    scanner = PexEyeScanner()
+    scanner.feed(log_content)
+    return scanner.devices, scanner.data_info(), scanner.readings()
+
+def scan_log_file(file_path, chunk_size=CHUNK_SIZE):
+    """Stream a log from disk; returns (devices, data_info, y_status)."""
+    scanner = PexEyeScanner().scan_file(file_path, chunk_size)
+    return scanner.devices, scanner.data_info(), scanner.readings()
+
+def get_worst_case_summary(y_status, data_info):
+    """Lowest Y_STATUS per GPU and the lane it was seen on (first lane on ties)."""
     worst_case = []
-    for bus_id in raw_data:
-        gpu_pos = next(d["GPU Position"] for d in data_info if d["Bus ID"] == bus_id)
-        min_val = None
-        worst_lane = None
-        for lane in raw_data[bus_id]:
-            values = [v for v in raw_data[bus_id][lane] if v is not None]
-            if values:
-                lane_min = min(values)
-                if min_val is None or lane_min < min_val:
-                    min_val = lane_min
-                    worst_lane = lane
-        if min_val is not None:
-            worst_case.append(
-                {
-                    "GPU Position": gpu_pos,
-                    "Bus ID": bus_id,
-                    "Worst Lane": worst_lane,
-                    "Worst Y_STATUS": min_val,
-                }
-            )
+    valid = y_status != MISSING
+    lane_min = np.where(valid, y_status, np.iinfo(np.int32).max).min(axis=2)  # (gpu, lane)
+    has_data = valid.any(axis=2)
+    for row, info in enumerate(data_info):
+        if not has_data[row].any():
+            continue
+        worst_lane = int(np.where(has_data[row], lane_min[row], np.iinfo(np.int32).max).argmin())
+        worst_case.append(
+            {
+                "GPU Position": info["GPU Position"],
+                "Bus ID": info["Bus ID"],
+                "Worst Lane": f"Lane {worst_lane}",
+                "Worst Y_STATUS": int(lane_min[row, worst_lane]),
+            }
+        )
     return worst_case
 
-def generate_scatter_plot(raw_data, devices, data_info):
-    plot_data = []
-    for bus_id in devices:
-        for lane in range(16):
-            lane_key = f"Lane {lane}"
-            for idx, value in enumerate(raw_data[bus_id][lane_key]):
-                if value is not None:
-                    plot_data.append(
-                        {
-                            "Bus ID": bus_id,
-                            "Lane": lane_key,
-                            "Y_STATUS": value,
-                            "Run": idx + 1,
-                        }
-                    )
-
-    if not plot_data:
+def generate_scatter_plot(y_status, data_info, assets=None):
+    if not (y_status != MISSING).any():
         print("Warning: No data available for scatter plot.")
         return "<p>No data available for scatter plot.</p>"
 
-    df = pd.DataFrame(plot_data)
-    
+    lane_labels = np.array([f"Lane {lane}" for lane in range(LANES)])
+
     # Create scatter plot using Matplotlib with increased figure size
+    plt = pyplot()
     plt.figure(figsize=(12, 6.5))
     
     # Generate unique colors for each Bus ID
-    colors = plt.cm.get_cmap('tab10', len(devices))
-    for idx, bus_id in enumerate(devices):
-        gpu_pos = next(d["GPU Position"] for d in data_info if d["Bus ID"] == bus_id)
-        bus_data = df[df['Bus ID'] == bus_id]
+    colors = plt.get_cmap('tab10', len(data_info))
+    for idx, info in enumerate(data_info):
+        lanes, runs = np.nonzero(y_status[idx] != MISSING)
         plt.scatter(
-            bus_data['Lane'],
-            bus_data['Y_STATUS'],
-            label=f"GPU {gpu_pos}",
+            lane_labels[lanes],
+            y_status[idx, lanes, runs],
+            label=f"GPU {info['GPU Position']}",
             color=colors(idx),
             alpha=0.6,
             s=50
@@ -121,16 +165,27 @@ def generate_scatter_plot(raw_data, devices, data_info):
     plt.xticks(rotation=45)
     plt.tight_layout()
     
-    # Save the plot to a bytes buffer and encode as base64
-    buffer = BytesIO()
-    plt.savefig(buffer, format='png', bbox_inches='tight', dpi=300)
+    # Inline as base64, or store as an image file when assets is given
+    image_png = figure_png(plt.gcf(), bbox_inches='tight', dpi=300)
     plt.close()
-    buffer.seek(0)
-    image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-    
-    return f'<img src="data:image/png;base64,{image_base64}" alt="Scatter Plot" />'
 
-def generate_html_report(data_info, worst_case, raw_data, plot_html):
+    return f'<img src="{image_src(image_png, assets)}" alt="Scatter Plot" loading="lazy" decoding="async" />'
+
+def generate_scatter_chart(y_status, data_info):
+    """Same plot as generate_scatter_plot, drawn in the browser from the readings"""
+    if not (y_status != MISSING).any():
+        print("Warning: No data available for scatter plot.")
+        return "<p>No data available for scatter plot.</p>"
+
+    series = []
+    for idx, info in enumerate(data_info):
+        lanes, runs = np.nonzero(y_status[idx] != MISSING)
+        series.append((f"GPU {info['GPU Position']}", lanes.astype(np.uint8), y_status[idx, lanes, runs].astype(np.int32)))
+    spec = scatter(series, xticks=[(lane, f"Lane {lane}") for lane in range(LANES)],
+                   xlabel='Lane Number', ylabel='FOM', legend='GPU Position', grid=True, aspect=6.5 / 12)
+    return canvas_chart(spec, alt='Scatter Plot', width=1100) + canvas_script()
+
+def generate_html_report(data_info, worst_case, y_status, plot_html):
     html_content = f"""
     <!DOCTYPE html>
     <html lang="en">
@@ -273,14 +328,15 @@ def generate_html_report(data_info, worst_case, raw_data, plot_html):
                     <th>Lane 12</th><th>Lane 13</th><th>Lane 14</th><th>Lane 15</th>
                 </tr>
     """
-    for bus_id in raw_data:
+    for idx, info in enumerate(data_info):
         row = f"""
                 <tr>
-                    <td>{bus_id}</td>
+                    <td>{info['Bus ID']}</td>
         """
-        for lane in range(16):
-            lane_data = raw_data[bus_id][f"Lane {lane}"]
-            formatted_data = ', '.join(str(v) if v is not None else 'N/A' for v in lane_data)
+        # readings past this GPU's last iteration are padding, not N/A
+        runs = int((y_status[idx] != MISSING).any(axis=0).nonzero()[0].max(initial=-1)) + 1
+        for lane in range(LANES):
+            formatted_data = ', '.join(str(v) if v != MISSING else 'N/A' for v in y_status[idx, lane, :runs].tolist())
             row += f"<td>{formatted_data}</td>"
         row += "</tr>"
         html_content += row
@@ -292,26 +348,39 @@ def generate_html_report(data_info, worst_case, raw_data, plot_html):
     """
     return html_content
 
-def main(log_file_content, log_file_path):
+def analyze(inputs, criteria=None, assets=None, charts="image"):
+    """Build the PEX eye report from a pex_data_eye_test log.
+
+    Nothing is written, except the scatter plot when assets (report_render.ImageAssets) is given.
+    charts="canvas" embeds the readings and draws the plot in the browser instead.
+    """
+    resolve_criteria(DEFAULT_CRITERIA, criteria)
+    resolve_chart_mode(charts)
+    log_files = resolve_inputs(inputs, "*.log")
+    if not log_files:
+        raise ValueError("No PEX eye test log found in the inputs.")
+
+    devices, data_info, y_status = scan_log_file(log_files[0])
+    worst_case = get_worst_case_summary(y_status, data_info)
+    if charts == "canvas":
+        plot_html = generate_scatter_chart(y_status, data_info)
+    else:
+        plot_html = generate_scatter_plot(y_status, data_info, assets)
+    html_content = generate_html_report(data_info, worst_case, y_status, plot_html)
+    return {"html": html_content, "data_info": data_info, "worst_cases": worst_case, "y_status": y_status}
+
+def main(log_file_path):
     # Use the directory of the input log file
     input_dir = os.path.dirname(log_file_path) or "."
-    today = pd.Timestamp.now().strftime("%Y_%m_%d")
+    today = datetime.now().strftime("%Y_%m_%d")
     output_html_filename = f"pcie_data_report_{today}.html"
     output_html_path = os.path.join(input_dir, output_html_filename)
 
-    devices, data_info, raw_data = parse_log_file(log_file_content)
-    worst_case = get_worst_case_summary(raw_data, data_info)
-    plot_html = generate_scatter_plot(raw_data, devices, data_info)
-    html_content = generate_html_report(data_info, worst_case, raw_data, plot_html)
-
-    with open(output_html_path, "w", encoding="utf-8") as f:
-        f.write(html_content)
-    print(f"HTML report generated at {output_html_path}")
+    result = analyze(log_file_path, assets=report_assets(output_html_path), charts=CHART_MODE)
+    write_report(output_html_path, result["html"])
 
 if __name__ == "__main__":
-    try:
-        with open(log_file_path, "r", encoding="utf-8") as f:
-            log_content = f.read()
-        main(log_content, log_file_path)
-    except FileNotFoundError:
-        print(f"Error: Log file '{log_file_path}' not found. Please provide the correct path.")
\ No newline at end of file
+    if os.path.isfile(log_file_path):
+        main(log_file_path)
+    else:
+        print(f"Error: Log file '{log_file_path}' not found. Please provide the correct path.")
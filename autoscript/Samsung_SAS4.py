@@ -1,8 +1,10 @@
 import re
 import os
-import base64
 from datetime import datetime
 
+from analyzer_api import resolve_inputs, resolve_criteria, write_report, report_assets
+from report_render import image_src
+
 # Criteria
 criteria = {"Eye Height": ["84.1", "55.8", "37.2"],
             "Eye Width": ["278", "222", "167"]}
@@ -12,79 +14,93 @@ criteria = {"Eye Height": ["84.1", "55.8", "37.2"],
 log_file = r'C:\Users\dchen52\OneDrive - Lenovo\Documents\Samsung\PM9D3a\Result_Dev0c_20241213_09h48m41s\Texts\Result_Config_Dev0c_20241213_09h48m41s.txt'
 images_dir = r'C:\Users\dchen52\OneDrive - Lenovo\Documents\Samsung\PM9D3a\Result_Dev0c_20241213_09h48m41s\Images'
 
-# Get the directory of the log file for output
-output_dir = os.path.dirname(os.path.abspath(log_file))
-
-# Extract device and timestamp from log filename
-log_filename = os.path.basename(log_file)
-# Example: Result_Config_Dev0c_20241213_09h48m41s.txt
-device = log_filename.split('_')[2]  # Dev0c
-timestamp = log_filename.split('_')[3].replace('.txt', '')  # 20241213_09h48m41s
-
-# Sample data structure to hold parsed data
-data = []
-
-# Read and parse the log file
-with open(log_file, 'r') as file:
-    content = file.read()
-    # Split into sections based on DEVICE INFO
-    sections = content.split('=================================================\n')[1:]  # Skip initial separator
-
-    for section in sections:
-        device_info = {}
-        options = {}
-        result_summary = {}
-
-        # Extract DEVICE INFO
-        device_lines = section.split('[OPTION]')[0].strip().split('\n')[1:]
-        for line in device_lines:
-            line = line.strip()
-            if not line or '=' not in line:
-                continue  # Skip empty or invalid lines silently
-            key, value = line.split('=', 1)
-            device_info[key.strip()] = value.strip()
-
-        # Extract OPTION
-        option_lines = section.split('[OPTION]')[1].split('[RESULT SUMMARY]')[0].strip().split('\n')[1:]
-        for line in option_lines:
-            line = line.strip()
-            if not line or '=' not in line:
-                continue  # Skip empty or invalid lines silently
-            key, value = line.split('=', 1)
-            options[key.strip()] = value.strip()
-
-        # Extract RESULT SUMMARY
-        result_lines = section.split('[RESULT SUMMARY]')[1].strip().split('\n')[1:]
-        for line in result_lines:
-            line = line.strip()
-            if not line or '=' not in line:
-                continue  # Skip empty or invalid lines silently
-            key, value = line.split('=', 1)
-            result_summary[key.strip()] = value.strip()
-
-        data.append({
-            'device_info': device_info,
-            'options': options,
-            'result_summary': result_summary
-        })
-
-# Function to load and encode image as base64
-def load_image_as_base64(lane):
+DEFAULT_CRITERIA = dict(criteria)
+
+
+def parse_log_name(log_file):
+    """Extract device and timestamp from a log filename."""
+    log_filename = os.path.basename(log_file)
+    # Example: Result_Config_Dev0c_20241213_09h48m41s.txt
+    device = log_filename.split('_')[2]  # Dev0c
+    timestamp = '_'.join(log_filename.split('_')[3:]).replace('.txt', '')  # 20241213_09h48m41s
+    return device, timestamp
+
+
+def parse_result_log(log_file):
+    # Sample data structure to hold parsed data
+    data = []
+
+    # Read and parse the log file
+    with open(log_file, 'r') as file:
+        content = file.read()
+        # Split into sections based on DEVICE INFO
+        sections = content.split('=================================================\n')[1:]  # Skip initial separator
+
+        for section in sections:
+            device_info = {}
+            options = {}
+            result_summary = {}
+
+            # Extract DEVICE INFO
+            device_lines = section.split('[OPTION]')[0].strip().split('\n')[1:]
+            for line in device_lines:
+                line = line.strip()
+                if not line or '=' not in line:
+                    continue  # Skip empty or invalid lines silently
+                key, value = line.split('=', 1)
+                device_info[key.strip()] = value.strip()
+
+            # Extract OPTION
+            option_lines = section.split('[OPTION]')[1].split('[RESULT SUMMARY]')[0].strip().split('\n')[1:]
+            for line in option_lines:
+                line = line.strip()
+                if not line or '=' not in line:
+                    continue  # Skip empty or invalid lines silently
+                key, value = line.split('=', 1)
+                options[key.strip()] = value.strip()
+
+            # Extract RESULT SUMMARY
+            result_lines = section.split('[RESULT SUMMARY]')[1].strip().split('\n')[1:]
+            for line in result_lines:
+                line = line.strip()
+                if not line or '=' not in line:
+                    continue  # Skip empty or invalid lines silently
+                key, value = line.split('=', 1)
+                result_summary[key.strip()] = value.strip()
+
+            data.append({
+                'device_info': device_info,
+                'options': options,
+                'result_summary': result_summary
+            })
+
+    return data
+
+
+# Function to load an eye diagram as an image src: inline base64, or an asset file (converted from BMP) when assets is given
+def load_image_src(lane, images_dir, device, timestamp, assets=None):
     # Construct the expected image filename
-    image_filename = f"{device}_P0_L{lane}_Rep1_{timestamp}_09h48m41s.bmp"
+    image_filename = f"{device}_P0_L{lane}_Rep1_{timestamp}.bmp"
     image_path = os.path.join(images_dir, image_filename)
 
     try:
         with open(image_path, 'rb') as img_file:
             img_data = img_file.read()
-            img_base64 = base64.b64encode(img_data).decode('utf-8')
-            return img_base64
+        return image_src(img_data, assets, mime='image/bmp')
     except FileNotFoundError:
         print(f"Image not found for lane {lane}: {image_path}")
         return None
 
-# Generate HTML content
-html_content = f"""
+# Helper function to format the value (highlight if it's the smallest for this row)
+def format_value(value, is_min):
+    if is_min:
+        return f'<font>{value:.1f}</font>'
+    return f"{value:.1f}"
+
+
+def generate_html(data, criteria, images_dir, device, timestamp, assets=None):
+    # Generate HTML content
+    html_content = f"""
 <!DOCTYPE html>
 <html>
 <head>
@@ -235,89 +251,83 @@ html_content = f"""
             </tr>
 """
 
-# Calculate worst cases (find the smallest value for each metric)
-worst_cases = []
-for i, entry in enumerate(data):
-    lane = entry['device_info']['target lane']
-    eye_height = float(entry['result_summary']['Eye_height'].split()[0])
-    eye_width = float(entry['result_summary']['Eye_width'].split()[0])
-    margin_top = float(entry['result_summary']['Margin_top'].split()[0])
-    margin_bottom = float(entry['result_summary']['Margin_bottom'].split()[0])
-    margin_left = float(entry['result_summary']['Margin_left'].split()[0]) * 1000
-    margin_right = float(entry['result_summary']['Margin_right'].split()[0]) * 1000
-    worst_cases.append({
-        'lane': lane,
-        'eye_product': eye_height * eye_width,
-        'margin_top': margin_top,
-        'margin_bottom': margin_bottom,
-        'margin_left': margin_left,
-        'margin_right': margin_right,
-        'metrics': {
+    # Calculate worst cases (find the smallest value for each metric)
+    worst_cases = []
+    for i, entry in enumerate(data):
+        lane = entry['device_info']['target lane']
+        eye_height = float(entry['result_summary']['Eye_height'].split()[0])
+        eye_width = float(entry['result_summary']['Eye_width'].split()[0])
+        margin_top = float(entry['result_summary']['Margin_top'].split()[0])
+        margin_bottom = float(entry['result_summary']['Margin_bottom'].split()[0])
+        margin_left = float(entry['result_summary']['Margin_left'].split()[0]) * 1000
+        margin_right = float(entry['result_summary']['Margin_right'].split()[0]) * 1000
+        worst_cases.append({
+            'lane': lane,
             'eye_product': eye_height * eye_width,
             'margin_top': margin_top,
             'margin_bottom': margin_bottom,
             'margin_left': margin_left,
-            'margin_right': margin_right
+            'margin_right': margin_right,
+            'metrics': {
+                'eye_product': eye_height * eye_width,
+                'margin_top': margin_top,
+                'margin_bottom': margin_bottom,
+                'margin_left': margin_left,
+                'margin_right': margin_right
+            }
+        })
+
+    # Find the smallest value for each metric and the corresponding lane
+    if worst_cases:
+        min_metrics = {
+            "eye_product": {"value": float('inf'), "lane": None, "entry": None},
+            "margin_top": {"value": float('inf'), "lane": None, "entry": None},
+            "margin_bottom": {"value": float('inf'), "lane": None, "entry": None},
+            "margin_left": {"value": float('inf'), "lane": None, "entry": None},
+            "margin_right": {"value": float('inf'), "lane": None, "entry": None}
         }
-    })
-
-# Find the smallest value for each metric and the corresponding lane
-if worst_cases:
-    min_metrics = {
-        "eye_product": {"value": float('inf'), "lane": None, "entry": None},
-        "margin_top": {"value": float('inf'), "lane": None, "entry": None},
-        "margin_bottom": {"value": float('inf'), "lane": None, "entry": None},
-        "margin_left": {"value": float('inf'), "lane": None, "entry": None},
-        "margin_right": {"value": float('inf'), "lane": None, "entry": None}
-    }
-
-    for entry in worst_cases:
-        metrics = entry["metrics"]
-        lane = entry["lane"]
-
-        for metric_name, value in metrics.items():
-            if value < min_metrics[metric_name]["value"]:
-                min_metrics[metric_name]["value"] = value
-                min_metrics[metric_name]["lane"] = lane
-                min_metrics[metric_name]["entry"] = entry
-
-    # Create a list of the worst-case entries (one for each metric)
-    worst_case_entries = list(min_metrics.values())
-else:
-    worst_case_entries = []
 
-# Helper function to format the value (highlight if it's the smallest for this row)
-def format_value(value, is_min):
-    if is_min:
-        return f'<font>{value:.1f}</font>'
-    return f"{value:.1f}"
+        for entry in worst_cases:
+            metrics = entry["metrics"]
+            lane = entry["lane"]
 
-# Generate rows for the "Worst Cases Summary" table
-if not worst_case_entries:
-    html_content += """
+            for metric_name, value in metrics.items():
+                if value < min_metrics[metric_name]["value"]:
+                    min_metrics[metric_name]["value"] = value
+                    min_metrics[metric_name]["lane"] = lane
+                    min_metrics[metric_name]["entry"] = entry
+
+        # Create a list of the worst-case entries (one for each metric)
+        worst_case_entries = list(min_metrics.values())
+    else:
+        worst_case_entries = []
+
+    # Generate rows for the "Worst Cases Summary" table
+    if not worst_case_entries:
+        html_content += """
             <tr>
                 <td colspan="6">No data available</td>
             </tr>
     """
-else:
-    processed_metrics = set()  # To avoid duplicates if the same lane has the smallest value for multiple metrics
-    for metric_name, min_data in min_metrics.items():
-        if metric_name in processed_metrics:
-            continue
-        entry = min_data["entry"]
-        if not entry:
-            continue
-
-        processed_metrics.add(metric_name)
-
-        # Determine which value to highlight (the smallest one for this row)
-        eye_product = format_value(entry["eye_product"], metric_name == "eye_product")
-        margin_top = format_value(entry["margin_top"], metric_name == "margin_top")
-        margin_bottom = format_value(entry["margin_bottom"], metric_name == "margin_bottom")
-        margin_left = format_value(entry["margin_left"], metric_name == "margin_left")
-        margin_right = format_value(entry["margin_right"], metric_name == "margin_right")
-
-        html_content += f"""
+    else:
+        processed_metrics = set()  # To avoid duplicates if the same lane has the smallest value for multiple metrics
+        for metric_name, min_data in min_metrics.items():
+            if metric_name in processed_metrics:
+                continue
+            entry = min_data["entry"]
+            if not entry:
+                continue
+
+            processed_metrics.add(metric_name)
+
+            # Determine which value to highlight (the smallest one for this row)
+            eye_product = format_value(entry["eye_product"], metric_name == "eye_product")
+            margin_top = format_value(entry["margin_top"], metric_name == "margin_top")
+            margin_bottom = format_value(entry["margin_bottom"], metric_name == "margin_bottom")
+            margin_left = format_value(entry["margin_left"], metric_name == "margin_left")
+            margin_right = format_value(entry["margin_right"], metric_name == "margin_right")
+
+            html_content += f"""
             <tr>
                 <td>lane {entry['lane']}</td>
                 <td>{eye_product}</td>
@@ -328,7 +338,7 @@ else:
             </tr>
         """
 
-html_content += f"""
+    html_content += f"""
         </table>
 
         <table>
@@ -375,20 +385,20 @@ html_content += f"""
                 </tr>
 """
 
-# Populate Raw Data table with embedded images
-for entry in data:
-    lane = entry['device_info']['target lane']
-    eye_width = entry['result_summary']['Eye_width']
-    eye_height = entry['result_summary']['Eye_height']
-    margin_left = entry['result_summary']['Margin_left']
-    margin_right = entry['result_summary']['Margin_right']
-    margin_top = entry['result_summary']['Margin_top']
-    margin_bottom = entry['result_summary']['Margin_bottom']
+    # Populate Raw Data table with embedded images
+    for entry in data:
+        lane = entry['device_info']['target lane']
+        eye_width = entry['result_summary']['Eye_width']
+        eye_height = entry['result_summary']['Eye_height']
+        margin_left = entry['result_summary']['Margin_left']
+        margin_right = entry['result_summary']['Margin_right']
+        margin_top = entry['result_summary']['Margin_top']
+        margin_bottom = entry['result_summary']['Margin_bottom']
 
-    # Load and encode the corresponding image
-    img_str = load_image_as_base64(lane)
+        # Load and encode the corresponding image
+        img_src = load_image_src(lane, images_dir, device, timestamp, assets)
 
-    html_content += f"""
+        html_content += f"""
                 <tr>
                     <td>{lane}</td>
                     <td>{eye_width}</td>
@@ -397,11 +407,11 @@ for entry in data:
                     <td>{margin_right}</td>
                     <td>{margin_top}</td>
                     <td>{margin_bottom}</td>
-                    <td>{'<img src="data:image/bmp;base64,' + img_str + '" class="eye-diagram" alt="Eye Diagram Lane ' + lane + '">' if img_str else 'N/A'}</td>
+                    <td>{'<img src="' + img_src + '" class="eye-diagram" alt="Eye Diagram Lane ' + lane + '" loading="lazy" decoding="async">' if img_src else 'N/A'}</td>
                 </tr>
     """
 
-html_content += """
+    html_content += """
             </table>
         </div>
     </div>
@@ -409,9 +419,42 @@ html_content += """
 </html>
 """
 
-# Save the HTML file in the same directory as the log file
-output_file = os.path.join(output_dir, 'Margin_Analysis_Report.html')
-with open(output_file, 'w') as f:
-    f.write(html_content)
+    return html_content
 
-print(f"HTML report generated as '{output_file}'")
\ No newline at end of file
+
+def analyze(inputs, criteria=None, images_dir=None, assets=None):
+    """Build the SAS4 margin report from a Result_Config log.
+
+    Eye diagrams are read from images_dir. By default that is the folder of
+    the .bmp eye diagrams among the inputs (uploads), else the Images folder
+    next to the log's Texts folder. They are inlined; with assets
+    (report_render.ImageAssets) they are stored there instead. Nothing else
+    is written.
+    """
+    criteria = resolve_criteria(DEFAULT_CRITERIA, criteria)
+    log_files = resolve_inputs(inputs, "Result_Config_*.txt", recursive=True)
+    if not log_files:
+        raise ValueError("No Result_Config_*.txt log found in the inputs.")
+    log_file = log_files[0]
+    if images_dir is None:
+        bmp_files = resolve_inputs(inputs, "*.bmp", recursive=True)
+        if bmp_files:
+            images_dir = os.path.dirname(bmp_files[0])
+        else:
+            images_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(log_file))), 'Images')
+    device, timestamp = parse_log_name(log_file)
+    data = parse_result_log(log_file)
+    html = generate_html(data, criteria, images_dir, device, timestamp, assets)
+    return {"html": html, "data": data}
+
+
+def main(log_file, images_dir):
+    # Save the HTML file in the same directory as the log file
+    output_dir = os.path.dirname(os.path.abspath(log_file))
+    output_file = os.path.join(output_dir, 'Margin_Analysis_Report.html')
+    result = analyze(log_file, images_dir=images_dir, assets=report_assets(output_file))
+    write_report(output_file, result["html"])
+
+
+if __name__ == "__main__":
+    main(log_file, images_dir)
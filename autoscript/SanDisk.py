@@ -1,119 +1,192 @@
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 import re
 import os
+import json
 import base64
 from datetime import datetime
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+from analyzer_api import resolve_inputs, resolve_criteria, resolve_chart_mode, write_report, use_headless_backend, CHART_MODE
+from report_render import heatmap, canvas_chart, canvas_script
+from figure_pool import PooledChart, render_png
+import worst_case
+from eye_geometry import measure_eyes
+
+# SanDisk margin logs carry no pass/fail limits, the report only ranks lanes.
+DEFAULT_CRITERIA = {}
+DEFAULT_LANE_WORKERS = os.cpu_count() or 1
+
+_ROW_START = re.compile(r'\s*(\d+),\s*(\d+),(.*)')
+_DIM_FIELDS = ('num_ptn', 'num_dac', 'num_phs')
+_AXIS_FIELDS = ('phs_step_ui', 'dac_step_mv')
+
+def _parse_row_values(text):
+    """Bulk-convert a row's comma separated values; returns (values, bad tokens)"""
+    tokens = text.strip().rstrip(',').split(',')
+    try:
+        return np.array(tokens, dtype=np.float64), []
+    except ValueError:
+        values, bad = [], []
+        for token in tokens:
+            token = token.strip()
+            if not token:
+                continue
+            try:
+                values.append(float(token))
+            except ValueError:
+                bad.append(token)
+        return np.array(values, dtype=np.float64), bad
 
 def parse_eye_vals(file_path):
-    """Parse m_eye_vals and axis params from file"""
+    """Parse m_eye_vals and axis params from file in a single streaming pass
+
+    Returns eye_data, num_ptn, num_dac, num_phs, phs_step_ui, dac_step_mv and a
+    list of malformed rows, one dict per problem with line, pattern, dac,
+    reason and detail.
+    """
+    section = None
+    dims = {}
+    axis = {}
+    eye_data = None
+    pending = []   # rows seen before all num_* fields
+    issues = []
+    row = None     # [line_no, pattern, dac, [value text chunks]]
+    found_end = False
+
+    def store(line_no, pattern_idx, dac_idx, chunks):
+        values, bad = _parse_row_values(','.join(chunks))
+        if bad:
+            issues.append({'line': line_no, 'pattern': pattern_idx, 'dac': dac_idx,
+                           'reason': 'bad_values', 'detail': bad})
+        num_phs = eye_data.shape[2]
+        if values.size != num_phs:
+            issues.append({'line': line_no, 'pattern': pattern_idx, 'dac': dac_idx,
+                           'reason': 'short_row' if values.size < num_phs else 'long_row',
+                           'detail': f'expected {num_phs} values, got {values.size}'})
+            # pad with 0.0 or truncate, as before
+            values = np.resize(np.append(values, np.zeros(max(0, num_phs - values.size))), num_phs)
+        if pattern_idx < eye_data.shape[0] and dac_idx < eye_data.shape[1]:
+            eye_data[pattern_idx, dac_idx, :] = values
+        else:
+            issues.append({'line': line_no, 'pattern': pattern_idx, 'dac': dac_idx,
+                           'reason': 'out_of_range', 'detail': f'shape {eye_data.shape}'})
+
+    def flush():
+        if row is None:
+            return
+        if eye_data is None:
+            pending.append(row)
+        else:
+            store(*row)
+
     with open(file_path, 'r') as f:
-        content = f.read()
-    
-    # Extract m_eye_vals data
-    eye_vals_section = re.search(r'\[3\] m_eye_vals,.*?(?=End of Data)', content, re.DOTALL)
-    if not eye_vals_section:
+        for line_no, line in enumerate(f, 1):
+            if section != 'eye':
+                if line.startswith('[2] Axis Params,'):
+                    section = 'axis'
+                elif line.startswith('[3] m_eye_vals,'):
+                    if section != 'axis':
+                        raise ValueError(f"Could not find Axis Params section in {file_path}")
+                    section = 'eye'
+                elif section == 'axis':
+                    for field in _AXIS_FIELDS:
+                        match = re.search(field + r',\s*([\d\.]+)', line)
+                        if match and field not in axis:
+                            axis[field] = float(match.group(1))
+                continue
+
+            if 'End of Data' in line:
+                found_end = True
+                break
+            match = _ROW_START.match(line)
+            if match:
+                flush()
+                row = [line_no, int(match.group(1)), int(match.group(2)), [match.group(3)]]
+                continue
+            header = next((field for field in _DIM_FIELDS if field in line), None)
+            if header is not None:
+                match = re.search(header + r',\s*(\d+)', line)
+                if match and header not in dims:
+                    dims[header] = int(match.group(1))
+                    if eye_data is None and len(dims) == len(_DIM_FIELDS):
+                        eye_data = np.zeros(tuple(dims[field] for field in _DIM_FIELDS))
+                        for held in pending:
+                            store(*held)
+                        pending = []
+            elif row is not None and line.strip():
+                row[3].append(line)  # values wrapped onto the next line
+        if section == 'eye' and eye_data is not None:
+            flush()
+
+    if section != 'eye':
         raise ValueError(f"Could not find m_eye_vals section in {file_path}")
-    
-    # Extract num_ptn, num_dac, num_phs
-    num_ptn = int(re.search(r'num_ptn,\s*(\d+)', eye_vals_section.group()).group(1))
-    num_dac = int(re.search(r'num_dac,\s*(\d+)', eye_vals_section.group()).group(1))
-    num_phs = int(re.search(r'num_phs,\s*(\d+)', eye_vals_section.group()).group(1))
-    
-    # Extract phs_step_ui and dac_step_mv
-    axis_params_section = re.search(r'\[2\] Axis Params,.*?(?=\[3\] m_eye_vals,)', content, re.DOTALL)
-    if not axis_params_section:
-        raise ValueError(f"Could not find Axis Params section in {file_path}")
-    phs_step_ui = float(re.search(r'phs_step_ui,\s*([\d\.]+)', axis_params_section.group()).group(1))
-    dac_step_mv = float(re.search(r'dac_step_mv,\s*([\d\.]+)', axis_params_section.group()).group(1))
-    
+    if eye_data is None:
+        raise ValueError(f"Could not find num_ptn/num_dac/num_phs in {file_path}")
+    if len(axis) != len(_AXIS_FIELDS):
+        raise ValueError(f"Could not find phs_step_ui/dac_step_mv in Axis Params of {file_path}")
+    if not found_end:
+        issues.append({'line': line_no, 'pattern': None, 'dac': None,
+                       'reason': 'missing_end', 'detail': 'no End of Data marker'})
+
+    num_ptn, num_dac, num_phs = eye_data.shape
+    phs_step_ui, dac_step_mv = axis['phs_step_ui'], axis['dac_step_mv']
     print(f"File: {file_path}, num_ptn={num_ptn}, num_dac={num_dac}, num_phs={num_phs}, phs_step_ui={phs_step_ui}, dac_step_mv={dac_step_mv}")
-    
-    # Initialize data array
-    expected_shape = (num_ptn, num_dac, num_phs)
-    eye_data = np.zeros(expected_shape)
-    
-    # Parse data lines
-    pattern_lines = re.findall(r'(\d+),\s*(\d+),\s*([\d\.\s,-]+?)(?=\n\d+,\s*\d+,|\n\s*$)', eye_vals_section.group(), re.MULTILINE)
-    for line_idx, line in enumerate(pattern_lines):
-        pattern_idx = int(line[0])
-        dac_idx = int(line[1])
-        raw_values = line[2].strip().split(',')
-        values = []
-        for x in raw_values:
-            x = x.strip()
-            if x:
-                try:
-                    values.append(float(x))
-                except ValueError:
-                    print(f"Warning: Could not convert '{x}' to float in {file_path}, pattern {pattern_idx}, dac {dac_idx}. Skipping...")
-                    continue
-        
-        if len(values) != num_phs:
-            print(f"Warning: Expected {num_phs} values, got {len(values)} in {file_path}, pattern {pattern_idx}, dac {dac_idx}. Adjusting...")
-            if len(values) < num_phs:
-                values.extend([0.0] * (num_phs - len(values)))
-            else:
-                values = values[:num_phs]
-        
-        if pattern_idx < expected_shape[0] and dac_idx < expected_shape[1]:
-            eye_data[pattern_idx, dac_idx, :] = values
-        else:
-            print(f"Warning: Invalid indices (pattern={pattern_idx}, dac={dac_idx}) in {file_path}. Skipping...")
-    
-    print(f"Parsed eye_data shape for {file_path}: {eye_data.shape}")
-    return eye_data, num_ptn, num_dac, num_phs, phs_step_ui, dac_step_mv
+    if issues:
+        print(f"File: {file_path}, {len(issues)} malformed rows")
+    return eye_data, num_ptn, num_dac, num_phs, phs_step_ui, dac_step_mv, issues
 
-def calculate_eye_metrics(eye_data, phs_step_ui, dac_step_mv, lane_id):
-    """Calculate eye metrics: up(mV), down(mV), left(uI), right(uI), EH*EW"""
-    combined_data = np.min(eye_data, axis=0)  # Shape: (num_dac, num_phs)
-    threshold = 0.9  # Signal quality threshold for eye boundaries
-    high_quality = combined_data >= threshold
-    
-    if not np.any(high_quality):
-        print(f"Warning: No data above threshold {threshold} for Lane {lane_id}. Using fallback metrics.")
-        center_dac, center_phase = np.unravel_index(np.argmax(combined_data), combined_data.shape)
-        up_mv = down_mv = center_dac * dac_step_mv
-        left_ui = right_ui = center_phase * phs_step_ui
-        eh_ew = 0.0
-        return {
-            'lane': lane_id,
-            'up(mV)': up_mv,
-            'down(mV)': -down_mv,
-            'left(uI)': -left_ui,
-            'right(uI)': right_ui,
-            'EH*EW': eh_ew
-        }
-    
-    # Find eye boundaries
-    dac_indices, phase_indices = np.where(high_quality)
-    dac_min, dac_max = dac_indices.min(), dac_indices.max()
-    phase_min, phase_max = phase_indices.min(), phase_indices.max()
-    
-    # Convert to mV and UI
-    up_mv = (dac_max * dac_step_mv)
-    down_mv = -(dac_min * dac_step_mv)
-    left_ui = -(phase_min * phs_step_ui)
-    right_ui = (phase_max * phs_step_ui)
-    eh_ew = (right_ui - left_ui) * (up_mv - down_mv)
-    
-    print(f"Lane {lane_id} boundaries: dac_min={dac_min}, dac_max={dac_max}, phase_min={phase_min}, phase_max={phase_max}")
+EYE_THRESHOLD = 0.9  # Signal quality threshold for eye boundaries
+
+def _fallback_metrics(lane_id):
+    """A closed eye has no margin in any direction, so it ranks as the worst case."""
+    print(f"Warning: No data above threshold {EYE_THRESHOLD} for Lane {lane_id}. Reporting zero margins.")
     return {
         'lane': lane_id,
-        'up(mV)': up_mv,
-        'down(mV)': down_mv,
-        'left(uI)': left_ui,
-        'right(uI)': right_ui,
-        'EH*EW': eh_ew
+        'up(mV)': 0.0,
+        'down(mV)': 0.0,
+        'left(uI)': 0.0,
+        'right(uI)': 0.0,
+        'EH*EW': 0.0
     }
 
-def create_lane_eye_diagram(eye_data, lane_id, output_dir):
-    """Create centered eye diagram for a single lane, save to output directory"""
+def calculate_lane_metrics(lanes):
+    """Eye metrics for every lane at once: up(mV), down(mV), left(uI), right(uI), EH*EW.
+
+    lanes are (lane_id, eye_data, phs_step_ui, dac_step_mv) tuples. The eye is the
+    connected region above the threshold around the grid center, measured from that
+    center; lanes with the same grid size are labeled in one batched call.
+    """
+    combined = [np.min(eye_data, axis=0) for _, eye_data, _, _ in lanes]  # (num_dac, num_phs) each
+    eyes = measure_eyes(combined, EYE_THRESHOLD, open_above=True,
+                        dac_steps=[lane[3] for lane in lanes], phs_steps=[lane[2] for lane in lanes])
+    metrics = []
+    for (lane_id, _, _, _), eye in zip(lanes, eyes):
+        if not eye['found']:
+            metrics.append(_fallback_metrics(lane_id))
+            continue
+        print(f"Lane {lane_id} boundaries: dac_min={eye['dac_min']}, dac_max={eye['dac_max']}, phase_min={eye['phs_min']}, phase_max={eye['phs_max']}")
+        metrics.append({
+            'lane': lane_id,
+            'up(mV)': eye['up'],
+            'down(mV)': eye['down'],
+            'left(uI)': eye['left'],
+            'right(uI)': eye['right'],
+            'EH*EW': eye['width'] * eye['height']
+        })
+    return metrics
+
+def calculate_eye_metrics(eye_data, phs_step_ui, dac_step_mv, lane_id):
+    """Calculate eye metrics for a single lane, see calculate_lane_metrics"""
+    return calculate_lane_metrics([(lane_id, eye_data, phs_step_ui, dac_step_mv)])[0]
+
+def center_lane_eye(eye_data, lane_id):
+    """Worst-pattern grid cropped around the eye center; returns (cropped_data, (phase_min, phase_max, dac_min, dac_max))"""
     combined_data = np.min(eye_data, axis=0)
     print(f"Lane {lane_id} combined data shape: {combined_data.shape}")
     
-    high_quality = combined_data >= 0.9
+    high_quality = combined_data >= EYE_THRESHOLD
     if np.any(high_quality):
         center_dac, center_phase = np.mean(np.where(high_quality), axis=1).astype(int)
     else:
@@ -129,35 +202,115 @@ def create_lane_eye_diagram(eye_data, lane_id, output_dir):
     
     cropped_data = combined_data[dac_min:dac_max, phase_min:phase_max]
     print(f"Lane {lane_id} cropped data shape: {cropped_data.shape}")
-    
-    plt.figure(figsize=(10, 6))
-    plt.imshow(cropped_data, 
-               cmap='viridis', 
-               interpolation='nearest',
-               aspect='auto',
-               extent=[phase_min, phase_max, dac_max, dac_min])
-    plt.colorbar(label='Signal Quality (Min, 0 to 1)')
-    plt.title(f'Centered Eye Diagram - Lane {lane_id}, All Patterns')
-    plt.xlabel('Phase Step')
-    plt.ylabel('DAC Step')
-    plt.gca().invert_yaxis()
-    
+    return cropped_data, (phase_min, phase_max, dac_min, dac_max)
+
+class LaneEyeChart(PooledChart):
+    """Template for render_lane_eye_diagram: figure, axes and colorbar are built once per process"""
+    figsize = (10, 6)
+    savefig_kwargs = {'dpi': 300, 'bbox_inches': 'tight'}
+
+    def build(self):
+        self.ax = self.figure.add_subplot()
+        self.image = self.ax.imshow(np.zeros((1, 1)), cmap='viridis', interpolation='nearest', aspect='auto')
+        self.figure.colorbar(self.image, ax=self.ax, label='Signal Quality (Min, 0 to 1)')
+        self.ax.set_xlabel('Phase Step')
+        self.ax.set_ylabel('DAC Step')
+
+    def update(self, cropped_data, extent, lane_id):
+        phase_min, phase_max, dac_min, dac_max = extent
+        self.image.set_data(cropped_data)
+        values = self.image.get_array()
+        self.image.set_clim(values.min(), values.max())
+        self.image.set_extent([phase_min, phase_max, dac_max, dac_min])
+        # rows run from dac_min at the bottom up to dac_max
+        self.ax.set_xlim(phase_min, phase_max)
+        self.ax.set_ylim(dac_min, dac_max)
+        self.ax.set_title(f'Centered Eye Diagram - Lane {lane_id}, All Patterns')
+
+def render_lane_eye_diagram(eye_data, lane_id):
+    """Render centered eye diagram for a single lane, return PNG bytes"""
+    cropped_data, extent = center_lane_eye(eye_data, lane_id)
+    return render_png(LaneEyeChart, cropped_data, extent, lane_id)
+
+def lane_eye_chart(eye_data, lane_id):
+    """Centered eye diagram for the canvas chart mode, the cropped grid embedded as float32"""
+    cropped_data, (phase_min, phase_max, dac_min, dac_max) = center_lane_eye(eye_data, lane_id)
+    spec = heatmap(cropped_data, extent=(phase_min, phase_max, dac_min, dac_max), origin='lower', dtype=np.float32,
+                   title=f'Centered Eye Diagram - Lane {lane_id}, All Patterns',
+                   xlabel='Phase Step', ylabel='DAC Step', colorbar='Signal Quality (Min, 0 to 1)', aspect=0.6)
+    return canvas_chart(spec, alt=f'lane_{lane_id}_eye_diagram', width=1000)
+
+def create_lane_eye_diagram(eye_data, lane_id, output_dir):
+    """Create centered eye diagram for a single lane, save to output directory"""
     output_path = os.path.join(output_dir, f'lane_{lane_id}_eye_diagram.png')
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.close()
+    with open(output_path, 'wb') as f:
+        f.write(render_lane_eye_diagram(eye_data, lane_id))
     print(f"Saved centered eye diagram for Lane {lane_id} to {output_path}")
     return output_path
 
+EYE_STORE_INDEX = 'eye_vals.json'
+
+def save_eye_vals(lanes, store_dir):
+    """Write [(lane_id, eye_data, phs_step_ui, dac_step_mv)] as a raw-eye store in store_dir.
+
+    Every (ptn, dac, phs) cube goes to lane_<id>_eye_vals.npy and eye_vals.json
+    is rewritten from these lanes only, keeping each lane's shape and axis
+    steps next to its file name, so load_eye_vals can memory-map the cubes
+    back without parsing the logs again. Cubes of lanes that an earlier run
+    stored but this one does not have are removed.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    index_path = os.path.join(store_dir, EYE_STORE_INDEX)
+    previous = {}
+    if os.path.exists(index_path):
+        with open(index_path, 'r', encoding='utf8') as f:
+            previous = json.load(f).get('lanes', {})
+
+    index = {'lanes': {}}
+    for lane_id, eye_data, phs_step_ui, dac_step_mv in lanes:
+        file_name = f'lane_{lane_id}_eye_vals.npy'
+        np.save(os.path.join(store_dir, file_name), np.ascontiguousarray(eye_data, dtype=np.float64))
+        index['lanes'][str(lane_id)] = {
+            'file': file_name,
+            'shape': list(eye_data.shape),
+            'phs_step_ui': float(phs_step_ui),
+            'dac_step_mv': float(dac_step_mv),
+        }
+    with open(index_path, 'w', encoding='utf8') as f:
+        json.dump(index, f, indent=2)
+
+    for lane_id, meta in previous.items():
+        stale = os.path.join(store_dir, os.path.basename(meta['file']))
+        if lane_id not in index['lanes'] and os.path.exists(stale):
+            os.remove(stale)
+    print(f"Saved m_eye_vals for {len(index['lanes'])} lanes to {store_dir}")
+    return index_path
+
+def load_eye_vals(store_dir, mmap_mode='r'):
+    """Read a store written by save_eye_vals as [(lane_id, eye_data, phs_step_ui, dac_step_mv)], sorted by lane.
+
+    The list feeds calculate_lane_metrics directly. Cubes are memory-mapped
+    read-only by default; pass mmap_mode=None to load them into memory.
+    """
+    with open(os.path.join(store_dir, EYE_STORE_INDEX), 'r', encoding='utf8') as f:
+        index = json.load(f)
+    lanes = []
+    for lane_id, meta in sorted(index['lanes'].items(), key=lambda item: int(item[0])):
+        eye_data = np.load(os.path.join(store_dir, meta['file']), mmap_mode=mmap_mode)
+        if list(eye_data.shape) != meta['shape']:
+            raise ValueError(f"{meta['file']}: shape {eye_data.shape} does not match index {meta['shape']}")
+        lanes.append((int(lane_id), eye_data, meta['phs_step_ui'], meta['dac_step_mv']))
+    return lanes
+
 def save_eye_vals_to_csv(eye_data, lane_id, output_dir):
-    """Save m_eye_vals data to CSV for a given lane"""
+    """Export m_eye_vals to CSV for a given lane, one row per (pattern, dac)"""
     num_ptn, num_dac, num_phs = eye_data.shape
-    data = []
-    for ptn in range(num_ptn):
-        for dac in range(num_dac):
-            row = [lane_id, ptn, dac] + eye_data[ptn, dac, :].tolist()
-            data.append(row)
-    columns = ['lane', 'pattern', 'dac'] + [f'phase_{i}' for i in range(num_phs)]
-    df = pd.DataFrame(data, columns=columns)
+    pattern, dac = np.divmod(np.arange(num_ptn * num_dac), num_dac)
+    df = pd.DataFrame(eye_data.reshape(num_ptn * num_dac, num_phs),
+                      columns=[f'phase_{i}' for i in range(num_phs)])
+    df.insert(0, 'dac', dac)
+    df.insert(0, 'pattern', pattern)
+    df.insert(0, 'lane', lane_id)
     output_path = os.path.join(output_dir, f'lane_{lane_id}_eye_vals.csv')
     df.to_csv(output_path, index=False)
     print(f"Saved m_eye_vals for Lane {lane_id} to {output_path}")
@@ -166,13 +319,13 @@ def get_bdf_info():
     """Return simplified device info"""
     return [('SanDisk', 'DC SN861')]
 
-def generate_html_report(margin_df, worst_cases, raw_data_params, output_path, config_info):
-    """Generate HTML report with simplified Data Information, worst-case lanes, and raw log params"""
+def generate_html_report(margin_df, worst_cases, raw_data_params, config_info, images, charts=None):
+    """Generate HTML report with simplified Data Information, worst-case lanes, and raw log params
+
+    images is a list of (name, png_bytes) embedded in order; charts, when
+    given, is a list of canvas chart figures shown in their place.
+    """
     current_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    output_dir = os.path.dirname(output_path)
-    image_extensions = ('.png', '.jpg', '.jpeg', '.gif')
-    image_files = [f for f in os.listdir(output_dir) if f.startswith('lane_') and f.lower().endswith(image_extensions)]
-    image_files.sort()
 
     html_header = f"""<!DOCTYPE html>
 <html>
@@ -267,16 +420,12 @@ def generate_html_report(margin_df, worst_cases, raw_data_params, output_path, c
 <div class="image-section">
 <h2>Images</h2>
 """
-    if image_files:
-        for image in image_files:
-            image_path = os.path.join(output_dir, image)
-            try:
-                with open(image_path, 'rb') as img_file:
-                    img_data = base64.b64encode(img_file.read()).decode('utf-8')
-                html_images += f'<img src="data:image/png;base64,{img_data}" alt="{image}" /><br>'
-            except Exception as e:
-                print(f"Warning: Could not embed image {image}: {e}")
-                html_images += f'<p>Error embedding {image}: {e}</p><br>'
+    if charts:
+        html_images += ''.join(charts) + canvas_script()
+    elif images:
+        for image, png_bytes in images:
+            img_data = base64.b64encode(png_bytes).decode('utf-8')
+            html_images += f'<img src="data:image/png;base64,{img_data}" alt="{image}" /><br>'
     else:
         html_images += "<p>No images found in the directory.</p>"
     html_images += "</div>"
@@ -297,79 +446,122 @@ def generate_html_report(margin_df, worst_cases, raw_data_params, output_path, c
 </html>
 """
 
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(html_header + html_data_info + html_worst + html_images + html_raw + html_footer)
+    return html_header + html_data_info + html_worst + html_images + html_raw + html_footer
 
-def main(input_dir):
-    file_paths = [os.path.join(input_dir, f'sandisk{lane}.txt') for lane in range(4)]
-    output_dir = input_dir
-    
-    all_metrics = []
-    raw_data_params = []
-    config_info = get_bdf_info()  # Single device info for all lanes
-    
-    for lane_id, file_path in enumerate(file_paths):
-        if not os.path.exists(file_path):
-            print(f"File {file_path} not found, skipping...")
-            continue
-        print(f"Processing {file_path}...")
-        eye_data, num_ptn, num_dac, num_phs, phs_step_ui, dac_step_mv = parse_eye_vals(file_path)
-        metrics = calculate_eye_metrics(eye_data, phs_step_ui, dac_step_mv, lane_id)
-        all_metrics.append(metrics)
-        raw_data_params.append({
+def lane_id_from_path(file_path):
+    """sandisk<lane>.txt -> lane number"""
+    match = re.search(r'(\d+)\.txt$', os.path.basename(file_path))
+    return int(match.group(1)) if match else None
+
+def find_worst_cases(margin_df):
+    """Worst lane per metric; all five rows are kept even if they repeat a lane"""
+    return worst_case.find_worst_cases(margin_df, worst_case.EYE_MARGIN_SPECS)
+
+def process_lane(file_path, charts="image"):
+    """Parse and render one sandisk<lane>.txt; lanes are independent of each other
+
+    With charts="canvas" the lane gets a canvas chart instead of a PNG.
+    """
+    lane_id = lane_id_from_path(file_path)
+    print(f"Processing {file_path}...")
+    eye_data, num_ptn, num_dac, num_phs, phs_step_ui, dac_step_mv, issues = parse_eye_vals(file_path)
+    if charts == "canvas":
+        image, chart = None, lane_eye_chart(eye_data, lane_id)
+    else:
+        image, chart = (f'lane_{lane_id}_eye_diagram.png', render_lane_eye_diagram(eye_data, lane_id)), None
+    return {
+        'lane': lane_id,
+        'raw_data_params': {
             'lane': lane_id,
             'num_ptn': num_ptn,
             'num_dac': num_dac,
             'num_phs': num_phs,
             'phs_step_ui': phs_step_ui,
             'dac_step_mv': dac_step_mv
-        })
-        create_lane_eye_diagram(eye_data, lane_id, output_dir)
-        save_eye_vals_to_csv(eye_data, lane_id, output_dir)
-    
-    if not all_metrics:
+        },
+        'eye_data': eye_data,
+        'issues': issues,
+        'image': image,
+        'chart': chart,
+    }
+
+def _init_lane_worker():
+    # Worker processes never show a window, render off-screen.
+    use_headless_backend()
+
+def process_lanes(file_paths, workers=1, charts="image"):
+    """process_lane for every file, in a process pool when workers > 1; results keep file order"""
+    workers = min(workers, len(file_paths))
+    if workers <= 1:
+        return [process_lane(file_path, charts) for file_path in file_paths]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_lane_worker) as executor:
+        return list(executor.map(partial(process_lane, charts=charts), file_paths))
+
+def analyze(inputs, criteria=None, workers=1, charts="image", eye_store=None):
+    """Build the SanDisk margin report from sandisk<lane>.txt logs.
+
+    Every sandisk<N>.txt found is a lane, so x8/x16 captures need no changes.
+    Returns the HTML plus the per-lane eye arrays and PNGs so callers can persist them.
+    charts="canvas" renders no PNGs; the eye diagrams are drawn in the browser.
+    Nothing is written unless eye_store names a directory for the raw-eye
+    store (see save_eye_vals).
+    """
+    resolve_criteria(DEFAULT_CRITERIA, criteria)
+    resolve_chart_mode(charts)
+    file_paths = [p for p in resolve_inputs(inputs, 'sandisk*.txt') if lane_id_from_path(p) is not None]
+    file_paths.sort(key=lane_id_from_path)
+    if not file_paths:
+        raise ValueError("No valid data processed.")
+
+    lanes = process_lanes(file_paths, workers, charts)
+    config_info = get_bdf_info()  # Single device info for all lanes
+
+    raw_data_params = pd.DataFrame([lane['raw_data_params'] for lane in lanes])
+    lane_eyes = [
+        (lane['lane'], lane['eye_data'], lane['raw_data_params']['phs_step_ui'], lane['raw_data_params']['dac_step_mv'])
+        for lane in lanes
+    ]
+    margin_df = pd.DataFrame(calculate_lane_metrics(lane_eyes))
+    if eye_store is not None:
+        save_eye_vals(lane_eyes, eye_store)
+    images = [lane['image'] for lane in lanes if lane['image'] is not None]
+    lane_charts = [lane['chart'] for lane in lanes if lane['chart'] is not None]
+    worst_cases = find_worst_cases(margin_df)
+    html = generate_html_report(margin_df, worst_cases, raw_data_params, config_info, images, lane_charts)
+    return {
+        "html": html,
+        "data": margin_df,
+        "worst_cases": worst_cases,
+        "raw_data_params": raw_data_params,
+        "eye_data": {lane['lane']: lane['eye_data'] for lane in lanes},
+        "malformed_rows": {lane['lane']: lane['issues'] for lane in lanes if lane['issues']},
+        "images": images,
+    }
+
+def main(input_dir, workers=DEFAULT_LANE_WORKERS, export_csv=False, eye_store=False, charts=CHART_MODE):
+    """Write the report and lane PNGs next to the logs; the .npy eye store and CSV export are opt-in.
+
+    In the canvas chart mode there are no lane PNGs to write.
+    """
+    output_dir = input_dir
+
+    try:
+        result = analyze(input_dir, workers=workers, charts=charts, eye_store=output_dir if eye_store else None)
+    except ValueError:
         print("No valid data processed. Exiting...")
         return
-    
-    margin_df = pd.DataFrame(all_metrics)
-    raw_data_params = pd.DataFrame(raw_data_params)
-    
-    # Find worst-case lanes for each metric
-    worst_cases = []
-    if not margin_df.empty:
-        # EH*EW: smallest is worst
-        worst_eh_ew = margin_df.loc[margin_df['EH*EW'].idxmin()].copy()
-        worst_eh_ew['worst_metric'] = 'EH*EW'
-        worst_cases.append(worst_eh_ew)
-        
-        # Top (mV): smallest is worst
-        worst_up_mv = margin_df.loc[margin_df['up(mV)'].idxmin()].copy()
-        worst_up_mv['worst_metric'] = 'Top (mV)'
-        worst_cases.append(worst_up_mv)
-        
-        # Bottom (mV): largest (least negative) is worst
-        worst_down_mv = margin_df.loc[margin_df['down(mV)'].idxmax()].copy()
-        worst_down_mv['worst_metric'] = 'Bottom (mV)'
-        worst_cases.append(worst_down_mv)
-        
-        # Left (UI): largest (least negative) is worst
-        worst_left_ui = margin_df.loc[margin_df['left(uI)'].idxmax()].copy()
-        worst_left_ui['worst_metric'] = 'Left (UI)'
-        worst_cases.append(worst_left_ui)
-        
-        # Right (UI): smallest is worst
-        worst_right_ui = margin_df.loc[margin_df['right(uI)'].idxmin()].copy()
-        worst_right_ui['worst_metric'] = 'Right (UI)'
-        worst_cases.append(worst_right_ui)
-    
-    # Combine into DataFrame (keep all five, even if duplicates)
-    worst_cases = pd.DataFrame(worst_cases)
-    
+    for image, png_bytes in result["images"]:
+        with open(os.path.join(output_dir, image), 'wb') as f:
+            f.write(png_bytes)
+    if export_csv:
+        for lane_id, eye_data in result["eye_data"].items():
+            save_eye_vals_to_csv(eye_data, lane_id, output_dir)
+
     output_filename = f"SanDisk_Margin_Analysis_Report_{datetime.now().strftime('%Y_%m_%d_%H_%M_%S')}.html"
     output_path = os.path.join(output_dir, output_filename)
-    generate_html_report(margin_df, worst_cases, raw_data_params, output_path, config_info)
+    write_report(output_path, result["html"])
     print(f"Report generated at: {output_path}")
 
 if __name__ == "__main__":
     input_dir = r'C:\Users\dchen52\OneDrive - Lenovo\Documents\SanDisk'
-    main(input_dir)
\ No newline at end of file
+    main(input_dir)
@@ -0,0 +1,95 @@
+"""Helpers shared by the headless ``analyze(inputs, criteria)`` entry points.
+
+Every analyzer exposes ``analyze(inputs, criteria=None)`` which only reads its
+inputs and returns a dict holding the report under ``"html"`` next to the parsed
+tables. The report is a string or a ``report_render.Report``, which renders
+in chunks while it is written. The Tk windows and ``__main__`` blocks are thin
+shells that call it and write the HTML where the scripts always did.
+
+Heavy optional modules (matplotlib, openpyxl, jinja2) are imported where
+they are first needed, so importing an analyzer stays cheap and a run only
+pays for what its code path uses.
+"""
+import os
+import sys
+import fnmatch
+
+# "png" or "webp" writes report images as files under assets/ next to the
+# report (see report_render.ImageAssets); unset keeps them inline.
+IMAGE_ASSETS = os.environ.get("MDMS_IMAGE_ASSETS") or None
+# "canvas" embeds chart data for the browser to draw instead of rendering
+# images with matplotlib, for the analyzers that support it.
+CHART_MODE = os.environ.get("MDMS_CHARTS") or "image"
+
+
+def resolve_inputs(inputs, pattern="*", recursive=False):
+    """Expand a file, a directory or a list of them into sorted files matching pattern."""
+    if isinstance(inputs, (str, os.PathLike)):
+        inputs = [inputs]
+    files = []
+    for path in inputs:
+        path = os.fspath(path)
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in names if fnmatch.fnmatch(name, pattern))
+                if not recursive:
+                    break
+        elif os.path.isfile(path) and fnmatch.fnmatch(os.path.basename(path), pattern):
+            files.append(path)
+    return sorted(files)
+
+
+def resolve_criteria(defaults, criteria=None):
+    """Overlay caller criteria on an analyzer's defaults, ignoring unset values."""
+    merged = dict(defaults)
+    if criteria:
+        merged.update({key: value for key, value in criteria.items() if key in defaults and value is not None})
+    return merged
+
+
+def resolve_chart_mode(charts):
+    """Check a chart mode ("image" or "canvas") and return it."""
+    if charts not in ("image", "canvas"):
+        raise ValueError(f"charts must be 'image' or 'canvas', got {charts!r}")
+    return charts
+
+
+def report_assets(output_path, image_format=IMAGE_ASSETS):
+    """ImageAssets for a report written to output_path, or None to inline images."""
+    if not image_format:
+        return None
+    from report_render import ImageAssets
+    return ImageAssets(os.path.join(os.path.dirname(os.path.abspath(output_path)), "assets"), "assets", image_format)
+
+
+def pyplot():
+    """matplotlib.pyplot, imported on first use.
+
+    The analyzers only save figures, so Agg is selected before pyplot loads
+    and no GUI toolkit is pulled in, unless MPLBACKEND names a backend or
+    pyplot is already loaded.
+    """
+    if "matplotlib.pyplot" not in sys.modules and not os.environ.get("MPLBACKEND"):
+        import matplotlib
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def use_headless_backend():
+    """Make this process (a worker) render with Agg without importing matplotlib just for that."""
+    os.environ["MPLBACKEND"] = "Agg"
+    if "matplotlib" in sys.modules:
+        sys.modules["matplotlib"].use("Agg", force=True)
+
+
+def write_report(output_path, html):
+    """Write a report given as one string or as an iterable of chunks (a streamed report)."""
+    with open(output_path, "w", encoding="utf-8") as f:
+        if isinstance(html, str):
+            f.write(html)
+        else:
+            for chunk in html:
+                f.write(chunk)
+    print(f"HTML report saved to: {output_path}")
+    return output_path
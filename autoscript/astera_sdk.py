@@ -2,7 +2,10 @@ import os
 import io
 import base64
 import pandas as pd
-import matplotlib.pyplot as plt
+
+from analyzer_api import resolve_inputs, resolve_criteria, write_report, report_assets, pyplot
+from worst_case import LMT_MARGIN_SPECS, worst_case_rows
+from report_render import Report, FrameRows, chart, worst_rows
 
 # ========= 使用者可修改區 =========
 input_folder = r"C:\Users\dchen52\OneDrive - Lenovo\Documents\Astera\Astera_retimer\Astera LMT compare RXB\Astera python SDK+Kauai+Genoa+P5+Slot12\1x5"
@@ -10,6 +13,8 @@ ui_criteria = 10  # Timing Margin UI 標準
 volt_criteria = 25  # Voltage Margin mV 標準
 # =================================
 
+DEFAULT_CRITERIA = {"ui_criteria": ui_criteria, "volt_criteria": volt_criteria}
+
 column_map = {
     "Timing_neg_UI%": "Margin Left (UI)",
     "Timing_pos_UI%": "Margin Right (UI)",
@@ -30,13 +35,7 @@ def find_worst_cases(data):
     data['EH'] = data['Total Volt(volt)']
     data['EW'] = data['Total Phase(UI)']
     data['EH_EW'] = data['EH'] * data['EW']
-    return {
-        'Worst ML': data.loc[data['ML'].idxmin()],
-        'Worst MR': data.loc[data['MR'].idxmin()],
-        'Worst MT': data.loc[data['MT'].idxmin()],
-        'Worst MB': data.loc[data['MB'].idxmin()],
-        'Worst EH*EW': data.loc[data['EH_EW'].idxmin()]
-    }
+    return worst_case_rows(data, LMT_MARGIN_SPECS)
 
 def generate_eye_diagram(ax, worst_cases, ui_criteria, volt_criteria):
     def plot_eye(case, color, label):
@@ -73,197 +72,75 @@ def generate_eye_diagram(ax, worst_cases, ui_criteria, volt_criteria):
 
     ax.legend(loc='upper right')
 
-def generate_html(data, eye_diagram_base64, ui_criteria, volt_criteria, output_file):
-    summary = find_worst_cases(data)
-
-    # Chart HTML for eye diagram
-    charts_html = f'<div class="chart"><img src="data:image/png;base64,{eye_diagram_base64}" /></div>'
-
-    html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        <title>Margin Analysis Report</title>
-        <style>
-            body {{
-                background-color: #f0f8ff;
-                color: #333333;
-                font-family: Arial, sans-serif;
-                margin: 0;
-                padding: 0;
-            }}
-            .container {{
-                max-width: 1200px;
-                margin: 40px auto;
-                background-color: #ffffff;
-                padding: 20px;
-                border-radius: 10px;
-                box-shadow: 0 0 15px rgba(0, 0, 0, 0.1);
-            }}
-            h1 {{
-                text-align: center;
-                color: #333333;
-                margin-bottom: 20px;
-            }}
-            .chart-container {{
-                display: flex;
-                flex-wrap: wrap;
-                justify-content: center;
-            }}
-            .chart {{
-                margin: 20px;
-                border: 1px solid #dddddd;
-                border-radius: 8px;
-                padding: 10px;
-                background-color: #fafafa;
-                box-shadow: 0 0 10px rgba(0, 0, 0, 0.05);
-            }}
-            .title-header {{
-                font-size: 20px;
-                font-weight: bold;
-                background-color: #f0f0f0;
-                padding: 10px;
-                text-align: center;
-                border: 1px solid #dddddd;
-            }}
-            table {{
-                width: 100%;
-                border-collapse: collapse;
-                margin-top: 20px;
-                background-color: #ffffff;
-            }}
-            table, th, td {{
-                border: 1px solid #dddddd;
-            }}
-            th, td {{
-                padding: 15px;
-                text-align: center;
-            }}
-            th {{
-                background-color: #f0f0f0;
-                color: #333333;
-            }}
-            tr:nth-child(even) {{
-                background-color: #f9f9f9;
-            }}
-            tr:hover {{
-                background-color: #f1f1f1;
-            }}
-            .eye-diagram {{
-                text-align: center;
-                margin-top: 40px;
-                margin-bottom: 40px;
-            }}
-            .eye-diagram img {{
-                max-width: 1000px;
-                height: auto;
-                border: 1px solid #ccc;
-                background: white;
-                padding: 5px;
-            }}
-            .raw-table {{
-                margin-top: 40px;
-                overflow-x: auto;
-                font-size: 12px;
-            }}
-            .raw-table table, .raw-table th, .raw-table td {{
-                border: 1px solid #dddddd;
-            }}
-            .raw-table th, .raw-table td {{
-                padding: 5px;
-                text-align: center;
-                height: 5px;
-            }}
-            .raw-table th {{
-                background-color: #f0f0f0;
-                color: #333333;
-            }}
-            .highlight-worst {{
-            color: red;
-            font-weight: bold;
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h1>Margin Analysis Report</h1>
-            <table>
-                <tr>
-                    <th colspan="6" class="title-header">Worst Cases Summary</th>
-                </tr>
-                <tr><th>Lane</th><th>EH*EW</th><th>Margin Top (mV)</th><th>Margin Bottom (mV)</th><th>Margin Left (UI)</th><th>Margin Right (UI)</th></tr>
-    """
-
-    for key, case in summary.items():
-            # Determine which column to highlight based on the worst case type
-            highlight_eh_ew = key == 'Worst EH*EW'
-            highlight_mt = key == 'Worst MT'
-            highlight_mb = key == 'Worst MB'
-            highlight_ml = key == 'Worst ML'
-            highlight_mr = key == 'Worst MR'
-
-            # Construct the row with conditional highlighting
-            html += f"<tr><td>Lane {case['Lane']}</td>"
-            html += f"<td class='highlight-worst'>{case['EH_EW']:.1f}</td>" if highlight_eh_ew else f"<td>{case['EH_EW']:.1f}</td>"
-            html += f"<td class='highlight-worst'>{case['Margin Top (volt)']:.1f}</td>" if highlight_mt else f"<td>{case['Margin Top (volt)']:.1f}</td>"
-            html += f"<td class='highlight-worst'>{case['Margin Bottom (volt)']:.1f}</td>" if highlight_mb else f"<td>{case['Margin Bottom (volt)']:.1f}</td>"
-            html += f"<td class='highlight-worst'>{case['Margin Left (UI)']}</td>" if highlight_ml else f"<td>{case['Margin Left (UI)']}</td>"
-            html += f"<td class='highlight-worst'>{case['Margin Right (UI)']}</td>" if highlight_mr else f"<td>{case['Margin Right (UI)']}</td>"
-            html += "</tr>"
+WORST_COLUMNS = ['Lane', 'EH*EW', 'Margin Top (mV)', 'Margin Bottom (mV)', 'Margin Left (UI)', 'Margin Right (UI)']
+WORST_CELLS = [
+    ('Worst EH*EW', 'EH_EW', '.1f'),
+    ('Worst MT', 'Margin Top (volt)', '.1f'),
+    ('Worst MB', 'Margin Bottom (volt)', '.1f'),
+    ('Worst ML', 'Margin Left (UI)', ''),
+    ('Worst MR', 'Margin Right (UI)', ''),
+]
 
-    html += f"""
-            </table>
-            <table>
-                <tr>
-                    <th colspan="4" class="title-header">Astera Criteria</th>
-                </tr>
-                <tr><th>Margin Top (mV)</th><th>Margin Bottom (mV)</th><th>Margin Left (UI)</th><th>Margin Right (UI)</th></tr>
-                <tr><td>{volt_criteria}</td><td>{volt_criteria}</td><td>{ui_criteria}</td><td>{ui_criteria}</td></tr>
-            </table>
-
-            <div class="chart-container">
-                {charts_html}
-            </div>
-
-            <div class="raw-table">
-                <div class="title-header">Raw Data</div>
-                {data.to_html(index=False, border=1)}
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write(html)
-    print(f"HTML report saved to: {output_file}")
+def generate_html(data, eye_diagram_base64, ui_criteria, volt_criteria, assets=None):
+    summary = find_worst_cases(data)
+    return Report(
+        "lmt_margin.html",
+        title="Margin Analysis Report",
+        worst_columns=WORST_COLUMNS,
+        worst_rows=worst_rows(summary.items(), lambda case: f"Lane {case['Lane']}", WORST_CELLS),
+        criteria_title="Astera Criteria",
+        volt_criteria=volt_criteria,
+        ui_criteria=ui_criteria,
+        charts=[chart(eye_diagram_base64, assets=assets)],
+        raw=FrameRows(data),
+    )
 
-# 主流程
-all_data = []
-for file in os.listdir(input_folder):
-    if file.endswith(".csv"):
-        path = os.path.join(input_folder, file)
+def generate_eye_diagram_base64(worst_cases, ui_criteria, volt_criteria):
+    plt = pyplot()
+    fig, ax = plt.subplots(figsize=(12, 8))
+    generate_eye_diagram(ax, worst_cases, ui_criteria, volt_criteria)
+    buf = io.BytesIO()
+    plt.savefig(buf, format="png")
+    buf.seek(0)
+    eye_base64 = base64.b64encode(buf.read()).decode()
+    plt.close()
+    return eye_base64
+
+def load_margin_data(inputs):
+    all_data = []
+    for path in resolve_inputs(inputs, "*.csv"):
         try:
             df = pd.read_csv(path)
             df = standardize_columns(df)
             all_data.append(df)
         except Exception as e:
-            print(f"Error reading {file}: {e}")
+            print(f"Error reading {os.path.basename(path)}: {e}")
 
-if not all_data:
-    raise ValueError("No valid CSV files found.")
+    if not all_data:
+        raise ValueError("No valid CSV files found.")
 
-combined_df = pd.concat(all_data, ignore_index=True)
-worst = find_worst_cases(combined_df)
+    return pd.concat(all_data, ignore_index=True)
 
-fig, ax = plt.subplots(figsize=(12, 8))
-generate_eye_diagram(ax, worst, ui_criteria, volt_criteria)
-buf = io.BytesIO()
-plt.savefig(buf, format="png")
-buf.seek(0)
-eye_base64 = base64.b64encode(buf.read()).decode()
-plt.close()
+def analyze(inputs, criteria=None, assets=None):
+    """Build the combined margin report for a log folder (or list of logs).
 
-output_html_path = os.path.join(input_folder, "combined_margin_report.html")
-generate_html(combined_df, eye_base64, ui_criteria, volt_criteria, output_html_path)
+    Nothing is written unless assets (report_render.ImageAssets) is given, in
+    which case the charts are stored there rather than inlined.
+    """
+    criteria = resolve_criteria(DEFAULT_CRITERIA, criteria)
+    ui_criteria = criteria["ui_criteria"]
+    volt_criteria = criteria["volt_criteria"]
+
+    combined_df = load_margin_data(inputs)
+    worst = find_worst_cases(combined_df)
+    eye_base64 = generate_eye_diagram_base64(worst, ui_criteria, volt_criteria)
+    html = generate_html(combined_df, eye_base64, ui_criteria, volt_criteria, assets)
+    return {"html": html, "data": combined_df, "worst_cases": worst}
+
+def main(input_folder):
+    output_html_path = os.path.join(input_folder, "combined_margin_report.html")
+    result = analyze(input_folder, assets=report_assets(output_html_path))
+    write_report(output_html_path, result["html"])
+
+if __name__ == "__main__":
+    main(input_folder)
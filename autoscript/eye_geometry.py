@@ -0,0 +1,138 @@
+"""Batched eye-opening geometry shared by the 2D eye analyzers.
+
+A batch of lanes is one ``(lanes, dac, phs)`` array. A pixel is open when it
+passes the threshold (``>=`` for quality grids such as SanDisk, ``<=`` for
+BER-like grids such as Microchip). The eye is the connected open region that
+contains the reference point: the grid center, or the open pixel nearest to
+it when the center itself is closed. Open islands away from the eye no longer
+stretch the measured box.
+"""
+import numpy as np
+
+
+def _seed(mask):
+    """Reference (dac, phs) per lane: the open pixel closest to the grid center."""
+    lanes, num_dac, num_phs = mask.shape
+    dac_idx, phs_idx = np.ogrid[0:num_dac, 0:num_phs]
+    # Squared distance to the center, doubled so it stays an exact integer.
+    distance = ((2 * dac_idx - (num_dac - 1)) ** 2 + (2 * phs_idx - (num_phs - 1)) ** 2).astype(np.int32)
+    distance = np.where(mask, distance, np.iinfo(np.int32).max).reshape(lanes, -1)
+    flat = distance.argmin(axis=1)
+    return flat // num_phs, flat % num_phs
+
+
+def _components(u, v, nodes):
+    """Root (smallest member) of every node's component for the undirected edges u-v.
+
+    Roots are hooked onto the smaller root across every edge that still joins
+    two components, then paths are compressed by pointer jumping. The number
+    of rounds grows with the log of the component size, not with its path
+    length, and edges already inside one component are dropped each round.
+    """
+    parent = np.arange(nodes, dtype=np.int32)
+    while True:
+        root_u, root_v = parent[u], parent[v]
+        split = root_u != root_v
+        if not split.any():
+            return parent
+        u, v, root_u, root_v = u[split], v[split], root_u[split], root_v[split]
+        np.minimum.at(parent, np.maximum(root_u, root_v), np.minimum(root_u, root_v))
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+
+
+def connected_eye(mask):
+    """Boolean (lanes, dac, phs) mask of the open region connected to each lane's reference point.
+
+    Runs of open pixels along the phase axis are numbered across the whole
+    batch, runs that touch between neighbouring DAC rows are joined with
+    _components, and the eye is every run in the reference point's component.
+    Runs never cross a lane, so all lanes are labeled in one pass.
+    """
+    mask = np.asarray(mask, dtype=bool)
+    lanes = mask.shape[0]
+    found = mask.reshape(lanes, -1).any(axis=1)
+    seed_dac, seed_phs = _seed(mask)
+    starts = mask.copy()
+    starts[:, :, 1:] &= ~mask[:, :, :-1]
+    # Run number of every open pixel; closed pixels carry a neighbour's number and are masked out below.
+    runs = np.cumsum(starts, dtype=np.int32).reshape(mask.shape) - 1
+    nodes = int(runs.reshape(-1)[-1]) + 1 if mask.size else 0
+    touching = mask[:, :-1] & mask[:, 1:]
+    parent = _components(runs[:, :-1][touching], runs[:, 1:][touching], nodes)
+    seed_runs = runs[np.arange(lanes)[found], seed_dac[found], seed_phs[found]]
+    in_eye = np.zeros(nodes + 1, dtype=bool)  # the extra slot absorbs the -1 of leading closed pixels
+    in_eye[:nodes] = np.isin(parent, parent[seed_runs])
+    return in_eye[runs] & mask, found, seed_dac, seed_phs
+
+
+def eye_openings(grids, threshold, open_above=True, dac_step=1.0, phs_step=1.0):
+    """Measure the connected eye of every lane in a (lanes, dac, phs) batch.
+
+    threshold, dac_step and phs_step are scalars or one value per lane. Returns a dict of
+    per-lane arrays: found, eye (the opening mask), dac_min/dac_max/phs_min/phs_max
+    (-1 when nothing is open), seed_dac/seed_phs (reference point),
+    center_dac/center_phs (centroid of the opening, in index units),
+    up/down/left/right (margins from the reference point), height, width and
+    area (open pixels times step area).
+    """
+    grids = np.asarray(grids, dtype=float)
+    threshold = np.asarray(threshold, dtype=float).reshape((-1, 1, 1) if np.ndim(threshold) else ())
+    mask = grids >= threshold if open_above else grids <= threshold
+    eye, found, seed_dac, seed_phs = connected_eye(mask)
+    lanes, num_dac, num_phs = grids.shape
+    dac_step = np.broadcast_to(np.asarray(dac_step, dtype=float), (lanes,))
+    phs_step = np.broadcast_to(np.asarray(phs_step, dtype=float), (lanes,))
+
+    dac_any = eye.any(axis=2)
+    phs_any = eye.any(axis=1)
+    dac_min = np.where(found, dac_any.argmax(axis=1), -1)
+    dac_max = np.where(found, num_dac - 1 - dac_any[:, ::-1].argmax(axis=1), -1)
+    phs_min = np.where(found, phs_any.argmax(axis=1), -1)
+    phs_max = np.where(found, num_phs - 1 - phs_any[:, ::-1].argmax(axis=1), -1)
+
+    pixels = eye.sum(axis=(1, 2))
+    safe = np.maximum(pixels, 1)
+    center_dac = (eye.sum(axis=2) * np.arange(num_dac)).sum(axis=1) / safe
+    center_phs = (eye.sum(axis=1) * np.arange(num_phs)).sum(axis=1) / safe
+
+    up = np.where(found, (dac_max - seed_dac) * dac_step, 0.0)
+    down = np.where(found, -(seed_dac - dac_min) * dac_step, 0.0)
+    right = np.where(found, (phs_max - seed_phs) * phs_step, 0.0)
+    left = np.where(found, -(seed_phs - phs_min) * phs_step, 0.0)
+    return {
+        'found': found,
+        'eye': eye,
+        'dac_min': dac_min, 'dac_max': dac_max,
+        'phs_min': phs_min, 'phs_max': phs_max,
+        'seed_dac': np.where(found, seed_dac, -1), 'seed_phs': np.where(found, seed_phs, -1),
+        'center_dac': np.where(found, center_dac, np.nan), 'center_phs': np.where(found, center_phs, np.nan),
+        'up': up, 'down': down, 'left': left, 'right': right,
+        'height': up - down,
+        'width': right - left,
+        'area': pixels * dac_step * phs_step,
+    }
+
+
+def measure_eyes(grids, threshold, open_above=True, dac_steps=1.0, phs_steps=1.0):
+    """eye_openings for a list of 2D grids that may differ in shape.
+
+    Grids of the same shape are measured in one batch. Returns one dict of
+    scalars per grid, in input order (the opening mask is left out).
+    """
+    count = len(grids)
+    dac_steps = np.broadcast_to(np.asarray(dac_steps, dtype=float), (count,))
+    phs_steps = np.broadcast_to(np.asarray(phs_steps, dtype=float), (count,))
+    by_shape = {}
+    for index, grid in enumerate(grids):
+        by_shape.setdefault(np.shape(grid), []).append(index)
+    results = [None] * count
+    for indices in by_shape.values():
+        batch = eye_openings(np.stack([grids[i] for i in indices]), threshold, open_above,
+                             dac_steps[indices], phs_steps[indices])
+        for row, index in enumerate(indices):
+            results[index] = {key: value[row].item() for key, value in batch.items() if key != 'eye'}
+    return results
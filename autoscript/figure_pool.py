@@ -0,0 +1,67 @@
+"""Reusable matplotlib figures for charts drawn once per lane or device.
+
+Building a figure with its axes, colorbar and artists costs about as much as
+drawing it, and the per-lane eye diagrams and per-device panels only differ
+in their data, limits and titles. A chart type subclasses ``PooledChart``:
+``build()`` creates the figure and artists once per process and ``update()``
+swaps the data in (``set_data``, ``set_offsets``, ``set_extent``,
+``set_title``) before each save. ``render_png(ChartType, ...)`` draws through
+the process-wide pool, so every worker process keeps its own templates.
+
+Templates are plain ``Figure`` objects rendered with Agg; they are never
+registered with pyplot and need no GUI backend. matplotlib is imported when
+the first template is built.
+"""
+import io
+
+_templates = {}
+
+
+class PooledChart:
+    """A template figure for one chart type.
+
+    Subclasses set figsize and savefig_kwargs, create their artists in
+    build() and update them from the chart data in update().
+    """
+    figsize = None
+    savefig_kwargs = {}
+
+    def __init__(self):
+        from matplotlib.figure import Figure
+        self.figure = Figure(figsize=self.figsize)
+        self.build()
+
+    def build(self):
+        raise NotImplementedError
+
+    def update(self, *args, **kwargs):
+        raise NotImplementedError
+
+    def layout(self):
+        """Recompute the layout after update(); for charts whose tick labels move it."""
+
+    def render(self, *args, **kwargs):
+        """Update the template with this chart's data and return it as PNG bytes."""
+        self.update(*args, **kwargs)
+        self.layout()
+        buf = io.BytesIO()
+        self.figure.savefig(buf, format='png', **self.savefig_kwargs)
+        return buf.getvalue()
+
+
+def template(chart_type):
+    """The process's template for chart_type, built on first use."""
+    chart = _templates.get(chart_type)
+    if chart is None:
+        chart = _templates[chart_type] = chart_type()
+    return chart
+
+
+def render_png(chart_type, *args, **kwargs):
+    """Render one chart of chart_type through its pooled template."""
+    return template(chart_type).render(*args, **kwargs)
+
+
+def clear():
+    """Drop every template, e.g. after changing rcParams."""
+    _templates.clear()
@@ -1,52 +1,210 @@
 import os
 import re
-import base64
+import time
 import numpy as np
-import pandas as pd
-from io import BytesIO
 from datetime import datetime
-import matplotlib.pyplot as plt
+
+from analyzer_api import resolve_inputs, resolve_criteria, write_report, report_assets, pyplot
+from report_render import figure_png, image_src
+
+# ==============
+G3_CRITERIA_PASS = "Last >= 3860"
+G4_CRITERIA_PASS = "Last >= 3454"
+G5_CRITERIA_PASS = "Last >= 1400"
+G6_CRITERIA_PASS = "FBER < 1e-9"
+G3_CRITERIA_PENDING = "2509 < Last < 3859"
+G4_CRITERIA_PENDING = "2387 < Last < 3453"
+G5_CRITERIA_PENDING = "1001 < Last < 1399"
+G6_CRITERIA_PENDING = "N/A"
+G3_CRITERIA_FAIL = "Last <= 2508"
+G4_CRITERIA_FAIL = "Last <= 2386"
+G5_CRITERIA_FAIL = "Last <= 1000"
+G6_CRITERIA_FAIL = "FBER > 1e-9"
+
+# ==============
+
+DEFAULT_CRITERIA = {
+    "G3_CRITERIA_PASS": G3_CRITERIA_PASS,
+    "G4_CRITERIA_PASS": G4_CRITERIA_PASS,
+    "G5_CRITERIA_PASS": G5_CRITERIA_PASS,
+    "G6_CRITERIA_PASS": G6_CRITERIA_PASS,
+    "G3_CRITERIA_PENDING": G3_CRITERIA_PENDING,
+    "G4_CRITERIA_PENDING": G4_CRITERIA_PENDING,
+    "G5_CRITERIA_PENDING": G5_CRITERIA_PENDING,
+    "G6_CRITERIA_PENDING": G6_CRITERIA_PENDING,
+    "G3_CRITERIA_FAIL": G3_CRITERIA_FAIL,
+    "G4_CRITERIA_FAIL": G4_CRITERIA_FAIL,
+    "G5_CRITERIA_FAIL": G5_CRITERIA_FAIL,
+    "G6_CRITERIA_FAIL": G6_CRITERIA_FAIL,
+}
+
+LANES = 16
+_LOOP_TIME = re.compile(r'\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}')
+_BER = re.compile(r'(\d+\.?\d*)E-(\d+)')
+_INFO_FIELDS = ("Depth", "pcie_index", "node", "Link Speed Active", "Link Width Active")
+
+
+def _fom_values(line):
+    # 不足 16 個 lane 的部分補 nan
+    values = [float(x) for x in re.findall(r'\d+', line)[:LANES]]
+    return values + [float('nan')] * (LANES - len(values))
+
+
+class LoopLogParser:
+    """
+    持續追蹤 mlxlink loop log 的 parser。
+
+    記住已讀到的 byte offset，每次 update() 只解析新增的完整行，
+    把每個 Loop 的 FOM / errors / BER / 時間戳寫進預先配置的 NumPy 陣列
+    (容量不足時加倍)。檔案變小時視為重新開始，從頭解析。
+    """
+
+    METRICS = ("RX Errors", "TX Errors", "Effective ber")
+
+    def __init__(self, file_path, capacity=1024):
+        self.file_path = file_path
+        self._capacity = capacity
+        self.reset()
+
+    def reset(self):
+        self.offset = 0
+        self.loops = 0
+        self.info = {}
+        self.initial_fom = np.full((self._capacity, LANES), np.nan)
+        self.last_fom = np.full((self._capacity, LANES), np.nan)
+        self.metrics = {name: np.full(self._capacity, np.nan) for name in self.METRICS}
+        self.timestamps = np.full(self._capacity, np.nan)  # epoch seconds
+
+    def _grow(self):
+        def grow(arr):
+            bigger = np.full((len(arr) * 2,) + arr.shape[1:], np.nan)
+            bigger[:len(arr)] = arr
+            return bigger
+        self.initial_fom = grow(self.initial_fom)
+        self.last_fom = grow(self.last_fom)
+        self.metrics = {name: grow(arr) for name, arr in self.metrics.items()}
+        self.timestamps = grow(self.timestamps)
+
+    def _start_loop(self, timestamp=np.nan):
+        if self.loops == len(self.timestamps):
+            self._grow()
+        self.timestamps[self.loops] = timestamp
+        self.loops += 1
+
+    def _row(self):
+        # Loop 標題之前出現的數值歸到第一個 Loop
+        if self.loops == 0:
+            self._start_loop()
+        return self.loops - 1
+
+    def _parse_line(self, line):
+        if line.startswith("==== Loop"):
+            match = _LOOP_TIME.search(line)
+            timestamp = datetime.strptime(match.group(), '%Y-%m-%d_%H-%M-%S').timestamp() if match else np.nan
+            self._start_loop(timestamp)
+        elif line.startswith("Depth, pcie index, node"):
+            parts = line.split(":")[1].strip().split(", ")
+            self.info["Depth"], self.info["pcie_index"], self.info["node"] = parts[:3]
+        elif line.startswith("Link Speed Active"):
+            self.info["Link Speed Active"] = line.split(":")[1].strip()
+        elif line.startswith("Link Width Active"):
+            self.info["Link Width Active"] = line.split(":")[1].strip()
+        elif line.startswith("Initial FOM"):
+            self.initial_fom[self._row()] = _fom_values(line)
+        elif line.startswith("Last FOM"):
+            self.last_fom[self._row()] = _fom_values(line)
+        elif line.startswith("RX Errors") or line.startswith("TX Errors"):
+            name = "RX Errors" if line.startswith("RX") else "TX Errors"
+            match = re.search(r'\d+', line)
+            if match:
+                self.metrics[name][self._row()] = float(match.group())
+        elif line.startswith("Effective ber"):
+            match = _BER.search(line)
+            if match:
+                self.metrics["Effective ber"][self._row()] = float(match.group().replace('E-', 'e-'))
+
+    def update(self):
+        """解析上次 offset 之後新增的完整行，回傳解析的行數 (0 表示沒有新資料)。
+
+        同一個 Loop 的數值可能分好幾次寫進檔案，所以只要有新行就算有更新，不只看新的 Loop 標題。
+        """
+        size = os.path.getsize(self.file_path)
+        if size < self.offset:
+            self.reset()
+        if size == self.offset:
+            return 0
+        with open(self.file_path, 'rb') as f:
+            f.seek(self.offset)
+            chunk = f.read(size - self.offset)
+        end = chunk.rfind(b'\n') + 1  # 最後一行還沒寫完就留到下次
+        lines = chunk[:end].decode('utf-8', errors='replace').splitlines()
+        for line in lines:
+            self._parse_line(line.strip())
+        self.offset += end
+        return len(lines)
+
+    def minutes(self):
+        """每個 Loop 相對第一個 Loop 的分鐘數。"""
+        timestamps = self.timestamps[:self.loops]
+        return (timestamps - timestamps[0]) / 60 if self.loops else timestamps
+
+    def series(self):
+        """Time-Domain 圖表用的各指標序列 (FOM Mean 為 Initial FOM 16 lane 平均)。"""
+        series = {name: arr[:self.loops] for name, arr in self.metrics.items()}
+        with np.errstate(invalid='ignore'):
+            series["FOM Mean"] = np.nanmean(self.initial_fom[:self.loops], axis=1) if self.loops else np.array([])
+        return series
+
+    def to_dict(self):
+        """parse_log_file 的舊格式：每個指標一個 list。"""
+        data = {
+            "Initial FOM": self.initial_fom[:self.loops].tolist(),
+            "Last FOM": self.last_fom[:self.loops].tolist(),
+        }
+        data.update({name: arr[:self.loops].tolist() for name, arr in self.metrics.items()})
+        data.update(self.info)
+        return data
+
 
 def parse_log_file(file_path):
-    data = {"Initial FOM": [], "Last FOM": [], "RX Errors": [], "TX Errors": [], "Effective ber": []}
-    current_loop = None
-
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if line.startswith("==== Loop"):
-                current_loop = line.split("|")[1].strip()
-                continue
-            elif line.startswith("Depth, pcie index, node"):
-                parts = line.split(":")[1].strip().split(", ")
-                data["Depth"] = parts[0]
-                data["pcie_index"] = parts[1]
-                data["node"] = parts[2]
-            elif line.startswith("Link Speed Active"):
-                data["Link Speed Active"] = line.split(":")[1].strip()
-            elif line.startswith("Link Width Active"):
-                data["Link Width Active"] = line.split(":")[1].strip()
-            elif line.startswith("Initial FOM"):
-                fom_values = re.findall(r'\d+', line)
-                # Ensure 16 values, pad with nan if less
-                fom_values = fom_values[:16] + [None] * (16 - len(fom_values)) if len(fom_values) < 16 else fom_values[:16]
-                data["Initial FOM"].append([float(x) if x is not None else float('nan') for x in fom_values])
-            elif line.startswith("Last FOM"):
-                fom_values = re.findall(r'\d+', line)
-                # Ensure 16 values, pad with nan if less
-                fom_values = fom_values[:16] + [None] * (16 - len(fom_values)) if len(fom_values) < 16 else fom_values[:16]
-                data["Last FOM"].append([float(x) if x is not None else float('nan') for x in fom_values])
-            elif line.startswith("RX Errors"):
-                data["RX Errors"].append(float(re.search(r'\d+', line).group()))
-            elif line.startswith("TX Errors"):
-                data["TX Errors"].append(float(re.search(r'\d+', line).group()))
-            elif line.startswith("Effective ber"):
-                ber_value = float(re.search(r'(\d+\.?\d*)E-(\d+)', line).group().replace('E-', 'e-'))
-                data["Effective ber"].append(ber_value)
-
-    return data
+    parser = LoopLogParser(file_path)
+    parser.update()
+    return parser.to_dict()
 
-def plot_pcie_log_box_and_time(file_path):
+
+class TimeDomainChart:
+    """
+    Time-Domain Metrics 圖表只建一次；之後每次 render() 只更新線條資料與座標範圍再輸出 PNG。
+    """
+
+    METRICS = ("RX Errors", "TX Errors", "Effective ber", "FOM Mean")
+
+    def __init__(self):
+        self.fig, self.axes = pyplot().subplots(nrows=len(self.METRICS), ncols=1, figsize=(16, 15), sharex=True)
+        self.lines = {}
+        for ax, metric in zip(self.axes, self.METRICS):
+            self.lines[metric], = ax.plot([], [], label=metric, linewidth=0.8)
+            ax.set_ylabel(metric)
+            ax.grid(True)
+            ax.legend(loc="upper right")
+        self.axes[-1].set_xlabel("Time (minutes)")
+
+    def render(self, parser):
+        """PNG bytes of the parser's current loops."""
+        minutes = parser.minutes()
+        series = parser.series()
+        for ax, metric in zip(self.axes, self.METRICS):
+            self.lines[metric].set_data(minutes, series[metric])
+            ax.relim()
+            ax.autoscale_view()
+        self.fig.tight_layout(rect=[0, 0, 1, 0.97])
+        return figure_png(self.fig, bbox_inches='tight')
+
+    def close(self):
+        pyplot().close(self.fig)
+
+
+def analyze(inputs, criteria=None, assets=None):
     """
     讀取格式為 txt 檔案，包含多個 Loop 的 PCIe 資料。
 
@@ -57,20 +215,34 @@ def plot_pcie_log_box_and_time(file_path):
       4. Time-Domain Metrics 圖表（繪製 RX Errors, TX Errors, Effective ber, FOM Mean）
       - X 軸改為 Minutes (相對第一筆時間的分鐘數)
     報告風格參考 Margin Analysis Report x16.html。
+    assets (report_render.ImageAssets) 有給時，圖表存成圖檔而非內嵌 base64。
     """
 
+    criteria = resolve_criteria(DEFAULT_CRITERIA, criteria)
+    log_files = resolve_inputs(inputs, "*.txt")
+    if not log_files:
+        raise ValueError("No mlxlink log found in the inputs.")
+    file_path = log_files[0]
+
     # ---------- 1) 解析 txt 檔案 ----------
-    data = parse_log_file(file_path)
+    parser = LoopLogParser(file_path)
+    parser.update()
+    chart = TimeDomainChart()
+    try:
+        html_content = render_report(parser, criteria, chart, assets)
+    finally:
+        chart.close()
+    return {"html": html_content, "data": parser.to_dict(), "log_file": file_path}
 
-    # 計算最差值
-    worst_initial_fom = [min(x) for x in zip(*data["Initial FOM"])]
-    worst_last_fom = [min(x) for x in zip(*data["Last FOM"])]
-    worst_rx_errors = max(data["RX Errors"])
-    worst_tx_errors = max(data["TX Errors"])
-    worst_effective_ber = max(data["Effective ber"])
 
-    # 補充 CPU_Utilization
-    html_worst = {"CPU_Utilization": 50.2}
+def render_report(parser, criteria, chart, assets=None):
+    """依 parser 目前解析到的 Loop 產生 HTML；chart 為可重複使用的 TimeDomainChart。"""
+    data = {field: parser.info.get(field, "N/A") for field in _INFO_FIELDS}
+
+    # 計算最差值
+    with np.errstate(invalid='ignore'):
+        worst_initial_fom = np.nanmin(parser.initial_fom[:parser.loops], axis=0) if parser.loops else np.full(LANES, np.nan)
+        worst_last_fom = np.nanmin(parser.last_fom[:parser.loops], axis=0) if parser.loops else np.full(LANES, np.nan)
 
     # ---------- 2) 建立三個獨立表格的 HTML ----------
     data_info_html = """
@@ -170,13 +342,19 @@ def plot_pcie_log_box_and_time(file_path):
                 <td colspan="4">{}</td>
             </tr>
         </table>
-    """.format(G3_CRITERIA_PASS, G4_CRITERIA_PASS, G5_CRITERIA_PASS, G6_CRITERIA_PASS,
-               G3_CRITERIA_PENDING, G4_CRITERIA_PENDING, G5_CRITERIA_PENDING, G6_CRITERIA_PENDING,
-               G3_CRITERIA_FAIL, G4_CRITERIA_FAIL, G5_CRITERIA_FAIL, G6_CRITERIA_FAIL)
+    """.format(criteria["G3_CRITERIA_PASS"], criteria["G4_CRITERIA_PASS"],
+               criteria["G5_CRITERIA_PASS"], criteria["G6_CRITERIA_PASS"],
+               criteria["G3_CRITERIA_PENDING"], criteria["G4_CRITERIA_PENDING"],
+               criteria["G5_CRITERIA_PENDING"], criteria["G6_CRITERIA_PENDING"],
+               criteria["G3_CRITERIA_FAIL"], criteria["G4_CRITERIA_FAIL"],
+               criteria["G5_CRITERIA_FAIL"], criteria["G6_CRITERIA_FAIL"])
 
     # ---------- 3) 產生 Box Plot (分為 Initial FOM 與 Last FOM) ----------
+    # pandas / pyplot 只有畫 box plot 才用到，第一次呼叫時才載入
+    import pandas as pd
+    plt = pyplot()
     # Convert to DataFrame for Initial FOM
-    df_initial = pd.DataFrame(data["Initial FOM"], columns=[f"Lane{i}" for i in range(16)])
+    df_initial = pd.DataFrame(parser.initial_fom[:parser.loops], columns=[f"Lane{i}" for i in range(16)])
     fom_cols_initial = [f"Lane{i}" for i in range(16)]
     data_for_box_initial = [df_initial[col].dropna() for col in fom_cols_initial]
     fig_initial, ax_initial = plt.subplots(figsize=(16, 8))
@@ -189,14 +367,11 @@ def plot_pcie_log_box_and_time(file_path):
     ax_initial.set_xticks(range(1, len(fom_cols_initial) + 1))
     ax_initial.set_xticklabels([f"Lane{i}" for i in range(len(fom_cols_initial))], rotation=45)
     ax_initial.grid(True)
-    buf_initial = BytesIO()
-    fig_initial.savefig(buf_initial, format='png', bbox_inches='tight')
-    buf_initial.seek(0)
-    boxplot_initial_base64 = base64.b64encode(buf_initial.read()).decode()
+    boxplot_initial_src = image_src(figure_png(fig_initial, bbox_inches='tight'), assets)
     plt.close(fig_initial)
 
     # Convert to DataFrame for Last FOM
-    df_last = pd.DataFrame(data["Last FOM"], columns=[f"Lane{i}" for i in range(16)])
+    df_last = pd.DataFrame(parser.last_fom[:parser.loops], columns=[f"Lane{i}" for i in range(16)])
     fom_cols_last = [f"Lane{i}" for i in range(16)]
     data_for_box_last = [df_last[col].dropna() for col in fom_cols_last]
     fig_last, ax_last = plt.subplots(figsize=(16, 8))
@@ -209,46 +384,12 @@ def plot_pcie_log_box_and_time(file_path):
     ax_last.set_xticks(range(1, len(fom_cols_last) + 1))
     ax_last.set_xticklabels([f"Lane{i}" for i in range(len(fom_cols_last))], rotation=45)
     ax_last.grid(True)
-    buf_last = BytesIO()
-    fig_last.savefig(buf_last, format='png', bbox_inches='tight')
-    buf_last.seek(0)
-    boxplot_last_base64 = base64.b64encode(buf_last.read()).decode()
+    boxplot_last_src = image_src(figure_png(fig_last, bbox_inches='tight'), assets)
     plt.close(fig_last)
 
     # ---------- 4) 產生 Time-Domain Metrics 圖表 ----------
-    # 計算 Minutes (從每個 Loop 的時間戳)
-    timestamps = [pd.to_datetime(re.search(r'\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}', line).group(), format='%Y-%m-%d_%H-%M-%S') 
-                  for line in open(file_path, 'r', encoding='utf-8') 
-                  if line.startswith("==== Loop")]
-    minutes = [(t - timestamps[0]).total_seconds() / 60 for t in timestamps]
-
-    # 計算 FOM 平均值 (使用每個 Loop 的最小值)
-    fom_mean = [sum(min(col) for col in zip(*data["Initial FOM"][i:i+1])) / 16 for i in range(len(data["Initial FOM"]))]
-
-    # 選擇要畫的指標
-    time_metrics = ["RX Errors", "TX Errors", "Effective ber", "FOM Mean"]
-    fig_time, axes = plt.subplots(nrows=len(time_metrics), ncols=1, figsize=(16, 15), sharex=True)
-
-    # 逐一繪製各指標
-    for i, metric in enumerate(time_metrics):
-        if metric == "FOM Mean":
-            values = fom_mean
-        else:
-            values = [data[metric][j] for j in range(len(data[metric]))]
-        axes[i].plot(minutes, values, label=metric, linewidth=0.8)
-        axes[i].set_ylabel(metric)
-        axes[i].grid(True)
-        axes[i].legend(loc="upper right")
-
-    axes[-1].set_xlabel("Time (minutes)")
-
-    # 調整布局
-    fig_time.tight_layout(rect=[0, 0, 1, 0.97])
-    buf_time = BytesIO()
-    fig_time.savefig(buf_time, format='png', bbox_inches='tight')
-    buf_time.seek(0)
-    timedomain_base64 = base64.b64encode(buf_time.read()).decode()
-    plt.close(fig_time)
+    # X 軸為相對第一個 Loop 的分鐘數，時間戳在解析時已一併取得
+    timedomain_src = image_src(chart.render(parser), assets)
 
     # ---------- 5) 組裝 HTML 報告 ----------
     html_style = """
@@ -333,15 +474,15 @@ def plot_pcie_log_box_and_time(file_path):
             <div class="chart-container">
                 <div class="chart">
                     <h2>Box Plot of Initial FOM</h2>
-                    <img src="data:image/png;base64,{boxplot_initial_base64}" alt="Box Plot of Initial FOM"/>
+                    <img src="{boxplot_initial_src}" alt="Box Plot of Initial FOM" loading="lazy" decoding="async"/>
                 </div>
                 <div class="chart">
                     <h2>Box Plot of Last FOM</h2>
-                    <img src="data:image/png;base64,{boxplot_last_base64}" alt="Box Plot of Last FOM"/>
+                    <img src="{boxplot_last_src}" alt="Box Plot of Last FOM" loading="lazy" decoding="async"/>
                 </div>
                 <div class="chart">
                     <h2>Time-Domain Metrics</h2>
-                    <img src="data:image/png;base64,{timedomain_base64}" alt="Time-Domain Metrics"/>
+                    <img src="{timedomain_src}" alt="Time-Domain Metrics" loading="lazy" decoding="async"/>
                 </div>
             </div>
         </div>
@@ -349,32 +490,43 @@ def plot_pcie_log_box_and_time(file_path):
     </html>
     """
 
-    html_content = html_style + html_body
+    return html_style + html_body
+
+
+def follow_log(file_path, criteria=None, interval=30.0, output_file=None, max_polls=None):
+    """
+    Live report for a running mlxlink loop：每 interval 秒只解析新增的行，
+    有新資料 (包含目前 Loop 後續寫入的數值) 時更新圖表並覆寫 HTML。max_polls 為 None 時持續追蹤。
+    """
+    criteria = resolve_criteria(DEFAULT_CRITERIA, criteria)
+    if output_file is None:
+        output_file = os.path.splitext(file_path)[0] + "_live.html"
+    parser = LoopLogParser(file_path)
+    chart = TimeDomainChart()
+    polls = 0
+    try:
+        while max_polls is None or polls < max_polls:
+            if parser.update():
+                write_report(output_file, render_report(parser, criteria, chart))
+            polls += 1
+            if max_polls is None or polls < max_polls:
+                time.sleep(interval)
+    finally:
+        chart.close()
+    return output_file
+
 
+def plot_pcie_log_box_and_time(file_path):
     # 輸出 HTML 檔案
     current_date = datetime.now().strftime('%Y_%m_%d')
     output_file = os.path.join(
         os.path.dirname(file_path),
         os.path.basename(file_path).rsplit(".", 1)[0] + f"_{current_date}.html"
     )
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write(html_content)
-    print(f"HTML report saved to {output_file}")
+    result = analyze(file_path, assets=report_assets(output_file))
+    write_report(output_file, result["html"])
 
-# ==============
-G3_CRITERIA_PASS = "Last >= 3860"
-G4_CRITERIA_PASS = "Last >= 3454"
-G5_CRITERIA_PASS = "Last >= 1400"
-G6_CRITERIA_PASS = "FBER < 1e-9"
-G3_CRITERIA_PENDING = "2509 < Last < 3859"
-G4_CRITERIA_PENDING = "2387 < Last < 3453"
-G5_CRITERIA_PENDING = "1001 < Last < 1399"
-G6_CRITERIA_PENDING = "N/A"
-G3_CRITERIA_FAIL = "Last <= 2508"
-G4_CRITERIA_FAIL = "Last <= 2386"
-G5_CRITERIA_FAIL = "Last <= 1000"
-G6_CRITERIA_FAIL = "FBER > 1e-9"
 
-input = r"C:\Users\dchen52\OneDrive - Lenovo\Documents\NVIDIA\mlxlink_logs\mlxlink_full_log.txt"
-plot_pcie_log_box_and_time(input)
-# ==============
\ No newline at end of file
+if __name__ == "__main__":
+    input = r"C:\Users\dchen52\OneDrive - Lenovo\Documents\NVIDIA\mlxlink_logs\mlxlink_full_log.txt"
+    plot_pcie_log_box_and_time(input)
@@ -0,0 +1,273 @@
+"""Template-based HTML reports shared by the analyzers.
+
+Reports are Jinja templates in report_templates/ that extend layout.html, so
+every analyzer gets the same page shell and base styles. Templates are
+compiled once per process and cached by the environment.
+
+Rendering is lazy: ``Report`` is an iterable of ~64 KiB HTML chunks produced
+while the template runs, and table rows are pulled from generators as they
+are written (``FrameRows`` formats a DataFrame block by block). Writing a
+report to a file or an HTTP response therefore never holds the whole document
+or a formatted copy of a large raw-data table in memory.
+
+Images are inlined as base64 data URIs by default. Given an ``ImageAssets``,
+they are written once as content-addressed files next to the report and
+referenced by URL instead. In the ``"canvas"`` chart mode analyzers skip
+matplotlib and embed the plotted data as compact JSON (``heatmap``,
+``scatter``), which _canvas_charts.html draws in the browser.
+"""
+import io
+import os
+import json
+import html
+import base64
+import hashlib
+import threading
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'report_templates')
+CHUNK_SIZE = 64 * 1024
+
+_environment = None
+
+
+def environment():
+    """The shared template environment, created on first use."""
+    global _environment
+    if _environment is None:
+        from jinja2 import Environment, FileSystemLoader, StrictUndefined, select_autoescape
+        _environment = Environment(
+            loader=FileSystemLoader(TEMPLATE_DIR),
+            autoescape=select_autoescape(['html']),
+            undefined=StrictUndefined,
+            auto_reload=False,
+            trim_blocks=True,
+            lstrip_blocks=True,
+        )
+    return _environment
+
+
+def _buffered(pieces, size):
+    """Join the template's small output pieces into chunks of about size characters."""
+    buffer, length = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        length += len(piece)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream(name, context, chunk_size=CHUNK_SIZE):
+    """Render template name with context, yielding HTML chunks as they are produced."""
+    return _buffered(environment().get_template(name).generate(context), chunk_size)
+
+
+def render(name, context):
+    """Render template name with context into one string."""
+    return ''.join(stream(name, context))
+
+
+class Report:
+    """A report that renders when iterated.
+
+    Iterating yields HTML chunks and can be repeated as long as the row
+    sources in the context are re-iterable (lists, ``FrameRows``); ``str()``
+    renders the whole document.
+    """
+
+    def __init__(self, template, **context):
+        self.template = template
+        self.context = context
+
+    def __iter__(self):
+        return stream(self.template, self.context)
+
+    def __str__(self):
+        return render(self.template, self.context)
+
+
+IMAGE_FORMATS = {'png': 'image/png', 'webp': 'image/webp'}
+
+
+class ImageAssets:
+    """Content-addressed image files referenced by reports instead of inline base64.
+
+    add() stores an encoded image in directory as <sha256 of the input>.<ext>
+    and returns url_prefix/<name>. An image that is already there, from this
+    report or any other sharing the directory, is not written again. Inputs in
+    another format (BMP captures, PNG when image_format is 'webp') are
+    re-encoded losslessly with Pillow on first sight.
+    """
+
+    def __init__(self, directory, url_prefix='assets', image_format='png'):
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"image_format must be one of {sorted(IMAGE_FORMATS)}, got {image_format!r}")
+        self.directory = directory
+        self.url_prefix = url_prefix.rstrip('/')
+        self.image_format = image_format
+        os.makedirs(directory, exist_ok=True)
+
+    def _encode(self, image, mime):
+        if mime == IMAGE_FORMATS[self.image_format]:
+            return image
+        try:
+            from PIL import Image
+        except ImportError:
+            print(f"Warning: Pillow is not installed, keeping {mime} image as is")
+            return image
+        out = io.BytesIO()
+        with Image.open(io.BytesIO(image)) as img:
+            img.save(out, format=self.image_format.upper(), lossless=True)
+        return out.getvalue()
+
+    def add(self, image, mime='image/png'):
+        """Store image bytes (or a base64 string) and return the URL to reference them by."""
+        if isinstance(image, str):
+            image = base64.b64decode(image)
+        name = f'{hashlib.sha256(image).hexdigest()}.{self.image_format}'
+        path = os.path.join(self.directory, name)
+        if not os.path.exists(path):
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(self._encode(image, mime))
+            os.replace(tmp_path, path)
+        return f'{self.url_prefix}/{name}'
+
+
+def image_src(image, assets=None, mime='image/png'):
+    """The src for encoded image bytes or a base64 string: a data URI, or an asset URL with assets."""
+    if assets is not None:
+        return assets.add(image, mime)
+    if isinstance(image, bytes):
+        image = base64.b64encode(image).decode('ascii')
+    return f'data:{mime};base64,{image}'
+
+
+def figure_png(fig, **savefig_kwargs):
+    """PNG bytes of a matplotlib figure."""
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', **savefig_kwargs)
+    return buf.getvalue()
+
+
+def chart(image, alt='', mime='image/png', assets=None):
+    """An image entry for the templates from encoded image bytes or a base64 string."""
+    return {'src': image_src(image, assets, mime), 'alt': alt}
+
+
+CHART_MODES = ('image', 'canvas')
+# numpy dtypes with a JavaScript typed array counterpart.
+TYPED_ARRAYS = {'int8', 'uint8', 'int16', 'uint16', 'int32', 'uint32', 'float32', 'float64'}
+
+_canvas_script = None
+
+
+def typed_array(values, dtype=None):
+    """Compact JSON form of a numeric array: dtype, shape and the base64 of its little-endian bytes."""
+    import numpy as np
+    array = np.asarray(values, dtype=dtype)
+    if array.dtype.name not in TYPED_ARRAYS:
+        raise ValueError(f"{array.dtype} has no typed array counterpart, use one of {sorted(TYPED_ARRAYS)}")
+    data = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder('<'))
+    return {'dtype': array.dtype.name, 'shape': list(array.shape), 'data': base64.b64encode(data.tobytes()).decode('ascii')}
+
+
+def heatmap(values, extent, origin='upper', scale='linear', vmin=None, vmax=None, ticks=None, dtype=None, **options):
+    """Canvas spec for a 2D grid drawn like imshow with viridis.
+
+    extent is (xmin, xmax, ymin, ymax); origin puts row 0 at ymax ('upper')
+    or ymin ('lower'). scale is 'linear' or 'log' (values <= 0 stay blank).
+    vmin/vmax default to the data range. options: title, xlabel, ylabel,
+    colorbar (its label), grid and aspect (height / width).
+    """
+    return dict(options, kind='heatmap', values=typed_array(values, dtype), extent=[float(v) for v in extent],
+                origin=origin, scale=scale, vmin=vmin, vmax=vmax, ticks=ticks)
+
+
+def scatter(series, xticks=None, dtype=None, **options):
+    """Canvas spec for a scatter plot.
+
+    series is a list of (label, x, y); xticks an optional list of
+    (value, label) for categorical axes. options: title, xlabel, ylabel,
+    legend (its title), grid and aspect.
+    """
+    return dict(options, kind='scatter',
+                series=[{'label': label, 'x': typed_array(x, dtype), 'y': typed_array(y, dtype)} for label, x, y in series],
+                xticks=[[float(value), label] for value, label in xticks] if xticks is not None else None)
+
+
+def canvas_chart(spec, alt='', width=600):
+    """A <figure> holding a heatmap/scatter spec, drawn by the script from canvas_script()."""
+    payload = json.dumps(spec, separators=(',', ':')).replace('</', '<\\/')
+    height = round(width * spec.get('aspect', 0.6))
+    return (f'<figure class="mdms-chart" style="max-width:{width}px">'
+            f'<canvas width="{width}" height="{height}" role="img" aria-label="{html.escape(alt)}"></canvas>'
+            f'<figcaption></figcaption><script type="application/json">{payload}</script></figure>')
+
+
+def canvas_script():
+    """Styles and renderer for canvas_chart figures, once per report."""
+    global _canvas_script
+    if _canvas_script is None:
+        _canvas_script = render('_canvas_charts.html', {})
+    return _canvas_script
+
+
+def worst_rows(cases, label, cells):
+    """Rows for _worst_table.html.
+
+    cases yields (worst metric, record) pairs, label(record) gives the first
+    cell and cells is a list of (metric, column, format spec); the cell of the
+    metric the record is worst for is highlighted.
+    """
+    return [
+        (label(record), [(format(record[column], spec), worst == metric) for metric, column, spec in cells])
+        for worst, record in cases
+    ]
+
+
+class FrameRows:
+    """Formatted rows of a DataFrame, produced block by block.
+
+    formats maps a column to a format spec (``".1f"``); other float columns
+    are rounded to precision decimals, as ``DataFrame.to_html`` shows them,
+    and everything else goes through ``str``. Missing values become na_rep.
+    Only one block of formatted cells exists at a time.
+    """
+
+    def __init__(self, df, formats=None, precision=6, na_rep='NaN', block_size=2048):
+        self.df = df
+        self.formats = formats or {}
+        self.precision = precision
+        self.na_rep = na_rep
+        self.block_size = block_size
+
+    @property
+    def columns(self):
+        return [str(column) for column in self.df.columns]
+
+    def __len__(self):
+        return len(self.df)
+
+    def _format(self, column, values):
+        spec = self.formats.get(column)
+        missing = values.isna().to_numpy()
+        if spec is not None:
+            cells = [format(value, spec) for value in values.tolist()]
+        elif values.dtype.kind == 'f':
+            cells = [str(value) for value in values.round(self.precision).tolist()]
+        else:
+            cells = [str(value) for value in values.tolist()]
+        if missing.any():
+            for index in missing.nonzero()[0]:
+                cells[index] = self.na_rep
+        return cells
+
+    def __iter__(self):
+        for start in range(0, len(self.df), self.block_size):
+            block = self.df.iloc[start:start + self.block_size]
+            yield from zip(*(self._format(column, block.iloc[:, index])
+                             for index, column in enumerate(block.columns)))
+
@@ -0,0 +1,98 @@
+"""Worst-case rows for margin tables, shared by the analyzers.
+
+A spec is a list of ``(label, column, direction)`` tuples: the worst row for
+``label`` is the one with the smallest (``"min"``) or largest (``"max"``)
+value of ``column``. Every metric is reduced in one pass over a
+``(rows, metrics)`` array, optionally per group (device, BDF, loop...).
+Ties go to the first row, as with ``idxmin``; NaN never wins unless a
+group has nothing else.
+"""
+import numpy as np
+import pandas as pd
+
+# SanDisk / Microchip / Solidigm margin tables.
+EYE_MARGIN_SPECS = [
+    ("EH*EW", "EH*EW", "min"),
+    ("Top (mV)", "up(mV)", "min"),
+    ("Bottom (mV)", "down(mV)", "max"),
+    ("Left (UI)", "left(uI)", "max"),
+    ("Right (UI)", "right(uI)", "min"),
+]
+
+# LMT-style tables (LMT, SwApps, astera_sdk).
+LMT_MARGIN_SPECS = [
+    ("Worst ML", "ML", "min"),
+    ("Worst MR", "MR", "min"),
+    ("Worst MT", "MT", "min"),
+    ("Worst MB", "MB", "min"),
+    ("Worst EH*EW", "EH_EW", "min"),
+]
+
+
+def worst_positions(df, specs, by=None):
+    """Row positions of the worst row per group and metric.
+
+    Returns (positions, keys): positions is a (groups, metrics) int array of
+    positional row numbers in df, keys the sorted group keys (a one-element
+    list when by is None).
+    """
+    columns = [column for _, column, _ in specs]
+    sign = np.array([1.0 if direction == "min" else -1.0 for _, _, direction in specs])
+    values = df[columns].to_numpy(dtype=float) * sign
+    values[np.isnan(values)] = np.inf
+
+    if by is None:
+        return values.argmin(axis=0)[None, :], [None]
+
+    codes, keys = _group_codes(df, by)
+    order = np.argsort(codes, kind="stable")
+    values = values[order]
+    starts = np.flatnonzero(np.r_[True, codes[order][1:] != codes[order][:-1]])
+    minima = np.minimum.reduceat(values, starts, axis=0)
+    sizes = np.diff(np.r_[starts, len(values)])
+    hits = values == np.repeat(minima, sizes, axis=0)
+    rows = np.where(hits, np.arange(len(values))[:, None], len(values))
+    first = np.minimum.reduceat(rows, starts, axis=0)
+    return order[first], keys
+
+
+def _group_codes(df, by):
+    """Dense group codes numbered in sorted key order, and the keys."""
+    grouper = df.groupby(by, sort=True, dropna=False)
+    codes = grouper.ngroup().to_numpy()
+    keys = list(grouper.groups.keys())
+    return codes, keys
+
+
+def find_worst_cases(df, specs=EYE_MARGIN_SPECS, by=None, label_column="worst_metric"):
+    """The worst rows as a frame: one row per group and metric, in spec order within each group.
+
+    Rows keep df's index and columns; label_column names the metric each row is worst for.
+    """
+    if df.empty:
+        return df.iloc[0:0].assign(**{label_column: pd.Series(dtype=object)})
+    positions, _ = worst_positions(df, specs, by)
+    worst = df.iloc[positions.ravel()].copy()
+    worst[label_column] = [label for _ in range(len(positions)) for label, _, _ in specs]
+    return worst
+
+
+def worst_case_rows(df, specs=LMT_MARGIN_SPECS):
+    """{label: worst row} for an ungrouped table, the shape LMT-style reports use."""
+    positions, _ = worst_positions(df, specs)
+    return {label: df.iloc[position] for (label, _, _), position in zip(specs, positions[0])}
+
+
+def worst_case_summary(df, specs=EYE_MARGIN_SPECS, by=None):
+    """Tidy summary: one row per group and metric with the metric, column, worst value and source row label."""
+    columns = ([by] if isinstance(by, str) else list(by)) if by is not None else []
+    if df.empty:
+        return pd.DataFrame(columns=columns + ["metric", "column", "value", "row"])
+    positions, keys = worst_positions(df, specs, by)
+    records = []
+    for key, group_positions in zip(keys, positions):
+        key = key if isinstance(key, tuple) else (key,)
+        for (label, column, _), position in zip(specs, group_positions):
+            records.append(dict(zip(columns, key), metric=label, column=column,
+                                value=df[column].iat[position], row=df.index[position]))
+    return pd.DataFrame(records, columns=columns + ["metric", "column", "value", "row"])
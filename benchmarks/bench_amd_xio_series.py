@@ -0,0 +1,109 @@
+"""Benchmark AMD_XIO per-lane series building on a synthetic x16 capture.
+
+Compares the legacy per-lane boolean filtering against the
+groupby/cumcount pivot used by ``generate_plots``.
+
+    python benchmarks/bench_amd_xio_series.py [--lanes 16] [--loops 50] [--devices 32]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+import matplotlib
+
+matplotlib.use('Agg')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'autoscript'))
+import AMD_XIO  # noqa: E402
+
+
+def make_capture(path, lanes, loops, devices, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = lanes * loops * devices
+    device_idx = np.repeat(np.arange(devices), lanes * loops)
+    df = pd.DataFrame({
+        ' Bus': 0x40 + device_idx,
+        'Device': 0,
+        'Function': 0,
+        'BIOS': 'SYNTH',
+        'LanePCIeNo': np.tile(np.arange(lanes), loops * devices),
+        'Margin Top (volt)': rng.uniform(0.02, 0.06, rows),
+        'Margin Bottom (volt)': rng.uniform(0.02, 0.06, rows),
+        'Margin Left Offset': rng.integers(5, 20, rows),
+        ' Margin Right Offset': rng.integers(5, 20, rows),
+        'LCLocalPreset': rng.integers(0, 10, rows),
+    })
+    df.to_csv(path, index=False)
+
+
+def load_devices(path):
+    data = pd.read_csv(path)
+    df_plot = data[['LanePCIeNo', 'Margin Top (volt)', 'Margin Bottom (volt)', 'Margin Left Offset',
+                    ' Margin Right Offset']].copy()
+    df_plot['Margin Right Offset'] = df_plot[' Margin Right Offset']
+    df_plot['Margin Top (volt)'] = df_plot['Margin Top (volt)'] * 1000
+    df_plot['Margin Bottom (volt)'] = df_plot['Margin Bottom (volt)'] * 1000
+    df_plot['Bus_Device_Function'] = data[' Bus'].astype(str)
+    return [group for _, group in df_plot.groupby('Bus_Device_Function', sort=False)]
+
+
+def legacy_series(device_data):
+    """The per-lane filtering generate_plots used before the pivot."""
+    unique_lanes = sorted(device_data['LanePCIeNo'].unique())
+    panels = {}
+    for metric in AMD_XIO.MARGIN_METRICS:
+        panels[metric] = [[device_data.loc[(device_data['LanePCIeNo'] == lane), metric].iloc[i]
+                           if i < len(device_data.loc[(device_data['LanePCIeNo'] == lane), metric])
+                           else None
+                           for lane in unique_lanes]
+                          for i in range(AMD_XIO.PLOT_GROUPS)]
+    candidates = [device_data.loc[device_data[metric].idxmin(), 'LanePCIeNo'] for metric in AMD_XIO.MARGIN_METRICS]
+    worst_lane = min(candidates, key=lambda lane: sum(
+        device_data.loc[device_data['LanePCIeNo'] == lane, metric].min() for metric in AMD_XIO.MARGIN_METRICS))
+    return panels, worst_lane
+
+
+def pivot_series(device_data):
+    lane_series = AMD_XIO.build_lane_series(device_data)
+    panels = {metric: matrix.reindex(range(AMD_XIO.PLOT_GROUPS)).values for metric, matrix in lane_series.items()}
+    worst_lane, _ = AMD_XIO.find_worst_lane(device_data, lane_series)
+    return panels, worst_lane
+
+
+def timed(func, devices):
+    start = time.perf_counter()
+    results = [func(device_data) for device_data in devices]
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lanes', type=int, default=16)
+    parser.add_argument('--loops', type=int, default=50)
+    parser.add_argument('--devices', type=int, default=32)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'synthetic_margin.csv')
+        make_capture(csv_path, args.lanes, args.loops, args.devices)
+        devices = load_devices(csv_path)
+
+    legacy_time, legacy = timed(legacy_series, devices)
+    pivot_time, pivot = timed(pivot_series, devices)
+
+    for (old_panels, old_lane), (new_panels, new_lane) in zip(legacy, pivot):
+        assert old_lane == new_lane
+        for metric in AMD_XIO.MARGIN_METRICS:
+            np.testing.assert_allclose(np.array(old_panels[metric], dtype=float), new_panels[metric])
+
+    print(f"{args.lanes} lanes x {args.loops} loops x {args.devices} devices")
+    print(f"legacy per-lane filter : {legacy_time:8.3f} s")
+    print(f"groupby/cumcount pivot : {pivot_time:8.3f} s")
+    print(f"speedup                : {legacy_time / pivot_time:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
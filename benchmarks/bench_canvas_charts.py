@@ -0,0 +1,93 @@
+"""Benchmark server-side chart cost: 300-dpi matplotlib PNGs against canvas chart specs.
+
+Renders the Micron PEye eye window and the SanDisk centered eye for a number
+of synthetic lanes both ways and reports time per chart and the bytes each
+mode adds to the report. Checks that the data embedded in every canvas spec
+decodes back to the plotted grid.
+
+    python benchmarks/bench_canvas_charts.py [--lanes 16]
+"""
+import os
+import re
+import sys
+import json
+import time
+import base64
+import argparse
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'autoscript'))
+import SanDisk  # noqa: E402
+import Micron_analyzer  # noqa: E402
+from report_render import image_src  # noqa: E402
+
+SPEC = re.compile(r'<script type="application/json">(.*?)</script>', re.S)
+
+
+def make_peye(lanes, seed=0):
+    """BER grids shaped like a PEye dump: 0 errors inside an elliptical eye, 1..1023 outside."""
+    rng = np.random.default_rng(seed)
+    v, p = np.mgrid[-1:1:52j, -1:1:63j]
+    grids = np.empty((lanes, 52, 63), dtype=np.uint16)
+    for lane in range(lanes):
+        radius = (v / rng.uniform(0.4, 0.7)) ** 2 + (p / rng.uniform(0.4, 0.7)) ** 2
+        grids[lane] = np.clip(np.where(radius < 1, 0, 10 ** (radius * 1.5)), 0, 1023).astype(np.uint16)
+    return grids
+
+
+def make_sandisk(lanes, seed=0):
+    """(ptn, dac, phs) quality cubes with a central eye."""
+    rng = np.random.default_rng(seed)
+    d, p = np.mgrid[0:128, 0:64]
+    cubes = []
+    for _ in range(lanes):
+        eye = np.exp(-(((d - 64) / rng.uniform(15, 30)) ** 2 + ((p - 32) / rng.uniform(8, 15)) ** 2) ** 2)
+        cubes.append(np.clip(eye[None] + rng.normal(0, 0.02, (4, 128, 64)), 0, 1))
+    return cubes
+
+
+def decoded(figure):
+    array = json.loads(SPEC.search(figure).group(1))['values']
+    values = np.frombuffer(base64.b64decode(array['data']), dtype=np.dtype(array['dtype']).newbyteorder('<'))
+    return values.reshape(array['shape'])
+
+
+def timed(func, items):
+    start = time.perf_counter()
+    out = [func(*item) for item in items]
+    return (time.perf_counter() - start) / len(items), out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lanes', type=int, default=16)
+    args = parser.parse_args()
+
+    voltage_axis, pi_axis = Micron_analyzer.generate_axes()
+    peye = [(grid, voltage_axis, pi_axis, lane) for lane, grid in enumerate(make_peye(args.lanes))]
+    sandisk = [(cube, lane) for lane, cube in enumerate(make_sandisk(args.lanes))]
+    rows = []
+    for name, items, png, canvas in (
+        ('Micron eye', peye, Micron_analyzer.plot_eye_no_transpose, Micron_analyzer.eye_chart_no_transpose),
+        ('SanDisk eye', sandisk, SanDisk.render_lane_eye_diagram, SanDisk.lane_eye_chart),
+    ):
+        png_time, images = timed(png, items)
+        canvas_time, figures = timed(canvas, items)
+        for item, figure in zip(items, figures):
+            expected = item[0] if name == 'Micron eye' else SanDisk.center_lane_eye(*item)[0].astype(np.float32)
+            assert np.array_equal(decoded(figure), expected), f'{name}: embedded grid differs'
+        png_bytes = sum(len(image_src(image)) for image in images) / len(items)
+        canvas_bytes = sum(len(figure) for figure in figures) / len(items)
+        rows.append((name, png_time, png_bytes, canvas_time, canvas_bytes))
+
+    print(f"{args.lanes} lanes per chart type")
+    for name, png_time, png_bytes, canvas_time, canvas_bytes in rows:
+        print(f"{name:12s}: png {png_time * 1e3:8.1f} ms, {png_bytes / 1024:7.1f} KiB | "
+              f"canvas {canvas_time * 1e3:6.2f} ms, {canvas_bytes / 1024:6.1f} KiB per chart")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Benchmark eye-opening extraction on a synthetic 16-lane batch.
+
+Times the old per-lane ``np.where`` bounding box, ``eye_geometry.eye_openings``
+called once per lane, and one batched call over all lanes, plus a serpentine
+opening whose path winds through the whole grid (labeling cost should not
+follow the path length). Every connected eye is checked against a plain
+breadth-first flood fill.
+
+    python benchmarks/bench_eye_geometry.py [--lanes 16] [--dac 256] [--phs 128] [--repeat 5]
+"""
+import os
+import sys
+import time
+import argparse
+from collections import deque
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'autoscript'))
+import eye_geometry  # noqa: E402
+
+THRESHOLD = 0.9
+
+
+def make_batch(lanes, dac, phs, seed=0):
+    """Quality grids with a central eye of random size plus a few open islands off the eye."""
+    rng = np.random.default_rng(seed)
+    d, p = np.mgrid[0:dac, 0:phs]
+    grids = np.empty((lanes, dac, phs))
+    for lane in range(lanes):
+        height, width = rng.uniform(0.15, 0.3) * dac, rng.uniform(0.15, 0.3) * phs
+        eye = np.exp(-(((d - dac / 2) / height) ** 2 + ((p - phs / 2) / width) ** 2) ** 2)
+        grids[lane] = np.clip(eye + rng.normal(0, 0.02, eye.shape), 0, 1)
+        for _ in range(3):
+            r, c = rng.integers(0, dac - 4), rng.integers(0, phs // 8)
+            grids[lane, r:r + 4, c:c + 4] = 1.0
+    return grids
+
+
+def make_serpentine(dac, phs):
+    """One lane whose only opening is a single path snaking row by row through the grid."""
+    grid = np.zeros((1, dac, phs))
+    grid[0, ::2, :] = 1.0
+    for row in range(1, dac, 2):
+        grid[0, row, phs - 1 if row % 4 == 1 else 0] = 1.0
+    return grid
+
+
+def legacy_bbox(grid):
+    """The bounding box of every thresholded point, as the analyzers measured before."""
+    dac_indices, phase_indices = np.where(grid >= THRESHOLD)
+    return dac_indices.min(), dac_indices.max(), phase_indices.min(), phase_indices.max()
+
+
+def bfs_eye(grid, seed):
+    mask = grid >= THRESHOLD
+    region = np.zeros_like(mask)
+    queue = deque([seed])
+    region[seed] = True
+    while queue:
+        r, c = queue.popleft()
+        for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+            if 0 <= nr < mask.shape[0] and 0 <= nc < mask.shape[1] and mask[nr, nc] and not region[nr, nc]:
+                region[nr, nc] = True
+                queue.append((nr, nc))
+    return region
+
+
+def best_of(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lanes', type=int, default=16)
+    parser.add_argument('--dac', type=int, default=256)
+    parser.add_argument('--phs', type=int, default=128)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    grids = make_batch(args.lanes, args.dac, args.phs)
+    legacy_time, legacy = best_of(lambda: [legacy_bbox(g) for g in grids], args.repeat)
+    single_time, _ = best_of(lambda: [eye_geometry.eye_openings(g[None], THRESHOLD) for g in grids], args.repeat)
+    batch_time, batch = best_of(lambda: eye_geometry.eye_openings(grids, THRESHOLD), args.repeat)
+
+    for lane, grid in enumerate(grids):
+        seed = (batch['seed_dac'][lane], batch['seed_phs'][lane])
+        assert np.array_equal(batch['eye'][lane], bfs_eye(grid, seed)), f'lane {lane}: eye differs from flood fill'
+    serpentine = make_serpentine(args.dac, args.phs)
+    snake_time, snake = best_of(lambda: eye_geometry.eye_openings(serpentine, THRESHOLD), args.repeat)
+    seed = (snake['seed_dac'][0], snake['seed_phs'][0])
+    assert np.array_equal(snake['eye'][0], bfs_eye(serpentine[0], seed)), 'serpentine eye differs from flood fill'
+    wider = sum(l[3] - l[2] > w for l, w in zip(legacy, batch['phs_max'] - batch['phs_min']))
+    print(f"batch: {args.lanes} lanes x {args.dac}x{args.phs}")
+    print(f"legacy np.where bbox (per lane) : {legacy_time * 1e3:.2f} ms")
+    print(f"eye_openings (per lane)         : {single_time * 1e3:.2f} ms")
+    print(f"eye_openings (batched)          : {batch_time * 1e3:.2f} ms")
+    print(f"eye_openings (serpentine lane)  : {snake_time * 1e3:.2f} ms")
+    print(f"lanes where islands widened the legacy box: {wider}/{args.lanes}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""Benchmark pooled template figures against a new figure per chart on a 64-lane run.
+
+Renders the SanDisk centered eye and the Micron PEye eye window for every
+lane, and the AMD_XIO five-panel chart for every device, once with the legacy
+code (a new figure, axes and colorbar per chart) and once through
+``figure_pool``. Reports the mean latency per chart and checks that both
+produce the same pixels.
+
+    python benchmarks/bench_figure_pool.py [--lanes 64] [--devices 16]
+"""
+import io
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+from matplotlib.colors import LogNorm  # noqa: E402
+from PIL import Image  # noqa: E402
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), 'autoscript'))
+sys.path.insert(0, BENCH_DIR)
+import AMD_XIO  # noqa: E402
+import SanDisk  # noqa: E402
+import Micron_analyzer  # noqa: E402
+from bench_canvas_charts import make_peye, make_sandisk  # noqa: E402
+
+
+def legacy_sandisk(eye_data, lane_id):
+    cropped_data, (phase_min, phase_max, dac_min, dac_max) = SanDisk.center_lane_eye(eye_data, lane_id)
+    plt.figure(figsize=(10, 6))
+    plt.imshow(cropped_data, cmap='viridis', interpolation='nearest', aspect='auto',
+               extent=[phase_min, phase_max, dac_max, dac_min])
+    plt.colorbar(label='Signal Quality (Min, 0 to 1)')
+    plt.title(f'Centered Eye Diagram - Lane {lane_id}, All Patterns')
+    plt.xlabel('Phase Step')
+    plt.ylabel('DAC Step')
+    plt.gca().invert_yaxis()
+    buf = io.BytesIO()
+    plt.savefig(buf, format='png', dpi=300, bbox_inches='tight')
+    plt.close()
+    return buf.getvalue()
+
+
+def legacy_micron(lane_data, voltage_axis, pi_axis, lane_idx):
+    fig = plt.figure(figsize=(4, 3))
+    plt.imshow(lane_data, norm=LogNorm(vmin=1, vmax=1023),
+               extent=[pi_axis[0], pi_axis[-1], voltage_axis[0], voltage_axis[-1]],
+               origin='upper', aspect='auto', cmap='viridis')
+    cbar = plt.colorbar()
+    cbar.set_label("Bit Error Count")
+    cbar.set_ticks([1, 5, 10, 50, 100, 500, 1023])
+    cbar.set_ticklabels([1, 5, 10, 50, 100, 500, 1023])
+    plt.title(f"PCle BER Eye Window - Lane {lane_idx}")
+    plt.xlabel("PI (UI/64)")
+    plt.ylabel("Voltage (mV)")
+    plt.grid(True)
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=300, bbox_inches='tight')
+    plt.close(fig)
+    return buf.getvalue()
+
+
+def legacy_lane_panel(ax, matrix, title, criteria):
+    unique_lanes = matrix.columns.tolist()
+    groups = matrix.reindex(range(AMD_XIO.PLOT_GROUPS))
+    for i, (_, values) in enumerate(groups.iterrows()):
+        ax.plot(unique_lanes, values.values, marker='o', linestyle='-', linewidth=1.5, label=f'Data Group {i + 1}')
+        ax.scatter(unique_lanes, values.values, color='blue', s=80, zorder=5)
+    ax.set_title(title)
+    ax.set_xlabel('Lane')
+    ax.set_ylabel(title)
+    ax.grid(True)
+    ax.axhline(y=criteria, color='red', linestyle='--', linewidth=2)
+    ax.xaxis.set_major_locator(matplotlib.ticker.MaxNLocator(integer=True))
+
+
+def legacy_xio(device_data, device, volt_criteria, offset_criteria):
+    fig, axs = plt.subplots(5, 1, figsize=(12, 22))
+    axs = axs.flatten()
+    lane_series = AMD_XIO.build_lane_series(device_data)
+    legacy_lane_panel(axs[0], lane_series['Margin Top (volt)'], 'Margin Top (mV)', volt_criteria)
+    legacy_lane_panel(axs[1], lane_series['Margin Bottom (volt)'], 'Margin Bottom (mV)', volt_criteria)
+    legacy_lane_panel(axs[2], lane_series['Margin Left Offset'], 'Margin Left Offset', offset_criteria)
+    legacy_lane_panel(axs[3], lane_series['Margin Right Offset'], 'Margin Right Offset', offset_criteria)
+    worst_lane, worst_min = AMD_XIO.find_worst_lane(device_data, lane_series)
+    axs[4].set_xlim(-20, 20)
+    x = [-worst_min['Margin Left Offset'], 0, worst_min['Margin Right Offset'], 0, -worst_min['Margin Left Offset']]
+    y = [0, worst_min['Margin Top (volt)'], 0, -worst_min['Margin Bottom (volt)'], 0]
+    axs[4].plot(x, y, marker='o', linewidth=2, label=f'Lane {worst_lane}')
+    axs[4].scatter(x, y, color='blue', s=80, zorder=5)
+    axs[4].plot([-offset_criteria, 0, offset_criteria, 0, -offset_criteria],
+                [0, volt_criteria, 0, -volt_criteria, 0], 'r--', linewidth=2)
+    axs[4].set_title('Eye Diagram')
+    axs[4].set_xlabel('Timing Margin')
+    axs[4].set_ylabel('Voltage Margin(mV)')
+    axs[4].legend(loc='upper right')
+    axs[4].grid(True)
+    plt.tight_layout(rect=[0, 0.03, 1, 0.95])
+    img_data = io.BytesIO()
+    plt.savefig(img_data, format='png')
+    plt.close(fig)
+    return img_data.getvalue()
+
+
+def make_xio_devices(devices, lanes=16, loops=5, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = lanes * loops
+    return [pd.DataFrame({
+        'LanePCIeNo': np.tile(np.arange(lanes), loops),
+        'Margin Top (volt)': rng.uniform(20, 60, rows),
+        'Margin Bottom (volt)': rng.uniform(20, 60, rows),
+        'Margin Left Offset': rng.integers(5, 20, rows),
+        'Margin Right Offset': rng.integers(5, 20, rows),
+    }) for _ in range(devices)]
+
+
+def per_chart(func, items):
+    start = time.perf_counter()
+    images = [func(*item) for item in items]
+    return (time.perf_counter() - start) / len(items), images
+
+
+def same_pixels(a, b):
+    return np.array_equal(np.asarray(Image.open(io.BytesIO(a))), np.asarray(Image.open(io.BytesIO(b))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lanes', type=int, default=64)
+    parser.add_argument('--devices', type=int, default=16)
+    args = parser.parse_args()
+
+    voltage_axis, pi_axis = Micron_analyzer.generate_axes()
+    cases = [
+        ('SanDisk eye', [(cube, lane) for lane, cube in enumerate(make_sandisk(args.lanes))],
+         legacy_sandisk, SanDisk.render_lane_eye_diagram),
+        ('Micron eye', [(grid, voltage_axis, pi_axis, lane) for lane, grid in enumerate(make_peye(args.lanes))],
+         legacy_micron, Micron_analyzer.plot_eye_no_transpose),
+        ('AMD_XIO device', [(data, str(i), 25.0, 9.0) for i, data in enumerate(make_xio_devices(args.devices))],
+         legacy_xio, AMD_XIO.render_plots_png),
+    ]
+    rows = []
+    for name, items, legacy, pooled in cases:
+        legacy_time, legacy_images = per_chart(legacy, items)
+        pooled_time, pooled_images = per_chart(pooled, items)
+        assert all(map(same_pixels, legacy_images, pooled_images)), f'{name}: pooled chart pixels differ'
+        rows.append((name, len(items), legacy_time, pooled_time))
+
+    for name, count, legacy_time, pooled_time in rows:
+        print(f"{name:15s} x{count:3d}: new figure {legacy_time * 1e3:7.1f} ms/chart, "
+              f"pooled {pooled_time * 1e3:7.1f} ms/chart ({legacy_time / pooled_time:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
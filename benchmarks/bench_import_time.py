@@ -0,0 +1,83 @@
+"""Benchmark analyzer startup: the time to import each autoscript module in a fresh interpreter.
+
+Every module is imported in its own ``python -c`` process so nothing is
+shared between runs; the best of --repeat runs is reported together with
+the heavy modules the import pulled in. With --against REV the autoscript
+tree at that git revision is measured the same way for a before/after
+comparison.
+
+    python benchmarks/bench_import_time.py [--repeat 5] [--against HEAD~1]
+"""
+import os
+import sys
+import json
+import tarfile
+import argparse
+import tempfile
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AUTOSCRIPT_DIR = os.path.join(REPO_DIR, 'autoscript')
+sys.path.insert(0, REPO_DIR)
+from report_engine import ANALYZERS  # noqa: E402
+
+HEAVY = ('numpy', 'pandas', 'matplotlib', 'matplotlib.pyplot', 'jinja2', 'openpyxl', 'tkinter')
+
+PROBE = """
+import sys, time, json
+sys.path.insert(0, {path!r})
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def import_time(directory, module, repeat):
+    """(best seconds, heavy modules loaded) for importing module from directory."""
+    best, loaded = None, []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', PROBE.format(path=directory, module=module, heavy=HEAVY)],
+                             cwd=directory, capture_output=True, text=True, check=True).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        if best is None or result['seconds'] < best:
+            best, loaded = result['seconds'], result['loaded']
+    return best, loaded
+
+
+def checkout(rev, directory):
+    """Extract autoscript/ at rev into directory and return its path."""
+    archive = subprocess.run(['git', 'archive', '--format=tar', rev, 'autoscript'],
+                             cwd=REPO_DIR, capture_output=True, check=True).stdout
+    path = os.path.join(directory, 'archive.tar')
+    with open(path, 'wb') as f:
+        f.write(archive)
+    with tarfile.open(path) as tar:
+        tar.extractall(directory, filter='data')
+    return os.path.join(directory, 'autoscript')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--against', metavar='REV', help='git revision to compare with')
+    args = parser.parse_args()
+
+    modules = [os.path.splitext(script)[0] for script in ANALYZERS]
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline_dir = checkout(args.against, tmp) if args.against else None
+        print(f"{'analyzer':18s} {'import':>9s}" + (f" {args.against:>12s}" if baseline_dir else '') + '  heavy modules loaded')
+        for module in modules:
+            seconds, loaded = import_time(AUTOSCRIPT_DIR, module, args.repeat)
+            line = f"{module:18s} {seconds * 1e3:6.0f} ms"
+            if baseline_dir:
+                if os.path.exists(os.path.join(baseline_dir, module + '.py')):
+                    before, _ = import_time(baseline_dir, module, args.repeat)
+                    line += f" {before * 1e3:9.0f} ms"
+                else:
+                    line += f" {'-':>12s}"
+            print(line + '  ' + (', '.join(loaded) or '-'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Benchmark Microchip 2D eye Excel ingestion on a synthetic x16 export.
+
+Compares the legacy per-sheet ``pd.read_excel`` parser against
+``parse_excel_data`` reading the workbook once (serial and sheet-parallel)
+and against a warm NumPy cache, and checks they decode the same grids.
+
+    python benchmarks/bench_microchip_excel.py [--lanes 16] [--rows 64] [--cols 64] [--workers 4]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import contextlib
+
+import numpy as np
+import pandas as pd
+import openpyxl
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'autoscript'))
+import Microchip_PCIe  # noqa: E402
+
+
+def make_export(path, lanes, rows, cols, seed=0):
+    rng = np.random.default_rng(seed)
+    workbook = openpyxl.Workbook()
+    metrics = workbook.active
+    metrics.title = "Eye Metrics"
+    metrics.append(["2D Eye Metrics"])
+    metrics.append(["Lane", "Link Speed", "Eye Metrics"])
+    for lane in range(lanes):
+        metrics.append([f"Lane #{lane}", "Gen5", f"{rng.uniform(0.2, 0.4):.3f} UI x {rng.uniform(20, 40):.1f} mV"])
+    x_values = np.round(np.linspace(-0.5, 0.5, cols), 4)
+    y_values = np.round(np.linspace(-60, 60, rows), 3)
+    d, p = np.mgrid[0:rows, 0:cols]
+    for lane in range(lanes):
+        sheet = workbook.create_sheet(f"Lane #{lane}")
+        sheet.append([f"Lane #{lane} BER"])
+        sheet.append(["Bin#"] + [f"X = {x}" for x in x_values])
+        ber = np.exp(-(((d - rows / 2) / (rows / 4)) ** 2 + ((p - cols / 2) / (cols / 4)) ** 2))
+        ber = np.round(1 - ber + rng.normal(0, 0.01, ber.shape), 4)
+        for y, values in zip(y_values, ber):
+            sheet.append([f"Y = {y}"] + values.tolist())
+    workbook.save(path)
+
+
+def legacy_parse_excel_data(file_path):
+    """The pandas parser Microchip_PCIe used before reading the workbook once."""
+    xl = pd.ExcelFile(file_path)
+    eye_metrics, lane_data = [], {}
+    if "Eye Metrics" in xl.sheet_names:
+        df_metrics = pd.read_excel(file_path, sheet_name="Eye Metrics", header=1)
+        for _, row in df_metrics.iterrows():
+            lane = row.iloc[0]
+            if pd.isna(lane) or not str(lane).startswith("Lane #"):
+                continue
+            eye_width_ui, eye_height_mv = map(float, row.iloc[2].replace(" UI x ", " ").replace(" mV", "").split())
+            eye_metrics.append({"lane": lane, "link_speed": row.iloc[1],
+                                "eye_width_ui": eye_width_ui, "eye_height_mv": eye_height_mv})
+    for sheet in xl.sheet_names:
+        if sheet.startswith("Lane #"):
+            df_lane = pd.read_excel(file_path, sheet_name=sheet, header=1)
+            x_columns = [col for col in df_lane.columns[1:] if "X =" in str(col)]
+            x_values = [float(col.split("=")[1].strip()) for col in x_columns if "=" in col]
+            y_values = [float(str(y).split("=")[1].strip()) for y in df_lane["Bin#"] if pd.notna(y) and "Y =" in str(y)]
+            data = df_lane[x_columns].apply(pd.to_numeric, errors="coerce").dropna(how="all")
+            lane_data[sheet] = {"x_values": np.array(x_values), "y_values": np.array(y_values[:data.shape[0]]),
+                                "data": data.values}
+    return eye_metrics, lane_data
+
+
+def timed(func, *args, **kwargs):
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lanes', type=int, default=16)
+    parser.add_argument('--rows', type=int, default=64)
+    parser.add_argument('--cols', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=Microchip_PCIe.DEFAULT_SHEET_WORKERS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'eye.xlsx')
+        cache_dir = os.path.join(tmp, 'cache')
+        make_export(path, args.lanes, args.rows, args.cols)
+        legacy_time, legacy = timed(legacy_parse_excel_data, path)
+        serial_time, serial = timed(Microchip_PCIe.parse_excel_data, path, 1, None)
+        parallel_time, parallel = timed(Microchip_PCIe.parse_excel_data, path, args.workers, None)
+        cold_time, _ = timed(Microchip_PCIe.parse_excel_data, path, 1, cache_dir)
+        warm_time, warm = timed(Microchip_PCIe.parse_excel_data, path, 1, cache_dir)
+
+    assert legacy[0] == serial[0] == warm[0], 'eye metrics differ'
+    for result in (serial, parallel, warm):
+        assert list(result[1]) == list(legacy[1]), 'lane sheets differ'
+        for sheet, lane in legacy[1].items():
+            for key in ('x_values', 'y_values', 'data'):
+                assert np.array_equal(lane[key], result[1][sheet][key]), f'{sheet} {key} differs'
+    print(f"export: {args.lanes} lane sheets x {args.rows}x{args.cols}")
+    print(f"legacy pd.read_excel per sheet : {legacy_time:.3f} s")
+    print(f"read-only, one pass            : {serial_time:.3f} s")
+    print(f"read-only, {args.workers} workers           : {parallel_time:.3f} s")
+    print(f"cold cache (read + save)       : {cold_time:.3f} s")
+    print(f"warm cache                     : {warm_time:.3f} s")
+
+
+if __name__ == '__main__':
+    main()
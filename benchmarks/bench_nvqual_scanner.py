@@ -0,0 +1,84 @@
+"""Benchmark NVqual PEX eye log parsing on a synthetic overnight log.
+
+Compares reading the whole log into a string and collecting Y_STATUS in
+nested lists against the chunked ``PexEyeScanner``, reporting time and
+peak traced memory, and checks both give the same readings.
+
+    python benchmarks/bench_nvqual_scanner.py [--gpus 8] [--iterations 2000] [--filler 20]
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+from collections import defaultdict
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'autoscript'))
+import NVqual  # noqa: E402
+
+
+def make_log(path, gpus, iterations, filler, seed=0):
+    rng = np.random.default_rng(seed)
+    buses = [f"0000:{0x18 + 0x10 * g:02x}:00.0" for g in range(gpus)]
+    with open(path, 'w') as f:
+        f.write("PEX Link Speed  : 32.0 Gbit/s\nPEX Width, ASLM : 16 lanes\n")
+        for it in range(iterations):
+            f.write(f"==== iteration {it} ====\n")
+            for _ in range(filler):
+                f.write("INFO  pex_data_eye_test: polling link state, no change detected on any port\n")
+            for gpu, bus in enumerate(buses):
+                values = ", ".join(str(v) for v in rng.integers(20, 60, 16))
+                f.write(f"GPU {gpu} [3] [{bus}] : PEX Physical Lane(0-15) Y_STATUS = {values}\n")
+
+
+def legacy_parse(path):
+    """Whole-file read plus the nested defaultdict NVqual used before the scanner."""
+    with open(path, "r", encoding="utf-8") as f:
+        log_content = f.read()
+    raw_data = defaultdict(lambda: defaultdict(list))
+    for match in NVqual.PCIE_INFO_PATTERN.finditer(log_content):
+        values = [int(v.strip()) for v in match.group(3).split(",") if v.strip().isdigit()]
+        for lane in range(16):
+            raw_data[match.group(2)][f"Lane {lane}"].append(values[lane] if lane < len(values) else None)
+    return raw_data
+
+
+def measure(func, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(path)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--gpus', type=int, default=8)
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--filler', type=int, default=20, help='unrelated log lines per iteration')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'pex_data_eye_test_000000_000000.log')
+        make_log(path, args.gpus, args.iterations, args.filler)
+        size_mb = os.path.getsize(path) / 1e6
+        legacy_time, legacy_peak, legacy = measure(legacy_parse, path)
+        scan_time, scan_peak, (devices, _, y_status) = measure(NVqual.scan_log_file, path)
+
+    assert devices == list(legacy), 'bus IDs differ'
+    for row, bus in enumerate(devices):
+        for lane in range(16):
+            assert y_status[row, lane].tolist() == legacy[bus][f"Lane {lane}"], f'{bus} lane {lane} differs'
+    print(f"log: {args.gpus} GPUs x {args.iterations} iterations ({size_mb:.1f} MB)")
+    print(f"legacy read + nested lists : {legacy_time:.3f} s, peak {legacy_peak / 1e6:.1f} MB")
+    print(f"chunked scanner            : {scan_time:.3f} s, peak {scan_peak / 1e6:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""Benchmark streamed report rendering on a Solidigm_LMT table with many raw-data rows.
+
+Compares the legacy f-string report (rows appended with ``+=``, one write at
+the end) against ``generate_html_report``, whose Report is streamed to the
+file chunk by chunk. Reports time to the first written byte, total time and
+peak traced memory, and checks that both reports hold the same cells.
+
+    python benchmarks/bench_report_render.py [--rows 100000]
+"""
+import os
+import re
+import sys
+import html
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'autoscript'))
+import Solidigm_LMT  # noqa: E402
+
+CELL = re.compile(r'<t[dh][^>]*>(.*?)</t[dh]>', re.S)
+
+
+def make_tables(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    margin_df = pd.DataFrame({
+        'bdf': [f'0000:{b:02x}:00.0' for b in rng.integers(1, 5, rows)],
+        'type': 'EP',
+        'lane': rng.integers(0, 16, rows),
+        'right': rng.uniform(5, 20, rows), 'left': -rng.uniform(5, 20, rows),
+        'up': rng.uniform(5, 20, rows), 'down': -rng.uniform(5, 20, rows),
+        'right(uI)': rng.uniform(0.1, 0.4, rows), 'left(uI)': -rng.uniform(0.1, 0.4, rows),
+        'up(mV)': rng.uniform(10, 40, rows), 'down(mV)': -rng.uniform(10, 40, rows),
+        'temperature': rng.uniform(30, 50, rows),
+    })
+    config_df = pd.DataFrame({
+        'bdf': [f'0000:{b:02x}:00.0' for b in range(1, 5)], 'type': 'EP', 'speed': '16GT/s', 'width': 'x4',
+        'model': 'SSD', 'serial number': [f'SN{b}' for b in range(4)], 'firmware': 'FW1',
+    })
+    margin_df = Solidigm_LMT.calculate_eye_metrics(margin_df)
+    return margin_df, config_df
+
+
+def legacy_report(margin_df, worst_cases, config_df):
+    """The string-concatenating body of generate_html_report (styles and images left out)."""
+    config_df = config_df.fillna("-")
+    html_str = "<!DOCTYPE html><html><body><div class=\"container\"><h1>Margin Analysis Report</h1>"
+    html_str += "<table><tr><th colspan=\"7\" class=\"title-header\">Data Information</th></tr>"
+    html_str += "<tr><th>BDF</th><th>Type</th><th>Speed</th><th>Width</th><th>Model</th><th>Serial Number</th><th>Firmware</th></tr>"
+    for b, d, f, t, s, w, m, sn, fw in Solidigm_LMT.get_bdf_info(config_df):
+        html_str += f"<tr><td>{b}:{d}.{f}</td><td>{t}</td><td>{s}</td><td>{w}</td><td>{m}</td><td>{sn}</td><td>{fw}</td></tr>"
+    html_str += "</table><table><tr><th colspan=\"6\" class=\"title-header\">Worst Cases Summary</th></tr>"
+    html_str += "<tr><th>Lane</th><th>EH*EW</th><th>Top (mV)</th><th>Bottom (mV)</th><th>Left (UI)</th><th>Right (UI)</th></tr>"
+    for _, row in worst_cases.iterrows():
+        html_str += (f"<tr><td>{int(row['lane'])}</td><td>{row['EH*EW']:.1f}</td><td>{row['up(mV)']:.1f}</td>"
+                     f"<td>{row['down(mV)']:.1f}</td><td>{row['left(uI)']:.2f}</td><td>{row['right(uI)']:.2f}</td></tr>")
+    html_str += "</table><table><tr><th colspan=\"12\" class=\"title-header\">Raw Data</th></tr>"
+    html_str += ("<tr><th>BDF</th><th>Type</th><th>Lane</th><th>Right</th><th>Left</th><th>Up</th><th>Down</th>"
+                 "<th>Right (uI)</th><th>Left (uI)</th><th>Up (mV)</th><th>Down (mV)</th><th>Temp</th></tr>")
+    margin_df = margin_df.fillna('-')
+    for _, row in margin_df.iterrows():
+        html_str += (f"<tr><td>{row['bdf']}</td><td>{row['type']}</td><td>{int(row['lane'])}</td><td>{row['right']:.1f}</td>"
+                     f"<td>{row['left']:.1f}</td><td>{row['up']:.1f}</td><td>{row['down']:.1f}</td><td>{row['right(uI)']:.2f}</td>"
+                     f"<td>{row['left(uI)']:.2f}</td><td>{row['up(mV)']:.1f}</td><td>{row['down(mV)']:.1f}</td>"
+                     f"<td>{row['temperature']:.1f}</td></tr>")
+    return html_str + "</table></div></body></html>"
+
+
+def measure(write):
+    """Time write(on_first_chunk), then run it again under tracemalloc.
+
+    Returns (first byte s, total s, peak MiB); tracing slows Python down, so
+    the times come from the untraced run.
+    """
+    first = []
+    start = time.perf_counter()
+    write(lambda: first or first.append(time.perf_counter() - start))
+    total = time.perf_counter() - start
+    tracemalloc.start()
+    write(lambda: None)
+    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    return first[0], total, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    margin_df, config_df = make_tables(args.rows)
+    worst_cases = Solidigm_LMT.get_worst_cases(margin_df)
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path, streamed_path = os.path.join(tmp, 'legacy.html'), os.path.join(tmp, 'streamed.html')
+
+        def write_legacy(on_first):
+            report = legacy_report(margin_df, worst_cases, config_df)
+            with open(legacy_path, 'w', encoding='utf-8') as f:
+                on_first()
+                f.write(report)
+
+        def write_streamed(on_first):
+            report = Solidigm_LMT.generate_html_report(margin_df, worst_cases, tmp, config_df)
+            with open(streamed_path, 'w', encoding='utf-8') as f:
+                for chunk in report:
+                    on_first()
+                    f.write(chunk)
+
+        legacy = measure(write_legacy)
+        streamed = measure(write_streamed)
+        with open(legacy_path, encoding='utf-8') as f:
+            legacy_cells = CELL.findall(f.read())
+        with open(streamed_path, encoding='utf-8') as f:
+            streamed_cells = [html.unescape(cell) for cell in CELL.findall(f.read())]
+        assert legacy_cells == streamed_cells, 'streamed report cells differ from the legacy report'
+        sizes = os.path.getsize(legacy_path), os.path.getsize(streamed_path)
+
+    print(f"{args.rows} raw rows, {len(legacy_cells)} cells")
+    for name, (first, total, peak), size in (('legacy +=', legacy, sizes[0]), ('streamed', streamed, sizes[1])):
+        print(f"{name:10s}: first byte {first * 1e3:8.1f} ms, total {total:6.2f} s, "
+              f"peak {peak:7.1f} MiB, file {size / 2 ** 20:.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
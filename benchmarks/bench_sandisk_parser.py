@@ -0,0 +1,134 @@
+"""Benchmark SanDisk m_eye_vals parsing on a synthetic large capture.
+
+Compares the legacy whole-file regex parser against the streaming
+``parse_eye_vals`` and checks both produce the same eye cube.
+
+    python benchmarks/bench_sandisk_parser.py [--ptn 8] [--dac 256] [--phs 128] [--repeat 3]
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import tempfile
+import contextlib
+
+import numpy as np
+import matplotlib
+
+matplotlib.use('Agg')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'autoscript'))
+import SanDisk  # noqa: E402
+
+
+def make_capture(path, ptn, dac, phs, seed=0):
+    rng = np.random.default_rng(seed)
+    d, p = np.mgrid[0:dac, 0:phs]
+    eye = np.exp(-(((d - dac / 2) / (dac / 4)) ** 2 + ((p - phs / 2) / (phs / 4)) ** 2))
+    with open(path, 'w') as f:
+        f.write("[1] Header,\nlane,0\n[2] Axis Params,\nphs_step_ui, 0.031\ndac_step_mv, 1.5\n")
+        f.write(f"[3] m_eye_vals,\nnum_ptn, {ptn}\nnum_dac, {dac}\nnum_phs, {phs}\n")
+        for t in range(ptn):
+            values = np.clip(eye + rng.normal(0, 0.02, eye.shape), 0, 1)
+            for r in range(dac):
+                f.write(f"{t}, {r}, " + ", ".join(f"{x:.4f}" for x in values[r]) + "\n")
+        f.write("End of Data\n")
+
+
+def legacy_parse_eye_vals(file_path):
+    """The regex parser SanDisk used before the streaming one."""
+    with open(file_path, 'r') as f:
+        content = f.read()
+    
+    # Extract m_eye_vals data
+    eye_vals_section = re.search(r'\[3\] m_eye_vals,.*?(?=End of Data)', content, re.DOTALL)
+    if not eye_vals_section:
+        raise ValueError(f"Could not find m_eye_vals section in {file_path}")
+    
+    # Extract num_ptn, num_dac, num_phs
+    num_ptn = int(re.search(r'num_ptn,\s*(\d+)', eye_vals_section.group()).group(1))
+    num_dac = int(re.search(r'num_dac,\s*(\d+)', eye_vals_section.group()).group(1))
+    num_phs = int(re.search(r'num_phs,\s*(\d+)', eye_vals_section.group()).group(1))
+    
+    # Extract phs_step_ui and dac_step_mv
+    axis_params_section = re.search(r'\[2\] Axis Params,.*?(?=\[3\] m_eye_vals,)', content, re.DOTALL)
+    if not axis_params_section:
+        raise ValueError(f"Could not find Axis Params section in {file_path}")
+    phs_step_ui = float(re.search(r'phs_step_ui,\s*([\d\.]+)', axis_params_section.group()).group(1))
+    dac_step_mv = float(re.search(r'dac_step_mv,\s*([\d\.]+)', axis_params_section.group()).group(1))
+    
+    print(f"File: {file_path}, num_ptn={num_ptn}, num_dac={num_dac}, num_phs={num_phs}, phs_step_ui={phs_step_ui}, dac_step_mv={dac_step_mv}")
+    
+    # Initialize data array
+    expected_shape = (num_ptn, num_dac, num_phs)
+    eye_data = np.zeros(expected_shape)
+    
+    # Parse data lines
+    pattern_lines = re.findall(r'(\d+),\s*(\d+),\s*([\d\.\s,-]+?)(?=\n\d+,\s*\d+,|\n\s*$)', eye_vals_section.group(), re.MULTILINE)
+    for line_idx, line in enumerate(pattern_lines):
+        pattern_idx = int(line[0])
+        dac_idx = int(line[1])
+        raw_values = line[2].strip().split(',')
+        values = []
+        for x in raw_values:
+            x = x.strip()
+            if x:
+                try:
+                    values.append(float(x))
+                except ValueError:
+                    print(f"Warning: Could not convert '{x}' to float in {file_path}, pattern {pattern_idx}, dac {dac_idx}. Skipping...")
+                    continue
+        
+        if len(values) != num_phs:
+            print(f"Warning: Expected {num_phs} values, got {len(values)} in {file_path}, pattern {pattern_idx}, dac {dac_idx}. Adjusting...")
+            if len(values) < num_phs:
+                values.extend([0.0] * (num_phs - len(values)))
+            else:
+                values = values[:num_phs]
+        
+        if pattern_idx < expected_shape[0] and dac_idx < expected_shape[1]:
+            eye_data[pattern_idx, dac_idx, :] = values
+        else:
+            print(f"Warning: Invalid indices (pattern={pattern_idx}, dac={dac_idx}) in {file_path}. Skipping...")
+    
+    print(f"Parsed eye_data shape for {file_path}: {eye_data.shape}")
+    return eye_data, num_ptn, num_dac, num_phs, phs_step_ui, dac_step_mv
+
+
+
+def best_of(func, path, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            result = func(path)
+            best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ptn', type=int, default=8)
+    parser.add_argument('--dac', type=int, default=256)
+    parser.add_argument('--phs', type=int, default=128)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'sandisk0.txt')
+        make_capture(path, args.ptn, args.dac, args.phs)
+        size_mb = os.path.getsize(path) / 1e6
+        legacy_time, legacy = best_of(legacy_parse_eye_vals, path, args.repeat)
+        stream_time, streamed = best_of(SanDisk.parse_eye_vals, path, args.repeat)
+
+    assert np.array_equal(legacy[0], streamed[0]), 'eye cubes differ'
+    assert legacy[1:6] == streamed[1:6], 'axis params differ'
+    assert streamed[6] == [], f'unexpected malformed rows: {streamed[6][:3]}'
+    print(f"capture: {args.ptn}x{args.dac}x{args.phs} ({size_mb:.1f} MB)")
+    print(f"legacy regex parser : {legacy_time:.3f} s")
+    print(f"streaming parser    : {stream_time:.3f} s")
+    print(f"speedup             : {legacy_time / stream_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark the shared worst-case engine on a synthetic fleet margin table.
+
+Compares five ``df.loc[df[col].idxmin()]`` scans (per group via groupby)
+against ``worst_case.find_worst_cases`` and checks both pick the same rows.
+
+    python benchmarks/bench_worst_case.py [--rows 2000000] [--devices 5000]
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'autoscript'))
+import worst_case  # noqa: E402
+
+
+def make_table(rows, devices, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'bdf': rng.integers(0, devices, rows),
+        'lane': rng.integers(0, 16, rows),
+        'up(mV)': rng.normal(30, 5, rows).round(1),
+        'down(mV)': rng.normal(-30, 5, rows).round(1),
+        'left(uI)': rng.normal(-0.3, 0.05, rows).round(3),
+        'right(uI)': rng.normal(0.3, 0.05, rows).round(3),
+    }).assign(**{'EH*EW': lambda df: (df['up(mV)'] - df['down(mV)']) * (df['right(uI)'] - df['left(uI)'])})
+
+
+def legacy_worst_cases(df):
+    """The five idxmin/idxmax copies every analyzer carried."""
+    worst_cases = []
+    for label, column, direction in worst_case.EYE_MARGIN_SPECS:
+        row = df.loc[df[column].idxmin() if direction == 'min' else df[column].idxmax()].copy()
+        row['worst_metric'] = label
+        worst_cases.append(row)
+    return pd.DataFrame(worst_cases)
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--devices', type=int, default=5000)
+    args = parser.parse_args()
+
+    df = make_table(args.rows, args.devices)
+    legacy_time, legacy = timed(legacy_worst_cases, df)
+    engine_time, engine = timed(worst_case.find_worst_cases, df)
+    assert legacy.index.equals(engine.index), 'ungrouped worst rows differ'
+
+    legacy_grouped_time, legacy_grouped = timed(
+        lambda: pd.concat([legacy_worst_cases(group) for _, group in df.groupby('bdf')]))
+    engine_grouped_time, engine_grouped = timed(worst_case.find_worst_cases, df, by='bdf')
+    assert legacy_grouped.index.equals(engine_grouped.index), 'grouped worst rows differ'
+
+    print(f"table: {args.rows:,} rows, {args.devices:,} BDFs")
+    print(f"whole table  idxmin x5 : {legacy_time:.3f} s   engine : {engine_time:.3f} s")
+    print(f"per BDF      idxmin x5 : {legacy_grouped_time:.3f} s   engine : {engine_grouped_time:.3f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+"""Compressed, ETag-aware responses for gui_runner.
+
+Static assets are gzip/brotli compressed once at startup and report files the
+first time they are requested; both are recompressed only when their mtime
+changes. Job results and report files, which grow with use, are served from
+disk by file_response with a compressed copy written on disk instead. Dynamic JSON/HTML responses are compressed in an after_request hook
+that remembers the result per ETag. Every response carries an ETag so
+unchanged content is answered with 304.
+"""
+import os
+import gzip
+import zlib
+import hashlib
+import tempfile
+import mimetypes
+import threading
+from collections import OrderedDict
+
+from flask import Response, request, send_file
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = {
+    'application/json', 'text/html', 'text/css', 'text/plain',
+    'application/javascript', 'text/javascript', 'image/svg+xml',
+}
+MIN_SIZE = 1024  # smaller bodies are not worth the CPU
+
+
+def available_encodings():
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def choose_encoding():
+    """Best encoding the current request accepts, or None."""
+    for encoding in available_encodings():
+        if request.accept_encodings[encoding]:
+            return encoding
+    return None
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body)
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+def stream_compress(chunks, encoding):
+    """Compress an iterable of byte chunks on the fly, flushing after each one."""
+    if encoding == 'br':
+        compressor = brotli.Compressor()
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def is_compressible(mimetype):
+    return mimetype in COMPRESSIBLE_TYPES
+
+
+class Asset:
+    """One file on disk with its precomputed encodings."""
+    __slots__ = ('mtime', 'size', 'mimetype', 'etag', 'variants')
+
+    def __init__(self, path):
+        stat = os.stat(path)
+        with open(path, 'rb') as f:
+            body = f.read()
+        self.mtime = stat.st_mtime_ns
+        self.size = stat.st_size
+        self.mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.variants = {None: body}
+        if is_compressible(self.mimetype) and len(body) >= MIN_SIZE:
+            for encoding in available_encodings():
+                self.variants[encoding] = compress(body, encoding)
+
+
+class AssetStore:
+    """Serves files under root from memory, precompressed."""
+
+    def __init__(self, root, precompress=False):
+        self.root = os.path.abspath(root)
+        self._assets = {}
+        self._lock = threading.Lock()
+        if precompress:
+            for folder, _, names in os.walk(self.root):
+                for name in names:
+                    self._load(os.path.join(folder, name))
+
+    def _load(self, path):
+        asset = Asset(path)
+        with self._lock:
+            self._assets[path] = asset
+        return asset
+
+    def get(self, relpath):
+        """The Asset for relpath, reloaded if the file changed; None if missing or outside root."""
+        path = os.path.abspath(os.path.join(self.root, relpath))
+        if os.path.commonpath([path, self.root]) != self.root or not os.path.isfile(path):
+            return None
+        stat = os.stat(path)
+        with self._lock:
+            asset = self._assets.get(path)
+        if asset is None or asset.mtime != stat.st_mtime_ns or asset.size != stat.st_size:
+            asset = self._load(path)
+        return asset
+
+    def response(self, relpath, download_name=None):
+        """Response for relpath in the best accepted encoding, or None when missing."""
+        asset = self.get(relpath)
+        if asset is None:
+            return None
+        encoding = choose_encoding() if len(asset.variants) > 1 else None
+        resp = Response(asset.variants[encoding], mimetype=asset.mimetype)
+        if encoding:
+            resp.headers['Content-Encoding'] = encoding
+        if len(asset.variants) > 1:
+            resp.vary.add('Accept-Encoding')
+        if download_name:
+            resp.headers['Content-Disposition'] = f'attachment; filename="{download_name}"'
+        resp.set_etag(f'{asset.etag}-{encoding}' if encoding else asset.etag)
+        return resp.make_conditional(request)
+
+
+SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+CHUNK_SIZE = 1 << 16
+
+
+def _compressed_copy(path, encoding, folder=None):
+    """path's compressed copy for encoding, (re)written when missing or older than path.
+
+    The copy sits next to path, or in folder under a name derived from path.
+    """
+    if folder is None:
+        target = path + SUFFIXES[encoding]
+    else:
+        os.makedirs(folder, exist_ok=True)
+        target = os.path.join(folder, hashlib.sha1(path.encode('utf8')).hexdigest() + SUFFIXES[encoding])
+    try:
+        if os.stat(target).st_mtime_ns >= os.stat(path).st_mtime_ns:
+            return target
+    except FileNotFoundError:
+        pass
+    fd, partial = tempfile.mkstemp(dir=os.path.dirname(target), suffix='.tmp')
+    with open(path, 'rb') as src, os.fdopen(fd, 'wb') as dst:
+        for data in stream_compress(iter(lambda: src.read(CHUNK_SIZE), b''), encoding):
+            dst.write(data)
+    os.replace(partial, target)
+    return target
+
+
+def file_response(path, download_name=None, compressed_dir=None):
+    """Stream path from disk in the best accepted encoding, or None when missing.
+
+    Nothing is kept in memory: the compressed form is a file written on first
+    request, as a sibling (path.gz / path.br) or inside compressed_dir, and
+    send_file provides the ETag, 304 and range handling.
+    """
+    path = os.path.abspath(path)  # send_file resolves relative paths against the app root
+    if not os.path.isfile(path):
+        return None
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    compressible = is_compressible(mimetype) and os.path.getsize(path) >= MIN_SIZE
+    encoding = choose_encoding() if compressible else None
+    resp = send_file(_compressed_copy(path, encoding, compressed_dir) if encoding else path, mimetype=mimetype,
+                     as_attachment=download_name is not None,
+                     download_name=download_name or os.path.basename(path),
+                     conditional=True, etag=True)
+    if encoding:
+        resp.headers['Content-Encoding'] = encoding
+    if compressible:
+        resp.vary.add('Accept-Encoding')
+    return resp
+
+
+class CompressedBodyCache:
+    """LRU of compressed bodies keyed on (etag, encoding)."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, etag, encoding, body):
+        key = (etag, encoding)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        compressed = compress(body, encoding)
+        with self._lock:
+            self._entries[key] = compressed
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return compressed
+
+
+_body_cache = CompressedBodyCache()
+
+
+def compress_response(response):
+    """after_request hook: ETag, 304 and compression for dynamic JSON/HTML responses."""
+    if request.method not in ('GET', 'HEAD') or response.status_code != 200:
+        return response
+    if response.is_streamed or response.direct_passthrough or 'Content-Encoding' in response.headers:
+        return response
+    if not is_compressible(response.mimetype):
+        return response
+    body = response.get_data()
+    etag, _ = response.get_etag()
+    if etag is None:
+        etag = hashlib.sha1(body).hexdigest()
+    encoding = choose_encoding() if len(body) >= MIN_SIZE else None
+    if encoding:
+        response.set_data(_body_cache.get(etag, encoding, body))
+        response.headers['Content-Encoding'] = encoding
+        etag = f'{etag}-{encoding}'
+    response.vary.add('Accept-Encoding')
+    response.set_etag(etag)
+    return response.make_conditional(request)
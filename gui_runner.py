@@ -1,57 +1,196 @@
-from flask import Flask, render_template, request, send_file, jsonify
-import os, json
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory
+import os, uuid, shutil
 from werkzeug.utils import secure_filename
-from glob import glob
+from werkzeug.security import safe_join
+from report_engine import (ReportEngine, JobQueue, EngineBusy, available_scripts, build_criteria, analyzer_version,
+                           IMAGE_ASSET_FOLDER)
+from job_store import JobStore, DONE
+from result_cache import ResultCache, cache_key
+from report_index import ReportIndex, bundle_chunks, bundle_etag, parse_page_args, render_entry, page_etag
+from compression import AssetStore, compress_response, choose_encoding, stream_compress, file_response
 
-app = Flask(__name__)
+# static 由 AssetStore 處理, 啟動時先壓縮好
+app = Flask(__name__, static_folder=None)
 UPLOAD_FOLDER = 'uploads'
-ALLOWED_EXTENSIONS = {'py','json','txt','csv'}
+PROJECTS_FILE = 'data/projects.json'
+REPORTS_FOLDER = 'reports'
+REPORT_COMPRESSED_FOLDER = os.path.join('cache', 'compressed')
+ALLOWED_EXTENSIONS = {'py','json','txt','csv','log','xlsx','bin','png','jpg','jpeg','bmp'}
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+engine = ReportEngine()
+job_store = JobStore()
+result_cache = ResultCache()
+job_queue = JobQueue(engine, job_store, cache=result_cache)
+report_index = ReportIndex(extra_files=[PROJECTS_FILE])
+report_index.start()
+static_assets = AssetStore('static', precompress=True)
+app.after_request(compress_response)
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+def json_bytes_response(body, etag):
+    """Serve pre-serialized JSON; compress_response adds compression and 304s."""
+    resp = Response(body, mimetype='application/json')
+    resp.set_etag(etag)
+    return resp
+
+def save_uploads(files, upload_dir):
+    """Save uploaded files under upload_dir, keeping the folder layout of directory uploads."""
+    saved = []
+    for file in files:
+        if not file or not allowed_file(file.filename):
+            continue
+        parts = [secure_filename(p) for p in file.filename.replace('\\', '/').split('/')]
+        parts = [p for p in parts if p]
+        if not parts:
+            continue
+        fpath = os.path.join(upload_dir, *parts)
+        os.makedirs(os.path.dirname(fpath), exist_ok=True)
+        file.save(fpath)
+        saved.append(fpath)
+    return saved
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+@app.route('/static/<path:filename>', endpoint='static')
+def static_file(filename):
+    resp = static_assets.response(filename)
+    return resp if resp is not None else ('Not Found', 404)
+
+@app.route('/reports/<path:filename>')
+def report_file(filename):
+    # 從磁碟串流, 壓縮版另存在 cache/compressed, 不佔記憶體
+    path = safe_join(REPORTS_FOLDER, filename)
+    resp = file_response(path, compressed_dir=REPORT_COMPRESSED_FOLDER) if path else None
+    return resp if resp is not None else ('Not Found', 404)
+
+# 報告圖片以內容雜湊命名, 內容不會變, 可以讓瀏覽器長期快取
+@app.route('/api/assets/<name>')
+def report_asset(name):
+    return send_from_directory(IMAGE_ASSET_FOLDER, name, max_age=31536000)
+
 @app.route('/api/projects')
 def api_projects():
-    with open('data/projects.json','r',encoding='utf8') as f:
-        return jsonify(json.load(f))
+    entry = report_index.file(PROJECTS_FILE)
+    if entry is None:
+        return jsonify({'error': 'projects.json not found'}), 404
+    return json_bytes_response(entry.body, entry.etag)
+
+@app.route('/api/projects/<vendor>/<project>/bundle')
+def api_project_bundle(vendor, project):
+    """All report JSON of a project in one streamed response.
+
+    ?fields=a,b keeps only those columns; the paging args of /api/report_json
+    apply to every tab.
+    """
+    fields = [f for f in request.args.get('fields', '').split(',') if f]
+    try:
+        page = parse_page_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    entries = report_index.project_entries(vendor, project)
+    encoding = choose_encoding()
+    etag = bundle_etag(entries, fields, page)
+    if encoding:
+        etag = f'{etag}-{encoding}'
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+        resp.set_etag(etag)
+        return resp
+    chunks = bundle_chunks(vendor, project, entries, fields, page)
+    resp = Response(stream_compress(chunks, encoding) if encoding else chunks, mimetype='application/json')
+    if encoding:
+        resp.headers['Content-Encoding'] = encoding
+    resp.vary.add('Accept-Encoding')
+    resp.set_etag(etag)
+    return resp
 
 @app.route('/api/reports/<vendor>/<project>')
 def api_reports(vendor,project):
-    folder = f'reports/{vendor}/{project}'
-    files = [os.path.basename(f) for f in glob(f'{folder}/*.json') if os.path.isfile(f)]
-    return jsonify(files)
+    _, body, etag = report_index.listing(vendor, project)
+    return json_bytes_response(body, etag)
 
 @app.route('/api/report_json/<vendor>/<project>/<fname>')
 def api_report_json(vendor,project,fname):
-    path = f'reports/{vendor}/{project}/{fname}'
-    with open(path,'r',encoding='utf8') as f:
-        return jsonify(json.load(f))
+    """One report; offset/limit/sort/q/filter.<col>/tab page it server-side, fields projects columns."""
+    entry = report_index.report(vendor, project, fname)
+    if entry is None:
+        return jsonify({'error': f'Report not found: {vendor}/{project}/{fname}'}), 404
+    fields = [f for f in request.args.get('fields', '').split(',') if f]
+    try:
+        page = parse_page_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return json_bytes_response(render_entry(entry, fields, page), page_etag(entry.etag, fields, page))
 
 @app.route('/api/scripts')
 def api_scripts():
-    return jsonify([f for f in os.listdir('autoscript') if f.endswith('.py')])
+    return jsonify(available_scripts())
 
 @app.route('/api/generate_report', methods=['POST'])
 def api_generate_report():
     script = request.form.get('script')
-    eye_height = request.form.get('eye_height')
-    eye_width = request.form.get('eye_width')
-    files = request.files.getlist('files')
-    uploaded_files = []
-    for file in files:
-        if file and '.' in file.filename:
-            fname = secure_filename(file.filename)
-            fpath = os.path.join(UPLOAD_FOLDER, fname)
-            file.save(fpath)
-            uploaded_files.append(fpath)
-    # 範例: 只產生靜態報告 (你可以改為呼叫 script 執行)
-    report_path = os.path.join('reports', f'generated_report_{script}.html')
-    with open(report_path, 'w', encoding='utf8') as f:
-        f.write(f'<html><body><h1>Report for {script}</h1><p>Eye Height: {eye_height}</p><p>Eye Width: {eye_width}</p><p>Files: {", ".join(uploaded_files)}</p></body></html>')
-    return send_file(report_path, as_attachment=True)
+    if script not in available_scripts():
+        return jsonify({'error': f'Unknown script: {script}'}), 400
+    try:
+        criteria = build_criteria(script, request.form)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    upload_dir = os.path.join(UPLOAD_FOLDER, uuid.uuid4().hex)
+    uploaded_files = save_uploads(request.files.getlist('files'), upload_dir)
+    if not uploaded_files:
+        shutil.rmtree(upload_dir, ignore_errors=True)
+        return jsonify({'error': 'No supported input files were uploaded'}), 400
+
+    # 相同的檔案與 criteria 已分析過, 直接回傳快取結果
+    key = cache_key(script, analyzer_version(script, engine.image_format, engine.charts), uploaded_files, criteria, root=upload_dir)
+    # 先複製到暫存檔, 確定快取還在才建立 job; 剛好被 evict 就直接重新分析, 不留下失敗的 job
+    staged = os.path.join(job_store.folder, f'cached-{uuid.uuid4().hex}.tmp')
+    if result_cache.copy_to(key, staged):
+        shutil.rmtree(upload_dir, ignore_errors=True)
+        job_id = job_store.create(script)
+        os.replace(staged, job_store.result_path(job_id))
+        job_store.mark_done(job_id)
+        return jsonify({'job_id': job_id, 'status': DONE, 'cached': True,
+                        'status_url': f'/api/jobs/{job_id}', 'result_url': f'/api/jobs/{job_id}/result'})
+    if os.path.exists(staged):  # copy failed part way
+        os.remove(staged)
+
+    # 分析在 worker process 執行, 這裡只回傳 job id 讓前端輪詢
+    try:
+        job_id = job_queue.enqueue(script, [os.path.abspath(f) for f in uploaded_files], criteria,
+                                   cleanup=lambda: shutil.rmtree(upload_dir, ignore_errors=True),
+                                   cache_key=key)
+    except EngineBusy as e:
+        shutil.rmtree(upload_dir, ignore_errors=True)
+        return jsonify({'error': str(e)}), 429
+    return jsonify({'job_id': job_id, 'status_url': f'/api/jobs/{job_id}'}), 202
+
+@app.route('/api/jobs/<job_id>')
+def api_job_status(job_id):
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    job['position'] = job_queue.position(job_id)
+    if job['status'] == DONE:
+        job['result_url'] = f'/api/jobs/{job_id}/result'
+    return jsonify(job)
+
+@app.route('/api/jobs/<job_id>/result')
+def api_job_result(job_id):
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    if job['status'] != DONE:
+        return jsonify({'error': f"Job is {job['status']}", 'status': job['status']}), 409
+    report_name = f"generated_report_{os.path.splitext(job['script'])[0]}.html"
+    resp = file_response(job_store.result_path(job_id), download_name=report_name)
+    return resp if resp is not None else (jsonify({'error': 'Result file is missing'}), 410)
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,79 @@
+"""SQLite-backed store for report generation jobs.
+
+Job rows live in jobs/jobs.db and each finished report is written next to it
+as jobs/<id>.html, so status survives a restart and results are served from
+disk instead of memory.
+"""
+import os
+import time
+import uuid
+import sqlite3
+import threading
+
+JOB_FOLDER = 'jobs'
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    script TEXT NOT NULL,
+    status TEXT NOT NULL,
+    error TEXT,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL
+)
+"""
+
+
+class JobStore:
+    def __init__(self, folder=JOB_FOLDER):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        self.db_path = os.path.join(folder, 'jobs.db')
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(_SCHEMA)
+            # 重新啟動後, 未完成的 job 已沒有 worker 在跑
+            conn.execute("UPDATE jobs SET status=?, error=?, finished=? WHERE status IN (?, ?)",
+                         (FAILED, 'Interrupted by server restart', time.time(), QUEUED, RUNNING))
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def create(self, script):
+        job_id = uuid.uuid4().hex
+        with self._lock, self._connect() as conn:
+            conn.execute("INSERT INTO jobs (id, script, status, created) VALUES (?, ?, ?, ?)",
+                         (job_id, script, QUEUED, time.time()))
+        return job_id
+
+    def mark_running(self, job_id):
+        with self._lock, self._connect() as conn:
+            # a fast job may already have finished by the time this runs
+            conn.execute("UPDATE jobs SET status=?, started=? WHERE id=? AND status=?",
+                         (RUNNING, time.time(), job_id, QUEUED))
+
+    def mark_done(self, job_id, html=None):
+        """Mark a job done; html is written as its result unless the result file is already in place."""
+        if html is not None:
+            with open(self.result_path(job_id), 'w', encoding='utf8') as f:
+                f.write(html)
+        with self._lock, self._connect() as conn:
+            conn.execute("UPDATE jobs SET status=?, finished=? WHERE id=?", (DONE, time.time(), job_id))
+
+    def mark_failed(self, job_id, error):
+        with self._lock, self._connect() as conn:
+            conn.execute("UPDATE jobs SET status=?, error=?, finished=? WHERE id=?",
+                         (FAILED, str(error), time.time(), job_id))
+
+    def get(self, job_id):
+        """Return the job as a dict, or None if the id is unknown."""
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM jobs WHERE id=?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def result_path(self, job_id):
+        return os.path.join(self.folder, f'{job_id}.html')
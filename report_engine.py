@@ -0,0 +1,274 @@
+"""Runs the autoscript analyzers for the web UI.
+
+Analyses execute in a shared process pool and never on the Flask request
+thread: requests enqueue a job and poll for it. Each script also has its own
+concurrency limit, so a burst of heavy SanDisk or Micron jobs cannot take
+every worker.
+"""
+import os
+import sys
+import hashlib
+import threading
+import importlib
+from concurrent.futures import ProcessPoolExecutor
+
+AUTOSCRIPT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'autoscript')
+
+# Helpers every analyzer imports; a change to them changes every analyzer's output.
+SHARED_MODULES = ['analyzer_api.py', 'eye_geometry.py', 'worst_case.py', 'report_render.py', 'figure_pool.py']
+# Report templates shared the same way.
+TEMPLATE_DIR = os.path.join(AUTOSCRIPT_DIR, 'report_templates')
+
+REPORT_WORKERS = int(os.environ.get('MDMS_REPORT_WORKERS', min(4, os.cpu_count() or 1)))
+DEFAULT_SCRIPT_LIMIT = 2
+
+# 'png' or 'webp' writes report images as content-addressed files under
+# IMAGE_ASSET_FOLDER, served at IMAGE_ASSET_URL, instead of inlining them as
+# base64. Unset keeps every report a single self-contained file.
+IMAGE_FORMAT = os.environ.get('MDMS_IMAGE_ASSETS') or None
+IMAGE_ASSET_FOLDER = os.path.abspath(os.environ.get('MDMS_IMAGE_ASSET_FOLDER', 'assets'))
+IMAGE_ASSET_URL = '/api/assets'
+# 'canvas' has the analyzers that support it embed chart data for the
+# browser to draw instead of rendering images with matplotlib.
+CHART_MODE = os.environ.get('MDMS_CHARTS') or 'image'
+
+# script -> how the generator form maps onto the analyzer's criteria, how
+# many runs of it may be in flight at once, whether its analyze() takes an
+# ImageAssets for its charts and whether it can draw them as canvas charts.
+ANALYZERS = {
+    'AMD_XIO.py': {'criteria': {'eye_height': 'volt_criteria'}, 'images': True},
+    'Kioxia_EOM.py': {'criteria': {'eye_height': 'Eye Height', 'eye_width': 'Eye Width'}, 'images': True},
+    'LMT.py': {'criteria': {'eye_height': 'volt_criteria', 'eye_width': 'ui_criteria'}, 'images': True},
+    'MemEye.py': {'criteria': {}},
+    'Memeye_Analysis.py': {'criteria': {}},
+    'Microchip_PCIe.py': {'criteria': {}, 'limit': 1},
+    'Micron_analyzer.py': {'criteria': {'eye_height': 'volt_criteria', 'eye_width': 'ui_criteria'}, 'limit': 1,
+                           'images': True, 'canvas': True},
+    'NVqual.py': {'criteria': {}, 'images': True, 'canvas': True},
+    'Samsung_SAS4.py': {'criteria': {}, 'images': True},
+    'SanDisk.py': {'criteria': {}, 'limit': 1, 'canvas': True},
+    'Solidigm_LMT.py': {'criteria': {}},
+    'SwApps.py': {'criteria': {'eye_height': 'volt_criteria', 'eye_width': 'ui_criteria'}, 'images': True},
+    'astera_sdk.py': {'criteria': {'eye_height': 'volt_criteria', 'eye_width': 'ui_criteria'}, 'images': True},
+    'mlxlink.py': {'criteria': {}, 'images': True},
+}
+
+
+class EngineBusy(Exception):
+    """The script already has as many runs in flight as its limit allows."""
+
+
+def available_scripts():
+    return sorted(ANALYZERS)
+
+
+def build_criteria(script, form):
+    """Translate generator form fields (eye_height/eye_width) into analyzer criteria keys."""
+    criteria = {}
+    for field, key in ANALYZERS[script]['criteria'].items():
+        value = form.get(field)
+        if value in (None, ''):
+            continue
+        try:
+            criteria[key] = float(value)
+        except ValueError:
+            raise ValueError(f"{field} must be a number, got {value!r}")
+    return criteria
+
+
+def analyzer_version(script, image_format=None, charts='image'):
+    """Version of an analyzer for caching: a hash of its source and the shared helpers.
+
+    image_format (see IMAGE_FORMAT) and charts (see CHART_MODE) are part of
+    the version for analyzers they apply to, since they change the report.
+    """
+    digest = hashlib.sha256()
+    if image_format and ANALYZERS[script].get('images'):
+        digest.update(f'images={image_format}'.encode())
+    if charts != 'image' and ANALYZERS[script].get('canvas'):
+        digest.update(f'charts={charts}'.encode())
+    paths = [os.path.join(AUTOSCRIPT_DIR, name) for name in [script] + SHARED_MODULES]
+    paths += [os.path.join(TEMPLATE_DIR, name) for name in sorted(os.listdir(TEMPLATE_DIR))]
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def _init_worker():
+    if AUTOSCRIPT_DIR not in sys.path:
+        sys.path.insert(0, AUTOSCRIPT_DIR)
+    from analyzer_api import use_headless_backend
+    use_headless_backend()
+
+
+def run_analyzer(script, inputs, criteria, output_path=None, image_format=None, charts='image'):
+    """Worker entry point: import the analyzer and produce its report.
+
+    Without output_path the report HTML is returned. With it the report is
+    streamed chunk by chunk into output_path (through a temporary file, so the
+    path never holds a partial report) and the path is returned. With an
+    image_format, analyzers that take assets write their images to
+    IMAGE_ASSET_FOLDER; charts='canvas' switches those that support it to
+    canvas charts.
+    """
+    module = importlib.import_module(os.path.splitext(script)[0])
+    options = {}
+    if image_format and ANALYZERS[script].get('images'):
+        from report_render import ImageAssets
+        options['assets'] = ImageAssets(IMAGE_ASSET_FOLDER, IMAGE_ASSET_URL, image_format)
+    if charts != 'image' and ANALYZERS[script].get('canvas'):
+        options['charts'] = charts
+    html = module.analyze(inputs, criteria, **options)['html']
+    if output_path is None:
+        return html if isinstance(html, str) else ''.join(html)
+    tmp_path = f'{output_path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf8') as f:
+            if isinstance(html, str):
+                f.write(html)
+            else:
+                for chunk in html:
+                    f.write(chunk)
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return output_path
+
+
+class ReportEngine:
+    def __init__(self, workers=REPORT_WORKERS, image_format=IMAGE_FORMAT, charts=CHART_MODE):
+        self.workers = workers
+        self.image_format = image_format
+        self.charts = charts
+        self._executor = None
+        self._lock = threading.Lock()
+        self._slots = {
+            script: threading.BoundedSemaphore(spec.get('limit', DEFAULT_SCRIPT_LIMIT))
+            for script, spec in ANALYZERS.items()
+        }
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+            return self._executor
+
+    def submit(self, script, inputs, criteria=None, on_done=None, output_path=None):
+        """Queue an analysis and return its future.
+
+        The future's result is the report HTML, or output_path once the report
+        has been written there. Raises KeyError for an unknown script and
+        EngineBusy when the script's concurrency limit is reached.
+        on_done(future) runs once the slot is free.
+        """
+        if script not in ANALYZERS:
+            raise KeyError(script)
+        slot = self._slots[script]
+        if not slot.acquire(blocking=False):
+            raise EngineBusy(f"{script} already has the maximum number of reports running")
+        try:
+            future = self._get_executor().submit(run_analyzer, script, inputs, criteria or {}, output_path,
+                                                 self.image_format, self.charts)
+        except Exception:
+            slot.release()
+            raise
+
+        def _release(fut):
+            slot.release()
+            if on_done is not None:
+                on_done(fut)
+
+        future.add_done_callback(_release)
+        return future
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+class JobQueue:
+    """Bounded FIFO of report jobs in front of a ReportEngine.
+
+    A job waits here until its script has a free slot, so a queue of SanDisk
+    runs does not hold up jobs for other scripts. A single dispatcher thread
+    does the submitting; done callbacks only record results and wake it.
+    """
+
+    def __init__(self, engine, store, cache=None, max_pending=32):
+        self.engine = engine
+        self.store = store
+        self.cache = cache
+        self.max_pending = max_pending
+        self._pending = []
+        self._wakeup = threading.Condition()
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name='report-dispatcher', daemon=True)
+        self._dispatcher.start()
+
+    def enqueue(self, script, inputs, criteria=None, cleanup=None, cache_key=None):
+        """Create a job and return its id; raises EngineBusy when the queue is full.
+
+        With a cache_key the finished report is also stored in the result cache.
+        """
+        with self._wakeup:
+            if len(self._pending) >= self.max_pending:
+                raise EngineBusy(f"Report queue is full ({self.max_pending} jobs waiting)")
+            job_id = self.store.create(script)
+            self._pending.append((job_id, script, inputs, criteria or {}, cleanup, cache_key))
+            self._wakeup.notify()
+        return job_id
+
+    def position(self, job_id):
+        """1-based place of a queued job, or None once it has been dispatched."""
+        with self._wakeup:
+            for index, job in enumerate(self._pending):
+                if job[0] == job_id:
+                    return index + 1
+        return None
+
+    def _dispatch_loop(self):
+        while True:
+            with self._wakeup:
+                self._wakeup.wait_for(lambda: self._pending, timeout=1.0)
+                still_waiting = []
+                for job in self._pending:
+                    if not self._start(job):
+                        still_waiting.append(job)
+                self._pending = still_waiting
+                if self._pending:
+                    # 等待其他 job 完成釋放 slot
+                    self._wakeup.wait(timeout=1.0)
+
+    def _start(self, job):
+        job_id, script, inputs, criteria, cleanup, cache_key = job
+        try:
+            self.engine.submit(script, inputs, criteria,
+                               on_done=lambda fut: self._finish(job_id, fut, cleanup, cache_key),
+                               output_path=self.store.result_path(job_id))
+        except EngineBusy:
+            return False
+        except Exception as e:
+            self.store.mark_failed(job_id, e)
+            if cleanup is not None:
+                cleanup()
+            return True
+        self.store.mark_running(job_id)
+        return True
+
+    def _finish(self, job_id, future, cleanup, cache_key):
+        try:
+            # the worker has already written the report to the job's result file
+            result_path = future.result()
+            self.store.mark_done(job_id)
+            if self.cache is not None and cache_key is not None:
+                self.cache.put_file(cache_key, result_path)
+        except Exception as e:
+            self.store.mark_failed(job_id, e)
+        finally:
+            if cleanup is not None:
+                cleanup()
+            with self._wakeup:
+                self._wakeup.notify()
@@ -0,0 +1,306 @@
+"""In-memory index of the reports tree.
+
+The index keeps every reports/<vendor>/<project>/*.json parsed in memory
+together with its serialized bytes and an ETag, so the report endpoints
+answer without touching the disk. A background thread polls mtimes and
+reloads only the files and folders that changed.
+"""
+import os
+import json
+import hashlib
+import time
+import threading
+
+REPORTS_FOLDER = 'reports'
+POLL_INTERVAL = 2.0
+
+
+def serialize(obj):
+    """Compact UTF-8 JSON bytes and their ETag."""
+    body = json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf8')
+    return body, hashlib.sha1(body).hexdigest()
+
+
+class JsonEntry:
+    __slots__ = ('mtime', 'size', 'data', 'body', 'etag', 'tables')
+
+    def __init__(self, path):
+        stat = os.stat(path)
+        with open(path, 'r', encoding='utf8') as f:
+            self.data = json.load(f)
+        self.mtime = stat.st_mtime_ns
+        self.size = stat.st_size
+        self.body, self.etag = serialize(self.data)
+        self.tables = {}  # (tablist id, tab id) -> TabTable, built on first query
+
+    def table(self, tablist, tab):
+        key = (tablist.get('id'), tab.get('id'))
+        table = self.tables.get(key)
+        if table is None:
+            table = self.tables[key] = TabTable(tab.get('content') or [])
+        return table
+
+    def is_stale(self, stat):
+        return stat.st_mtime_ns != self.mtime or stat.st_size != self.size
+
+
+def _cell_text(value):
+    if value is None:
+        return ''
+    return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+
+def _sort_key(text):
+    """Numbers sort numerically and before text; blanks and '-' go last."""
+    stripped = text.strip()
+    if stripped in ('', '-'):
+        return (2, 0.0, '')
+    try:
+        return (0, float(stripped), '')
+    except ValueError:
+        return (1, 0.0, stripped.lower())
+
+
+class TabTable:
+    """Columnar copy of one tab's rows used to filter, sort and page it."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.columns = list(dict.fromkeys(k for row in rows if isinstance(row, dict) for k in row))
+        self.lowered = {
+            column: [_cell_text(row.get(column)).lower() if isinstance(row, dict) else '' for row in rows]
+            for column in self.columns
+        }
+        self.row_text = ['\x1f'.join(values) for values in zip(*self.lowered.values())] if self.columns else [''] * len(rows)
+        self._sort_keys = {}
+
+    def sort_keys(self, column):
+        keys = self._sort_keys.get(column)
+        if keys is None:
+            keys = self._sort_keys[column] = [
+                _sort_key(_cell_text(row.get(column)) if isinstance(row, dict) else '') for row in self.rows
+            ]
+        return keys
+
+    def query(self, q=None, filters=None, sort=None, offset=0, limit=None):
+        """Return (matching row count, rows of the requested page)."""
+        indices = range(len(self.rows))
+        if q:
+            needle = q.lower()
+            indices = [i for i in indices if needle in self.row_text[i]]
+        for column, value in (filters or {}).items():
+            values = self.lowered.get(column)
+            needle = value.lower()
+            indices = [i for i in indices if values is not None and needle in values[i]]
+        if sort:
+            column = sort.lstrip('-')
+            if column in self.lowered:
+                keys = self.sort_keys(column)
+                blanks = [i for i in indices if keys[i][0] == 2]
+                filled = [i for i in indices if keys[i][0] != 2]
+                # blanks stay at the bottom in both directions
+                indices = sorted(filled, key=keys.__getitem__, reverse=sort.startswith('-')) + blanks
+        indices = list(indices)
+        end = None if limit is None else offset + limit
+        return len(indices), [self.rows[i] for i in indices[offset:end]]
+
+
+PAGE_ARGS = ('offset', 'limit', 'sort', 'q', 'tab')
+FILTER_PREFIX = 'filter.'
+MAX_PAGE_SIZE = 1000
+
+
+def parse_page_args(args):
+    """Paging options from query args, or None when the request asks for the whole report.
+
+    offset/limit page the rows, sort=col or -col orders them, q searches every
+    column, filter.<col>=text keeps rows whose column contains text and tab=<id>
+    limits the response to one tab.
+    """
+    filters = {k[len(FILTER_PREFIX):]: v for k, v in args.items() if k.startswith(FILTER_PREFIX) and v}
+    if not filters and not any(args.get(k) for k in PAGE_ARGS):
+        return None
+    try:
+        offset = max(0, int(args.get('offset') or 0))
+        limit = min(MAX_PAGE_SIZE, max(1, int(args.get('limit') or MAX_PAGE_SIZE)))
+    except ValueError:
+        raise ValueError('offset and limit must be integers')
+    return {'offset': offset, 'limit': limit, 'sort': args.get('sort') or None,
+            'q': args.get('q') or None, 'tab': args.get('tab') or None, 'filters': filters}
+
+
+def page_report(entry, page, fields=None):
+    """The entry's tablist report with every tab reduced to one page of rows.
+
+    Each paged tab also carries its columns, the matching row count and the
+    offset/limit used.
+    """
+    data = entry.data
+    if not isinstance(data, dict) or 'tablists' not in data:
+        return data
+    tablists = []
+    for tablist in data['tablists']:
+        tabs = []
+        for tab in tablist.get('tabs', []):
+            if page['tab'] and tab.get('id') != page['tab']:
+                continue
+            table = entry.table(tablist, tab)
+            total, rows = table.query(page['q'], page['filters'], page['sort'], page['offset'], page['limit'])
+            columns = [c for c in table.columns if not fields or c in fields]
+            if fields:
+                rows = [{k: row[k] for k in columns if k in row} for row in rows]
+            tabs.append(dict(tab, content=rows, columns=columns, total=total,
+                             offset=page['offset'], limit=page['limit']))
+        if tabs:
+            tablists.append(dict(tablist, tabs=tabs))
+    return dict(data, tablists=tablists)
+
+
+class ReportIndex:
+    def __init__(self, root=REPORTS_FOLDER, extra_files=(), poll_interval=POLL_INTERVAL):
+        self.root = root
+        self.extra_files = list(extra_files)
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._files = {}     # path -> JsonEntry
+        self._listings = {}  # (vendor, project) -> (names, body, etag)
+        self._poller = None
+        self.refresh()
+
+    def start(self):
+        """Start polling the tree for changes in a daemon thread."""
+        if self._poller is None:
+            self._poller = threading.Thread(target=self._poll, name='report-index', daemon=True)
+            self._poller.start()
+
+    def _poll(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Warning: report index refresh failed: {e}")
+
+    def _scan(self):
+        """Yield (vendor, project, [json names]) for every project folder."""
+        if not os.path.isdir(self.root):
+            return
+        for vendor in sorted(os.scandir(self.root), key=lambda e: e.name):
+            if not vendor.is_dir():
+                continue
+            for project in sorted(os.scandir(vendor.path), key=lambda e: e.name):
+                if not project.is_dir():
+                    continue
+                names = sorted(e.name for e in os.scandir(project.path)
+                               if e.is_file() and e.name.endswith('.json'))
+                yield vendor.name, project.name, names
+
+    def _load(self, path, old):
+        """Return an up-to-date entry for path, reusing old when it has not changed."""
+        stat = os.stat(path)
+        if old is not None and not old.is_stale(stat):
+            return old
+        try:
+            return JsonEntry(path)
+        except ValueError as e:
+            print(f"Warning: could not parse {path}: {e}")
+            return None
+
+    def refresh(self):
+        """Re-stat the tree and reload anything whose mtime or size changed."""
+        files, listings = {}, {}
+        with self._lock:
+            old_files, old_listings = self._files, self._listings
+        for vendor, project, names in self._scan():
+            for name in names:
+                path = os.path.join(self.root, vendor, project, name)
+                entry = self._load(path, old_files.get(path))
+                if entry is not None:
+                    files[path] = entry
+            old = old_listings.get((vendor, project))
+            listings[(vendor, project)] = old if old and old[0] == names else (names,) + serialize(names)
+        for path in self.extra_files:
+            if os.path.isfile(path):
+                entry = self._load(path, old_files.get(path))
+                if entry is not None:
+                    files[path] = entry
+        with self._lock:
+            self._files, self._listings = files, listings
+
+    def listing(self, vendor, project):
+        """(names, body, etag) for a project; a missing project lists nothing."""
+        with self._lock:
+            listing = self._listings.get((vendor, project))
+        return listing or ((),) + serialize([])
+
+    def report(self, vendor, project, fname):
+        return self.file(os.path.join(self.root, vendor, project, fname))
+
+    def file(self, path):
+        """The JsonEntry for an indexed path, or None."""
+        with self._lock:
+            return self._files.get(path)
+
+    def project_entries(self, vendor, project):
+        """[(name, JsonEntry)] for every parsed report in a project, in listing order."""
+        names = self.listing(vendor, project)[0]
+        with self._lock:
+            entries = [(name, self._files.get(os.path.join(self.root, vendor, project, name))) for name in names]
+        return [(name, entry) for name, entry in entries if entry is not None]
+
+
+def project_fields(data, fields):
+    """Keep only the given columns in every tab's content rows of a tablist report."""
+    if not fields or not isinstance(data, dict) or 'tablists' not in data:
+        return data
+    tablists = []
+    for tablist in data['tablists']:
+        tabs = []
+        for tab in tablist.get('tabs', []):
+            content = tab.get('content')
+            if isinstance(content, list):
+                content = [{k: row[k] for k in fields if k in row} if isinstance(row, dict) else row
+                           for row in content]
+            tabs.append(dict(tab, content=content))
+        tablists.append(dict(tablist, tabs=tabs))
+    return dict(data, tablists=tablists)
+
+
+def page_etag(entry_etag, fields=None, page=None):
+    """ETag of a report as served with a projection and/or page."""
+    if not fields and not page:
+        return entry_etag
+    key = json.dumps([entry_etag, fields or [], page], sort_keys=True)
+    return hashlib.sha1(key.encode('utf8')).hexdigest()
+
+
+def bundle_etag(entries, fields=None, page=None):
+    digest = hashlib.sha1()
+    for name, entry in entries:
+        digest.update(name.encode('utf8'))
+        digest.update(entry.etag.encode('ascii'))
+    digest.update(','.join(fields or ()).encode('utf8'))
+    digest.update(json.dumps(page, sort_keys=True).encode('utf8'))
+    return digest.hexdigest()
+
+
+def render_entry(entry, fields=None, page=None):
+    """Serialized bytes of a report after projection and paging."""
+    if page:
+        return serialize(page_report(entry, page, fields))[0]
+    if fields:
+        return serialize(project_fields(entry.data, fields))[0]
+    return entry.body
+
+
+def bundle_chunks(vendor, project, entries, fields=None, page=None):
+    """Yield {"vendor","project","reports":[{"name","data"}...]} piece by piece.
+
+    Without a projection or page the stored bytes of each report are reused as-is.
+    """
+    yield serialize({'vendor': vendor, 'project': project})[0][:-1] + b',"reports":['
+    for index, (name, entry) in enumerate(entries):
+        body = render_entry(entry, fields, page)
+        prefix = b',' if index else b''
+        yield prefix + b'{"name":' + serialize(name)[0] + b',"data":' + body + b'}'
+    yield b']}'
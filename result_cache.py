@@ -0,0 +1,126 @@
+"""Content-addressed cache of finished analyzer reports.
+
+Entries are keyed on the analyzer, its version, the SHA-256 of every input
+file and the criteria, and stored as cache/<key>.html. A hit refreshes the
+entry's mtime; when the folder grows past max_bytes the least recently used
+entries are removed first.
+"""
+import os
+import json
+import shutil
+import hashlib
+import threading
+
+CACHE_FOLDER = 'cache'
+CACHE_MAX_BYTES = int(os.environ.get('MDMS_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(script, version, input_files, criteria, root=None):
+    """Key for one analysis.
+
+    File names are part of the key (relative to root) because analyzers read
+    lane numbers and devices from them.
+    """
+    inputs = sorted(
+        (os.path.relpath(path, root) if root else os.path.basename(path), file_sha256(path))
+        for path in input_files
+    )
+    payload = json.dumps([script, version, inputs, criteria or {}], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf8')).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, folder=CACHE_FOLDER, max_bytes=CACHE_MAX_BYTES):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+        self._sizes = {}
+        for name in os.listdir(folder):
+            if name.endswith('.html'):
+                self._sizes[name[:-5]] = os.path.getsize(os.path.join(folder, name))
+
+    def _path(self, key):
+        return os.path.join(self.folder, f'{key}.html')
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._sizes
+
+    def get(self, key):
+        """Return the cached HTML for key, or None."""
+        path = self._path(key)
+        with self._lock:
+            if key not in self._sizes:
+                return None
+            try:
+                with open(path, 'r', encoding='utf8') as f:
+                    html = f.read()
+                os.utime(path)
+            except OSError:
+                self._sizes.pop(key, None)
+                return None
+        return html
+
+    def copy_to(self, key, dest_path):
+        """Copy the cached report for key to dest_path; returns False on a miss."""
+        path = self._path(key)
+        with self._lock:
+            if key not in self._sizes:
+                return False
+            try:
+                shutil.copyfile(path, dest_path)
+                os.utime(path)
+            except OSError:
+                self._sizes.pop(key, None)
+                return False
+        return True
+
+    def put(self, key, html):
+        path = self._path(key)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf8') as f:
+            f.write(html)
+        self._store(key, tmp_path)
+
+    def put_file(self, key, source_path):
+        """Cache a report that is already on disk without reading it into memory."""
+        path = self._path(key)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        shutil.copyfile(source_path, tmp_path)
+        self._store(key, tmp_path)
+
+    def _store(self, key, tmp_path):
+        path = self._path(key)
+        with self._lock:
+            os.replace(tmp_path, path)
+            self._sizes[key] = os.path.getsize(path)
+            self._evict()
+
+    def _last_used(self, key):
+        try:
+            return os.path.getmtime(self._path(key))
+        except OSError:
+            return 0
+
+    def _evict(self):
+        total = sum(self._sizes.values())
+        if total <= self.max_bytes:
+            return
+        by_age = sorted(self._sizes, key=self._last_used)
+        for key in by_age:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            total -= self._sizes.pop(key)
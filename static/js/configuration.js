@@ -234,20 +234,18 @@ async function generateDynamicTabs(projectPath) {
     }
 
     try {
-        const response = await fetch(`/reports/${projectPath}/`);
-        if (!response.ok) throw new Error(`Failed to access project directory: ${response.statusText}`);
-        const htmlText = await response.text();
-        const parser = new DOMParser();
-        const doc = parser.parseFromString(htmlText, 'text/html');
-        const files = Array.from(doc.querySelectorAll('a'))
-            .map(link => link.getAttribute('href'))
-            .filter(file => file.endsWith('.json') && file !== 'config.json');
+        // One request for every report in the project
+        const response = await fetch(`/api/projects/${projectPath}/bundle?limit=${REPORT_PAGE_SIZE}`);
+        if (!response.ok) throw new Error(`Failed to load project reports: ${response.statusText}`);
+        const bundle = await response.json();
+        const reports = bundle.reports.filter(report => report.name !== 'config.json');
 
         // Clear existing
         tabList.innerHTML = '';
         container.innerHTML = '';
 
-        files.forEach((file, index) => {
+        reports.forEach((report, index) => {
+            const file = report.name;
             const tabId = `dynamic-tab-${index}`;
             const panelId = `dynamic-panel-${index}`;
             // Normalize the title by replacing non-standard spaces with regular spaces
@@ -270,21 +268,13 @@ async function generateDynamicTabs(projectPath) {
             panel.setAttribute('role', 'tabpanel');
             panel.setAttribute('aria-labelledby', tabId);
             if (index !== 0) panel.hidden = true;
-            panel.innerHTML = `<p>Loading ${file}...</p>`;
             container.appendChild(panel);
 
-            // Load content
-            fetch(`/reports/${projectPath}/${file}`)
-                .then(res => res.json())
-                .then(json => {
-                    const html = renderJsonAsTable(json);
-                    panel.innerHTML = html || `<pre>${JSON.stringify(json, null, 2)}</pre>`;
-                    initConfiguration(panel); // Initialize search and sorting for this panel
-                })
-                .catch(err => {
-                    panel.innerHTML = `<p class="text-red-500">Failed to load ${file}</p>`;
-                    console.error(`Error loading ${file}:`, err);
-                });
+            // Rows are paged, sorted and searched server-side
+            const reportUrl = `/api/report_json/${projectPath}/${encodeURIComponent(file)}`;
+            if (!renderPagedReport(panel, reportUrl, report.data)) {
+                panel.innerHTML = `<pre>${JSON.stringify(report.data, null, 2)}</pre>`;
+            }
         });
 
         // Handle tab switching
@@ -58,27 +58,30 @@ loadProjects();
 
 async function loadProjectReport(vendor, project){
     $('#mainContent').html('<h3>Loading...</h3>');
-    const resp = await fetch(`/api/reports/${vendor}/${project}`); 
-    const files = await resp.json();
-    if(!files.length) { 
+    // 一次取得整個 project 的所有 report JSON, 每個 tab 只帶第一頁
+    const projectPath = `${encodeURIComponent(vendor)}/${encodeURIComponent(project)}`;
+    const resp = await fetch(`/api/projects/${projectPath}/bundle?limit=${REPORT_PAGE_SIZE}`);
+    const bundle = await resp.json();
+    const reports = bundle.reports || [];
+    if(!reports.length) { 
         $('#mainContent').html('<p>No report JSON found.</p>'); 
         return; 
     }
     let tabHtml = `<div class="tablist" role="tablist">`;
     let panelHtml = ``;
-    files.forEach((fname,i)=>{
+    reports.forEach((report,i)=>{
         let tabid = `tab${i}`;
-        tabHtml += `<div class="tab${i==0?' active':''}" data-tab="${tabid}" role="tab" tabindex="0">${fname.replace('.json','')}</div>`;
-        panelHtml += `<section class="tabpanel${i==0?' active':''}" id="${tabid}"><div>Loading...</div></section>`;
+        tabHtml += `<div class="tab${i==0?' active':''}" data-tab="${tabid}" role="tab" tabindex="0">${report.name.replace('.json','')}</div>`;
+        panelHtml += `<section class="tabpanel${i==0?' active':''}" id="${tabid}"></section>`;
     });
     tabHtml += `</div>`;
     $('#mainContent').html(tabHtml+panelHtml);
-
-    // 載入每個 json 成表格
-    files.forEach((fname,i)=>{
-        fetch(`/api/report_json/${vendor}/${project}/${fname}`).then(r=>r.json()).then(json=>{
-            $(`#tab${i}`).html(renderJsonTable(json));
-        });
+    reports.forEach((report,i)=>{
+        let panel = document.getElementById(`tab${i}`);
+        let reportUrl = `/api/report_json/${projectPath}/${encodeURIComponent(report.name)}`;
+        if(!renderPagedReport(panel, reportUrl, report.data)){
+            panel.innerHTML = "<pre>"+JSON.stringify(report.data,null,2)+"</pre>";
+        }
     });
 
     // tab 切換
@@ -95,24 +98,6 @@ async function loadProjectReport(vendor, project){
     $('.tabpanel').not('.active').hide();
 }
 
-function renderJsonTable(json){
-    if(!json.tablists) return "<pre>"+JSON.stringify(json,null,2)+"</pre>";
-    let html = "";
-    json.tablists.forEach(tablist=>{
-        tablist.tabs.forEach(tab=>{
-            let content = tab.content;
-            if(!Array.isArray(content) || content.length==0) return;
-            let headers = Object.keys(content[0]);
-            html += `<table class="config-table"><thead><tr>${headers.map(h=>`<th>${h}</th>`).join('')}</tr></thead><tbody>`;
-            content.forEach(row=>{
-                html += "<tr>"+headers.map(h=>`<td>${row[h]||""}</td>`).join('')+"</tr>";
-            });
-            html += "</tbody></table>";
-        });
-    });
-    return html;
-}
-
 // 點選Report Generate
 $('#reportGenerateBtn').click(function(){
     $('.project-link').removeClass('active');
@@ -123,18 +108,37 @@ $('#reportGenerateBtn').click(function(){
     $('#generateForm').submit(async function(e){
         e.preventDefault();
         let formData = new FormData(this);
-        $('#generateResult').html('Generating...');
+        $('#generateResult').html('Uploading...');
         const resp = await fetch('/api/generate_report',{method:'POST',body:formData});
-        if(resp.ok){
-            const blob = await resp.blob();
-            const url = window.URL.createObjectURL(blob);
-            $('#generateResult').html(`<a href="${url}" download="report.html" class="nav-button" style="margin-top:1rem;">Download Report</a>`);
-        }else{
-            const err = await resp.text();
-            $('#generateResult').html('<span style="color:red;">Error: '+err+'</span>');
+        const data = await resp.json().catch(()=>({error: resp.statusText}));
+        if(!resp.ok){
+            showGenerateError(data.error);
+            return;
         }
+        pollJob(data.job_id);
     });
 });
+// 輪詢 job 狀態, 完成後提供下載連結
+async function pollJob(jobId){
+    const resp = await fetch(`/api/jobs/${jobId}`);
+    const job = await resp.json();
+    if(!resp.ok){
+        showGenerateError(job.error);
+        return;
+    }
+    if(job.status==='done'){
+        $('#generateResult').html(`<a href="${job.result_url}" download class="nav-button" style="margin-top:1rem;">Download Report</a>`);
+    }else if(job.status==='failed'){
+        showGenerateError(job.error);
+    }else{
+        let msg = job.status==='queued' && job.position ? `Queued (position ${job.position})...` : 'Generating...';
+        $('#generateResult').html(msg);
+        setTimeout(()=>pollJob(jobId), 1500);
+    }
+}
+function showGenerateError(err){
+    $('#generateResult').html('<span style="color:red;">Error: '+(err||'Unknown error')+'</span>');
+}
 async function loadScriptList(){
     const resp = await fetch('/api/scripts'); 
     const scripts = await resp.json();
@@ -0,0 +1,109 @@
+// Server-side paged tables for tablist reports.
+// The bundle / report_json endpoints return one page per tab (content, columns,
+// total, offset, limit); paging, sorting and searching ask the server for the
+// next page instead of holding every row in the DOM.
+const REPORT_PAGE_SIZE = 100;
+
+function escapeCell(value) {
+    const div = document.createElement('div');
+    div.textContent = value == null ? '' : (typeof value === 'string' ? value : JSON.stringify(value));
+    return div.innerHTML;
+}
+
+function pagedCellHtml(value) {
+    if (typeof value === 'string' && value.includes('.html')) {
+        return `<a href="${escapeCell(value)}" target="_blank">Report</a>`;
+    }
+    return escapeCell(value);
+}
+
+// reportUrl: /api/report_json/<vendor>/<project>/<file>; tab: a paged tab from the server
+function renderPagedTab(container, reportUrl, tab) {
+    const state = { q: '', sort: '', offset: tab.offset || 0, limit: tab.limit || REPORT_PAGE_SIZE };
+    let searchTimer;
+
+    container.innerHTML = `
+        <div class="paged-toolbar">
+            <input type="search" class="input paged-search" placeholder="Search...">
+            <button type="button" class="nav-button paged-prev">&lt;</button>
+            <span class="paged-status"></span>
+            <button type="button" class="nav-button paged-next">&gt;</button>
+        </div>
+        <table class="config-table"><thead></thead><tbody></tbody></table>`;
+    const search = container.querySelector('.paged-search');
+    const status = container.querySelector('.paged-status');
+    const prev = container.querySelector('.paged-prev');
+    const next = container.querySelector('.paged-next');
+    const thead = container.querySelector('thead');
+    const tbody = container.querySelector('tbody');
+    const table = container.querySelector('table');
+
+    // Same column highlight as renderJsonAsTable; delegated, so it survives redraws
+    table.addEventListener('mouseover', highlightColumn);
+    table.addEventListener('mouseout', clearHighlight);
+
+    function draw(page) {
+        const columns = page.columns || [];
+        thead.innerHTML = '<tr>' + columns.map(c => {
+            const mark = state.sort === c ? ' ▲' : state.sort === '-' + c ? ' ▼' : '';
+            return `<th data-column="${escapeCell(c)}" style="cursor:pointer;">${escapeCell(c)}${mark}</th>`;
+        }).join('') + '</tr>';
+        tbody.innerHTML = page.content.length
+            ? page.content.map(row =>
+                '<tr>' + columns.map(c => `<td>${pagedCellHtml(row[c])}</td>`).join('') + '</tr>'
+            ).join('')
+            : `<tr><td colspan="${Math.max(columns.length, 1)}">No rows</td></tr>`;
+        const first = page.total ? page.offset + 1 : 0;
+        status.textContent = `${first}-${page.offset + page.content.length} of ${page.total}`;
+        prev.disabled = page.offset <= 0;
+        next.disabled = page.offset + page.content.length >= page.total;
+        thead.querySelectorAll('th').forEach(th => th.addEventListener('click', () => {
+            const column = th.dataset.column;
+            state.sort = state.sort === column ? '-' + column : column;
+            state.offset = 0;
+            load();
+        }));
+    }
+
+    async function load() {
+        const params = new URLSearchParams({ tab: tab.id, offset: state.offset, limit: state.limit });
+        if (state.q) params.set('q', state.q);
+        if (state.sort) params.set('sort', state.sort);
+        const resp = await fetch(`${reportUrl}?${params}`);
+        if (!resp.ok) {
+            status.textContent = 'Failed to load page';
+            return;
+        }
+        const json = await resp.json();
+        const page = json.tablists.flatMap(tl => tl.tabs).find(t => t.id === tab.id);
+        if (page) draw(page);
+    }
+
+    search.addEventListener('input', () => {
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(() => {
+            state.q = search.value.trim();
+            state.offset = 0;
+            load();
+        }, 300);
+    });
+    prev.addEventListener('click', () => { state.offset = Math.max(0, state.offset - state.limit); load(); });
+    next.addEventListener('click', () => { state.offset += state.limit; load(); });
+
+    draw(tab);
+}
+
+// Render every tab of a paged tablist report into container; returns false for non-tablist JSON.
+function renderPagedReport(container, reportUrl, json) {
+    if (!json || !Array.isArray(json.tablists)) return false;
+    container.innerHTML = '';
+    json.tablists.forEach(tablist => {
+        tablist.tabs.forEach(tab => {
+            if (!Array.isArray(tab.content)) return;
+            const section = document.createElement('div');
+            container.appendChild(section);
+            renderPagedTab(section, reportUrl, tab);
+        });
+    });
+    return true;
+}